@@ -9,7 +9,7 @@ motivational filler the reader can't check.
 
 from django.utils import timezone
 
-from analytics import periods, services
+from analytics import services
 from core import business_days
 
 
@@ -45,28 +45,21 @@ def _num(value):
     return f"{value:g}" if isinstance(value, float) else str(int(value))
 
 
-def _net_for(user, preset):
-    """Just the profit/loss for one window, without building a whole report."""
-    first, last, _ = periods.resolve(preset)
-    begin, finish = periods.as_range(first, last)
-    sales = services.sales_for(user, begin, finish)
-    costs = services.costs_for(user, begin, finish)
-    net = sales["gross_profit"] - costs["total"]
-    return {"net": {"profit": float(net), "is_profit": net >= 0}}
+# The parts of today's overview the nudges read.
+SECTIONS = ["sales", "targets", "monthly_commitment", "to_do", "receivables", "dead_stock"]
 
 
 def build_messages(user, today=None):
     """Ranked nudges — the most actionable first, capped so the strip stays short.
 
-    `today` can be passed in when the caller has already built it, which the
-    feed does — otherwise the dashboard pays for the same ~55-query report
-    twice on every load.
+    `today` can be passed in when the caller has already built it (with at
+    least SECTIONS), which the feed does — otherwise the dashboard pays for
+    the same report twice on every load.
     """
-    today = today or services.build_overview(user, preset="today")
-    # Only yesterday's net result is needed, and a full overview costs ~55
-    # queries to produce it — the comparison window, dead stock, the focus
-    # engine, all discarded. Two aggregates give the same number.
-    yesterday = _net_for(user, "yesterday")
+    today = today or services.build_overview(user, preset="today", sections=SECTIONS)
+    # Only yesterday's cash result is needed: the lazy Overview runs the
+    # sales and cost aggregates for it and nothing else.
+    yesterday_net = services.Overview(user, preset="yesterday").cash_profit
 
     messages = []
 
@@ -75,7 +68,7 @@ def build_messages(user, today=None):
             {"tone": tone, "emoji": emoji, "title": title, "detail": detail}
         )
 
-    y_net = yesterday["net"]
+    y_net = {"profit": float(yesterday_net), "is_profit": yesterday_net >= 0}
     t_sales = today["sales"]
     targets = today["targets"]
     commitment = today["monthly_commitment"]
@@ -84,7 +77,7 @@ def build_messages(user, today=None):
     # owner to sell more would be nonsense — so the day's nudges are replaced
     # by the one thing that is still true: the bills kept running.
     closed = business_days.closed_weekdays(user)
-    is_closed_today = (timezone.localdate().weekday() in closed)
+    is_closed_today = not business_days.is_open(timezone.localdate(), closed)
 
     # The break-even already carries the shop's share of rent and payroll —
     # charged_costs_for spreads them across the month's open days — so this is
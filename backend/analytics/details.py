@@ -4,12 +4,31 @@ The overview answers "what is wrong". These answer "which rows exactly", so the
 user can act instead of going hunting. One function per topic, all returning the
 same envelope — {title, note, columns, rows} — so the frontend renders any of
 them with a single table component rather than seven bespoke views.
+
+A topic describes its rows as a query (a Table) rather than building the list
+itself: a shop with fifty thousand products used to get every idle one in a
+single response, sorted in Python. The Table pages through the query with a
+cursor, sorts on any column it declares sortable, and its totals come from
+one aggregate, so the note above the table still covers every row. The same
+query feeds the CSV/XLSX export in analytics.exports.
 """
 
+import datetime
 from decimal import Decimal
 
-from django.db.models import DecimalField, F, Max, Sum, Value
-from django.db.models.functions import Coalesce
+from django.db.models import (
+    Count,
+    DecimalField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce, NullIf, TruncDate
 from django.utils import timezone
 
 from banking.models import Loan, RecurringCost, Transaction
@@ -17,11 +36,20 @@ from orders.models import Order, OrderItem
 from products.models import Product
 
 from core import business_days
+from core.pagination import after as _after, decode_cursor, encode_cursor, plain
 
 from . import periods, services
 
 ZERO = Decimal("0")
 
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# "Never sold" sorts as the longest idle.
+NEVER = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
 
 def _envelope(title, note, columns, rows):
     return {"title": title, "note": note, "columns": columns, "rows": rows}
@@ -33,67 +61,173 @@ def _days_ago(value):
     return (timezone.now().date() - value.date()).days
 
 
+def _field(item, name):
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+class Table:
+    """One topic's rows as a query, and what the envelope says around them.
+
+    `sorts` maps a sort key (usually a column key) to a field, annotation or
+    expression; a string starting with "-" sorts that field the other way,
+    for columns like "days idle" that run opposite to the date behind them.
+    `keys` are fields that, after the sort value, identify a row, so the
+    cursor can say exactly where a page ended.
+    """
+
+    def __init__(
+        self,
+        title,
+        note,
+        columns,
+        queryset,
+        row,
+        sorts,
+        default_sort,
+        keys=("id",),
+        totals=None,
+        count=None,
+        extra=None,
+    ):
+        self.title = title
+        self.note = note
+        self.columns = columns
+        self.queryset = queryset
+        self.row = row
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.keys = keys
+        self.totals = totals or {}
+        self.count = count
+        self.extra = extra or {}
+
+    def ordered(self, sort=None):
+        """(queryset in `sort` order, order fields, descending). ValueError on
+        a sort the table does not declare."""
+        sort = sort or self.default_sort
+        descending = sort.startswith("-")
+        spec = self.sorts.get(sort.lstrip("-"))
+        if spec is None:
+            raise ValueError(sort)
+        if isinstance(spec, str):
+            if spec.startswith("-"):
+                descending = not descending
+                spec = spec[1:]
+            spec = F(spec)
+        fields = ["sort_value", *self.keys]
+        prefix = "-" if descending else ""
+        queryset = self.queryset.annotate(sort_value=spec).order_by(
+            *(prefix + name for name in fields)
+        )
+        return queryset, fields, descending
+
+    def rows(self, sort=None):
+        """Every row in `sort` order, fetched in chunks — for the export.
+
+        Not a generator itself, so a bad sort fails here and not halfway
+        through a download.
+        """
+        queryset, _, _ = self.ordered(sort)
+        return (self.row(item) for item in queryset.iterator(chunk_size=1000))
+
+    def page(self, sort=None, cursor=None, limit=PAGE_SIZE):
+        after = None
+        if cursor:
+            try:
+                state = decode_cursor(cursor)
+                sort, after = state["sort"], state["after"]
+            except (KeyError, TypeError):
+                raise ValueError(cursor)
+        sort = sort or self.default_sort
+        limit = min(max(1, limit), MAX_PAGE_SIZE)
+
+        queryset, fields, descending = self.ordered(sort)
+        if after is not None:
+            queryset = queryset.filter(_after(fields, after, descending))
+        items = list(queryset[: limit + 1])
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(
+                {"sort": sort, "after": [plain(_field(last, name)) for name in fields]}
+            )
+
+        data = _envelope(
+            self.title,
+            self.note,
+            [{**column, "sortable": column["key"] in self.sorts} for column in self.columns],
+            [self.row(item) for item in items],
+        )
+        data.update(self.extra)
+        data.update(
+            {
+                "totals": self.totals,
+                "count": self.count,
+                "sort": sort,
+                "next": next_cursor,
+            }
+        )
+        return data
+
+
 def dead_stock(user, begin, finish):
     """Products holding money that did not sell in this window.
 
     `last_sold` is looked up across all time, not just the window — "never sold"
     and "last sold nine months ago" are different problems and the user needs to
-    tell them apart.
+    tell them apart. Both are correlated subqueries, so the database checks
+    only the products it is about to return instead of receiving the id of
+    every product sold in the window.
     """
-    sold_ids = {
-        pid
-        for pid in Order.objects.filter(user=user, created_at__range=(begin, finish))
-        .exclude(status__in=services.DEAD_ORDER_STATES)
-        .values_list("items__product_id", flat=True)
-        if pid
-    }
-
+    sales = OrderItem.objects.filter(order__user=user, product=OuterRef("pk")).exclude(
+        order__status__in=services.DEAD_ORDER_STATES
+    )
     stuck = (
         Product.objects.filter(user=user, is_active=True, stock__gt=0)
-        .exclude(id__in=sold_ids)
-        .annotate(tied=F("stock") * F("buy_price"))
-        .order_by("-tied")
-    )
-
-    # One grouped query for every product's most recent sale, rather than a
-    # lookup per row.
-    last_sales = {
-        row["product_id"]: row["last"]
-        for row in OrderItem.objects.filter(
-            order__user=user, product_id__in=[p.id for p in stuck]
+        .filter(~Exists(sales.filter(order__created_at__range=(begin, finish))))
+        .annotate(
+            tied=ExpressionWrapper(F("stock") * F("buy_price"), output_field=MONEY),
+            unit_profit=ExpressionWrapper(
+                F("sell_price") - F("buy_price"), output_field=MONEY
+            ),
+            last_sold=Subquery(
+                sales.order_by("-order__created_at").values("order__created_at")[:1]
+            ),
+            idle_since=Coalesce("last_sold", Value(NEVER)),
         )
-        .exclude(order__status__in=services.DEAD_ORDER_STATES)
-        .values("product_id")
-        .annotate(last=Max("order__created_at"))
-    }
+    )
+    totals = stuck.aggregate(
+        tied_up=Coalesce(Sum("tied"), Value(ZERO), output_field=MONEY),
+        count=Count("id"),
+        never_sold=Count("id", filter=Q(last_sold__isnull=True)),
+    )
 
-    rows = []
-    for product in stuck:
-        last = last_sales.get(product.id)
-        age = _days_ago(last)
-        rows.append(
-            {
-                "id": product.id,
-                "name": product.name,
-                "code": product.product_code or "",
-                "stock": product.stock,
-                "buy_price": services._money(product.buy_price),
-                "sell_price": services._money(product.sell_price),
-                "unit_profit": services._money(product.sell_price - product.buy_price),
-                "tied_up": services._money(product.stock * product.buy_price),
-                "last_sold": last.date().isoformat() if last else None,
-                "days_idle": age,
-                "never_sold": last is None,
-                "href": f"/dashboard/products/{product.id}",
-            }
-        )
+    def row(product):
+        last = product.last_sold
+        return {
+            "id": product.id,
+            "name": product.name,
+            "code": product.product_code or "",
+            "stock": product.stock,
+            "buy_price": services._money(product.buy_price),
+            "sell_price": services._money(product.sell_price),
+            "unit_profit": services._money(product.unit_profit),
+            "tied_up": services._money(product.tied),
+            "last_sold": last.date().isoformat() if last else None,
+            "days_idle": _days_ago(last),
+            "never_sold": last is None,
+            "idle_text": (
+                "কোনোদিন বিক্রি হয়নি" if last is None else "%d দিন আগে" % _days_ago(last)
+            ),
+            "href": f"/dashboard/products/{product.id}",
+        }
 
-    total = sum(row["tied_up"] for row in rows)
-    never = sum(1 for row in rows if row["never_sold"])
-    return _envelope(
+    return Table(
         "যেসব প্রোডাক্ট বিক্রি হচ্ছে না",
         "মোট %s টাকা আটকে আছে। এর মধ্যে %d টা প্রোডাক্ট কোনোদিনই বিক্রি হয়নি।"
-        % (f"{total:,.0f}", never),
+        % (f"{services._money(totals['tied_up']):,.0f}", totals["never_sold"]),
         [
             {"key": "name", "label": "প্রোডাক্ট", "type": "link"},
             {"key": "code", "label": "কোড"},
@@ -104,72 +238,83 @@ def dead_stock(user, begin, finish):
             {"key": "tied_up", "label": "আটকে আছে", "type": "money", "tone": "neg"},
             {"key": "idle_text", "label": "শেষ বিক্রি"},
         ],
-        [
-            {
-                **row,
-                "idle_text": (
-                    "কোনোদিন বিক্রি হয়নি"
-                    if row["never_sold"]
-                    else "%d দিন আগে" % row["days_idle"]
-                ),
-            }
-            for row in rows
-        ],
+        stuck,
+        row,
+        sorts={
+            "name": "name",
+            "code": Coalesce("product_code", Value("")),
+            "stock": "stock",
+            "buy_price": "buy_price",
+            "sell_price": "sell_price",
+            "unit_profit": "unit_profit",
+            "tied_up": "tied",
+            # Fewest idle days first means the most recent sale first.
+            "idle_text": "-idle_since",
+        },
+        default_sort="-tied_up",
+        totals={
+            "tied_up": services._money(totals["tied_up"]),
+            "never_sold": totals["never_sold"],
+        },
+        count=totals["count"],
     )
 
 
 def low_margin(user, begin, finish):
     """Which products are eating the margin, worst first."""
-    rows = (
-        OrderItem.objects.filter(
-            order__user=user, order__created_at__range=(begin, finish)
-        )
-        .exclude(order__status__in=services.DEAD_ORDER_STATES)
+    items = OrderItem.objects.filter(
+        order__user=user, order__created_at__range=(begin, finish)
+    ).exclude(order__status__in=services.DEAD_ORDER_STATES)
+    revenue = Sum(F("quantity") * F("unit_price"), output_field=MONEY)
+    cost = Sum(F("quantity") * F("buy_price"), output_field=MONEY)
+    lines = (
+        items.order_by()
         .values("product_id", "product_name")
         .annotate(
             qty=Coalesce(Sum("quantity"), Value(0)),
-            revenue=Coalesce(
-                Sum(F("quantity") * F("unit_price"), output_field=DecimalField()),
-                Value(ZERO),
-                output_field=DecimalField(),
-            ),
-            cost=Coalesce(
-                Sum(F("quantity") * F("buy_price"), output_field=DecimalField()),
+            revenue=Coalesce(revenue, Value(ZERO), output_field=MONEY),
+            cost=Coalesce(cost, Value(ZERO), output_field=MONEY),
+        )
+        .annotate(
+            profit=ExpressionWrapper(F("revenue") - F("cost"), output_field=MONEY),
+            margin=Coalesce(
+                ExpressionWrapper(
+                    F("profit") * Value(Decimal("100.0")) / NullIf(F("revenue"), Value(ZERO)),
+                    output_field=DecimalField(max_digits=14, decimal_places=4),
+                ),
                 Value(ZERO),
-                output_field=DecimalField(),
+                output_field=DecimalField(max_digits=14, decimal_places=4),
             ),
         )
     )
-
-    out = []
-    for row in rows:
-        revenue = row["revenue"] or ZERO
-        profit = revenue - (row["cost"] or ZERO)
-        margin = float(profit / revenue * 100) if revenue else 0.0
-        qty = row["qty"] or 0
-        cost = row["cost"] or ZERO
-        out.append(
-            {
-                "id": row["product_id"],
-                "name": row["product_name"],
-                "qty": qty,
-                # Per-unit figures alongside the totals, so the margin can be
-                # checked by eye: (বিক্রি − কেনা) ÷ বিক্রি.
-                "unit_buy": services._money(cost / qty) if qty else 0.0,
-                "unit_sell": services._money(revenue / qty) if qty else 0.0,
-                "cost": services._money(cost),
-                "revenue": services._money(revenue),
-                "profit": services._money(profit),
-                "margin": round(margin, 1),
-                "margin_text": "%.1f%%" % margin,
-                "href": f"/dashboard/products/{row['product_id']}"
-                if row["product_id"]
-                else None,
-            }
-        )
-    out.sort(key=lambda r: r["margin"])
-
-    return _envelope(
+    totals = items.aggregate(
+        revenue=Coalesce(revenue, Value(ZERO), output_field=MONEY),
+        cost=Coalesce(cost, Value(ZERO), output_field=MONEY),
+    )
+    profit = totals["revenue"] - totals["cost"]
+
+    def row(line):
+        qty = line["qty"] or 0
+        margin = float(line["margin"] or 0)
+        return {
+            "id": line["product_id"],
+            "name": line["product_name"],
+            "qty": qty,
+            # Per-unit figures alongside the totals, so the margin can be
+            # checked by eye: (বিক্রি − কেনা) ÷ বিক্রি.
+            "unit_buy": services._money(line["cost"] / qty) if qty else 0.0,
+            "unit_sell": services._money(line["revenue"] / qty) if qty else 0.0,
+            "cost": services._money(line["cost"]),
+            "revenue": services._money(line["revenue"]),
+            "profit": services._money(line["profit"]),
+            "margin": round(margin, 1),
+            "margin_text": "%.1f%%" % margin,
+            "href": f"/dashboard/products/{line['product_id']}"
+            if line["product_id"]
+            else None,
+        }
+
+    return Table(
         "কোন প্রোডাক্টে লাভ কম",
         "সবচেয়ে কম মার্জিনের প্রোডাক্ট উপরে। এগুলোর কেনা দাম কমানো বা বিক্রির দাম "
         "বাড়ানো গেলে পুরো লাভের হার উঠে আসবে।",
@@ -183,31 +328,55 @@ def low_margin(user, begin, finish):
             {"key": "profit", "label": "লাভ", "type": "money", "tone": "auto"},
             {"key": "margin_text", "label": "লাভের হার"},
         ],
-        out,
+        lines,
+        row,
+        sorts={
+            "name": "product_name",
+            "qty": "qty",
+            "cost": "cost",
+            "revenue": "revenue",
+            "profit": "profit",
+            "margin_text": "margin",
+            "margin": "margin",
+        },
+        default_sort="margin",
+        keys=("product_id", "product_name"),
+        totals={
+            "revenue": services._money(totals["revenue"]),
+            "cost": services._money(totals["cost"]),
+            "profit": services._money(profit),
+            "margin": round(float(profit / totals["revenue"] * 100), 1)
+            if totals["revenue"]
+            else 0.0,
+        },
+        count=lines.count(),
     )
 
 
 def receivables(user, begin, finish):
-    """Everyone who owes, not just the top few the overview shows."""
-    full = services.receivables_for(user, limit=10_000)
-    rows = []
-    for row in full["top"]:
-        age = (timezone.localdate() - timezone.datetime.fromisoformat(row["oldest"]).date()).days
-        rows.append(
-            {
-                **row,
-                "age_text": "%d দিন" % age,
-                "age": age,
-                "href": f"/dashboard/customers/{row['customer_id']}"
-                if row["customer_id"]
-                else None,
-                "name_link": row["name"],
-            }
-        )
-    return _envelope(
+    """Everyone who owes, not just the top few the overview shows.
+
+    The note and the age histogram cover the whole book; the rows are paged.
+    """
+    summary = services.receivables_summary(user)
+
+    def row(group):
+        data = services.receivable_row(group)
+        age = (timezone.localdate() - group["oldest"].date()).days
+        return {
+            **data,
+            "age_text": "%d দিন" % age,
+            "age": age,
+            "href": f"/dashboard/customers/{data['customer_id']}"
+            if data["customer_id"]
+            else None,
+            "name_link": data["name"],
+        }
+
+    return Table(
         "কার কাছে কত বাকি",
         "মোট %s টাকা %d জনের কাছে। 30 দিনের বেশি পুরনো বাকিগুলো আগে ধরুন।"
-        % (f"{services._money(full['total']):,.0f}", full["customers_count"]),
+        % (f"{services._money(summary['total']):,.0f}", summary["customers_count"]),
         [
             {"key": "name", "label": "কাস্টমার", "type": "link"},
             {"key": "phone", "label": "ফোন"},
@@ -215,20 +384,64 @@ def receivables(user, begin, finish):
             {"key": "due", "label": "বাকি", "type": "money", "tone": "neg"},
             {"key": "age_text", "label": "কত দিন"},
         ],
-        rows,
+        services.receivable_groups(user),
+        row,
+        sorts={
+            "name": "name",
+            "phone": Coalesce("phone", Value("")),
+            "orders": "orders",
+            "due": "due",
+            # Youngest debt first means the latest "oldest order" first.
+            "age_text": "-oldest",
+        },
+        default_sort="-due",
+        keys=("customer_key", "guest_key"),
+        totals={"due": services._money(summary["total"])},
+        count=summary["customers_count"],
+        extra={"aging": summary["aging"]},
     )
 
 
-def costs(user, begin, finish):
-    """Every debit in the window, biggest first."""
-    rows = (
+COST_COLUMNS = [
+    {"key": "purpose", "label": "কী কারণে"},
+    {"key": "nature_text", "label": "ধরন"},
+    {"key": "category_text", "label": "খাত"},
+    {"key": "account_name", "label": "অ্যাকাউন্ট"},
+    {"key": "date_text", "label": "তারিখ"},
+    {"key": "amount", "label": "টাকা", "type": "money", "tone": "neg"},
+]
+
+COST_SORTS = {
+    "purpose": "purpose",
+    "nature_text": "nature",
+    "category_text": Coalesce("category", Value("")),
+    "account_name": "account__name",
+    "date_text": "date",
+    "amount": "amount",
+}
+
+
+def _debits(user, begin, finish):
+    return (
         Transaction.objects.filter(
             account__owner=user, type="debit", date__range=(begin, finish)
         )
         .exclude(status="cancelled")
         .select_related("account")
-        .order_by("-amount")
     )
+
+
+def _debit_totals(debits):
+    totals = debits.aggregate(
+        amount=Coalesce(Sum("amount"), Value(ZERO), output_field=MONEY),
+        count=Count("id"),
+    )
+    return services._money(totals["amount"]), totals["count"]
+
+
+def costs(user, begin, finish):
+    """Every debit in the window, biggest first."""
+    debits = _debits(user, begin, finish)
     nature_labels = {
         "expense": "খরচ",
         "payment": "পেমেন্ট",
@@ -237,67 +450,58 @@ def costs(user, begin, finish):
         "other": "অন্যান্য",
         "": "দেওয়া হয়নি",
     }
-    return _envelope(
+    amount, count = _debit_totals(debits)
+    return Table(
         "এই সময়ের সব খরচ",
         "সবচেয়ে বড় খরচ উপরে। যেগুলোয় খাত দেওয়া নেই সেগুলো ব্যাংকিং থেকে ঠিক করে নিন।",
-        [
-            {"key": "purpose", "label": "কী কারণে"},
-            {"key": "nature_text", "label": "ধরন"},
-            {"key": "category_text", "label": "খাত"},
-            {"key": "account_name", "label": "অ্যাকাউন্ট"},
-            {"key": "date_text", "label": "তারিখ"},
-            {"key": "amount", "label": "টাকা", "type": "money", "tone": "neg"},
-        ],
-        [
-            {
-                "id": row.id,
-                "purpose": row.purpose,
-                "nature_text": nature_labels.get(row.nature or "", "অন্যান্য"),
-                "category_text": services.CATEGORY_LABELS.get(
-                    row.category or "", row.category or "দেওয়া হয়নি"
-                ),
-                "account_name": row.account.name,
-                "date_text": timezone.localtime(row.date).strftime("%d-%m-%Y"),
-                "amount": services._money(row.amount),
-            }
-            for row in rows
-        ],
+        COST_COLUMNS,
+        debits,
+        lambda row: {
+            "id": row.id,
+            "purpose": row.purpose,
+            "nature_text": nature_labels.get(row.nature or "", "অন্যান্য"),
+            "category_text": services.CATEGORY_LABELS.get(
+                row.category or "", row.category or "দেওয়া হয়নি"
+            ),
+            "account_name": row.account.name,
+            "date_text": timezone.localtime(row.date).strftime("%d-%m-%Y"),
+            "amount": services._money(row.amount),
+        },
+        sorts=COST_SORTS,
+        default_sort="-amount",
+        totals={"amount": amount},
+        count=count,
     )
 
 
 def unclassified(user, begin, finish):
     """Debits with no nature set — the rows making the report incomplete."""
-    rows = (
-        Transaction.objects.filter(
-            account__owner=user, type="debit", nature="", date__range=(begin, finish)
-        )
-        .exclude(status="cancelled")
-        .select_related("account")
-        .order_by("-amount")
-    )
-    total = sum(services._money(row.amount) for row in rows)
-    return _envelope(
+    debits = _debits(user, begin, finish).filter(nature="")
+    amount, count = _debit_totals(debits)
+    return Table(
         "যেসব খরচে ধরন বসানো নেই",
         "মোট %s টাকা। ব্যাংকিং-এ গিয়ে প্রতিটায় খরচ বা পেমেন্ট বসিয়ে দিলে "
-        "খরচের ভাঙন ঠিকঠাক দেখাবে।" % f"{total:,.0f}",
+        "খরচের ভাঙন ঠিকঠাক দেখাবে।" % f"{amount:,.0f}",
         [
             {"key": "purpose", "label": "কী কারণে"},
             {"key": "account_name", "label": "অ্যাকাউন্ট", "type": "link"},
             {"key": "date_text", "label": "তারিখ"},
             {"key": "amount", "label": "টাকা", "type": "money", "tone": "neg"},
         ],
-        [
-            {
-                "id": row.id,
-                "purpose": row.purpose,
-                "account_name": row.account.name,
-                "name": row.account.name,
-                "href": f"/dashboard/banking/{row.account_id}",
-                "date_text": timezone.localtime(row.date).strftime("%d-%m-%Y"),
-                "amount": services._money(row.amount),
-            }
-            for row in rows
-        ],
+        debits,
+        lambda row: {
+            "id": row.id,
+            "purpose": row.purpose,
+            "account_name": row.account.name,
+            "name": row.account.name,
+            "href": f"/dashboard/banking/{row.account_id}",
+            "date_text": timezone.localtime(row.date).strftime("%d-%m-%Y"),
+            "amount": services._money(row.amount),
+        },
+        sorts=COST_SORTS,
+        default_sort="-amount",
+        totals={"amount": amount},
+        count=count,
     )
 
 
@@ -316,42 +520,40 @@ def targets(user, begin, finish):
     charged = services.charged_costs_for(cost, commitment, day_count, open_month_days)
     plan = services.build_targets(sales, charged, day_count)
 
-    orders = (
+    days = (
         Order.objects.filter(user=user, created_at__range=(begin, finish))
         .exclude(status__in=services.DEAD_ORDER_STATES)
-        .order_by("created_at")
+        .order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(
+            revenue=Coalesce(Sum("total_amount"), Value(ZERO), output_field=MONEY),
+            orders=Count("id"),
+        )
     )
-    per_day = {}
-    for order in orders:
-        key = timezone.localtime(order.created_at).date()
-        entry = per_day.setdefault(key, {"revenue": ZERO, "orders": 0})
-        entry["revenue"] += order.total_amount
-        entry["orders"] += 1
 
     need = plan["breakeven_daily_revenue"]
-    rows = []
-    for day in sorted(per_day, reverse=True):
-        got = services._money(per_day[day]["revenue"])
-        shut = day.weekday() in closed
-        rows.append(
-            {
-                "date_text": day.strftime("%d-%m-%Y"),
-                "orders": per_day[day]["orders"],
-                "revenue": got,
-                # A closed day carries no target, so it can neither be met nor
-                # missed — showing it in red would be blaming the shop for a
-                # holiday it set itself.
-                "need": ZERO if shut else need,
-                "gap": got if shut else got - need,
-                "status_text": (
-                    "বন্ধের দিন" if shut
-                    else "টার্গেট হয়েছে" if got >= need
-                    else "কম হয়েছে"
-                ),
-            }
-        )
 
-    return _envelope(
+    def row(day):
+        got = services._money(day["revenue"])
+        shut = not business_days.is_open(day["day"], closed)
+        return {
+            "date_text": day["day"].strftime("%d-%m-%Y"),
+            "orders": day["orders"],
+            "revenue": got,
+            # A closed day carries no target, so it can neither be met nor
+            # missed — showing it in red would be blaming the shop for a
+            # holiday it set itself.
+            "need": ZERO if shut else need,
+            "gap": got if shut else got - need,
+            "status_text": (
+                "বন্ধের দিন" if shut
+                else "টার্গেট হয়েছে" if got >= need
+                else "কম হয়েছে"
+            ),
+        }
+
+    return Table(
         "দিনে দিনে টার্গেট",
         "খরচ উঠতে খোলার দিনে %s টাকা বিক্রি দরকার। যেদিন কম হয়েছে সেদিন লাল।%s"
         % (f"{need:,.0f}", f" ({business_days.describe(closed)})" if closed else ""),
@@ -363,41 +565,52 @@ def targets(user, begin, finish):
             {"key": "gap", "label": "কম/বেশি", "type": "money", "tone": "auto"},
             {"key": "status_text", "label": "অবস্থা"},
         ],
-        rows,
+        days,
+        row,
+        sorts={"date_text": "day", "orders": "orders", "revenue": "revenue"},
+        default_sort="-date_text",
+        keys=("day",),
+        totals={"revenue": services._money(sales["revenue"]), "need": need},
+        count=days.count(),
     )
 
 
 def loans(user, begin, finish):
     """Every running loan, the one closest to its due date first."""
-    rows = []
-    for loan in Loan.objects.filter(user=user).select_related("account").order_by("status"):
+    every = Loan.objects.filter(user=user).select_related("account")
+
+    def row(loan):
         due = loan.next_due_date
-        rows.append(
-            {
-                "id": loan.id,
-                "name": loan.lender,
-                "purpose": loan.purpose or "—",
-                "installment": services._money(loan.installment_amount),
-                "remaining_amount": services._money(loan.remaining_amount),
-                "progress_text": "%d/%d কিস্তি (%.0f%%)"
-                % (loan.paid_count, loan.installment_count, loan.progress_pct),
-                "due_text": (
-                    "শেষ"
-                    if loan.status == "closed"
-                    else "%s%s"
-                    % (
-                        due.strftime("%d-%m-%Y") if due else "—",
-                        " · %d দিন দেরি" % loan.days_overdue if loan.is_overdue else "",
-                    )
-                ),
-                "href": "/dashboard/banking/loans",
-            }
-        )
-    monthly = sum(
-        services._money(loan.installment_amount)
-        for loan in Loan.objects.filter(user=user, status="active")
+        return {
+            "id": loan.id,
+            "name": loan.lender,
+            "purpose": loan.purpose or "—",
+            "installment": services._money(loan.installment_amount),
+            "remaining_amount": services._money(loan.remaining_amount),
+            "progress_text": "%d/%d কিস্তি (%.0f%%)"
+            % (loan.paid_count, loan.installment_count, loan.progress_pct),
+            "due_text": (
+                "শেষ"
+                if loan.status == "closed"
+                else "%s%s"
+                % (
+                    due.strftime("%d-%m-%Y") if due else "—",
+                    " · %d দিন দেরি" % loan.days_overdue if loan.is_overdue else "",
+                )
+            ),
+            "href": "/dashboard/banking/loans",
+        }
+
+    totals = every.aggregate(
+        monthly=Coalesce(
+            Sum("installment_amount", filter=Q(status="active")),
+            Value(ZERO),
+            output_field=MONEY,
+        ),
+        count=Count("id"),
     )
-    return _envelope(
+    monthly = services._money(totals["monthly"])
+    return Table(
         "লোন আর কিস্তির হিসাব",
         "প্রতি মাসে মোট %s টাকা কিস্তি দিতে হয়। এই টাকাটা দিনের টার্গেটেও ধরা আছে।"
         % f"{monthly:,.0f}",
@@ -409,36 +622,47 @@ def loans(user, begin, finish):
             {"key": "progress_text", "label": "কতটা শোধ"},
             {"key": "due_text", "label": "পরের তারিখ"},
         ],
-        rows,
+        every,
+        row,
+        sorts={
+            "name": "lender",
+            "purpose": "purpose",
+            "installment": "installment_amount",
+            "status": "status",
+        },
+        default_sort="status",
+        totals={"monthly": monthly},
+        count=totals["count"],
     )
 
 
 def fixed_costs(user, begin, finish):
     """Every fixed monthly bill and whether this month's is settled."""
-    rows = []
-    for cost in RecurringCost.objects.filter(user=user).select_related("account"):
-        rows.append(
-            {
-                "id": cost.id,
-                "name": cost.title,
-                "amount": services._money(cost.amount),
-                "due_text": cost.due_date.strftime("%d-%m-%Y"),
-                "state_text": (
-                    "এই মাসের দেওয়া হয়েছে"
-                    if cost.paid_this_month
-                    else "%d দিন দেরি" % cost.days_overdue
-                    if cost.is_overdue
-                    else "এখনো দেওয়া হয়নি"
-                ),
-                "account_name": cost.account.name if cost.account else "—",
-                "href": "/dashboard/employees/office-rent",
-            }
-        )
-    monthly = sum(
-        row["amount"]
-        for row in rows
+    every = RecurringCost.objects.filter(user=user).select_related("account")
+
+    def row(cost):
+        return {
+            "id": cost.id,
+            "name": cost.title,
+            "amount": services._money(cost.amount),
+            "due_text": cost.due_date.strftime("%d-%m-%Y"),
+            "state_text": (
+                "এই মাসের দেওয়া হয়েছে"
+                if cost.paid_this_month
+                else "%d দিন দেরি" % cost.days_overdue
+                if cost.is_overdue
+                else "এখনো দেওয়া হয়নি"
+            ),
+            "account_name": cost.account.name if cost.account else "—",
+            "href": "/dashboard/employees/office-rent",
+        }
+
+    totals = every.aggregate(
+        monthly=Coalesce(Sum("amount"), Value(ZERO), output_field=MONEY),
+        count=Count("id"),
     )
-    return _envelope(
+    monthly = services._money(totals["monthly"])
+    return Table(
         "নির্দিষ্ট মাসিক খরচ",
         "প্রতি মাসে মোট %s টাকা দিতেই হয়। বিক্রি হোক বা না হোক, তাই এটা দিনের "
         "টার্গেটেও ধরা আছে।" % f"{monthly:,.0f}",
@@ -449,7 +673,12 @@ def fixed_costs(user, begin, finish):
             {"key": "state_text", "label": "অবস্থা"},
             {"key": "account_name", "label": "অ্যাকাউন্ট"},
         ],
-        rows,
+        every,
+        row,
+        sorts={"name": "title", "amount": "amount", "due_text": "due_day"},
+        default_sort="name",
+        totals={"monthly": monthly},
+        count=totals["count"],
     )
 
 
@@ -465,10 +694,28 @@ TOPICS = {
 }
 
 
-def build(user, topic, preset="this_month", start=None, end=None):
+def table(user, topic, preset="this_month", start=None, end=None):
+    """The Table behind `topic` for the period, or None for an unknown topic."""
     handler = TOPICS.get(topic)
     if handler is None:
         return None
     first, last, _ = periods.resolve(preset, start, end)
     begin, finish = periods.as_range(first, last)
     return handler(user, begin, finish)
+
+
+def build(
+    user,
+    topic,
+    preset="this_month",
+    start=None,
+    end=None,
+    sort=None,
+    cursor=None,
+    limit=PAGE_SIZE,
+):
+    """One page of `topic`. ValueError for a sort or cursor it cannot use."""
+    found = table(user, topic, preset, start, end)
+    if found is None:
+        return None
+    return found.page(sort, cursor, limit)
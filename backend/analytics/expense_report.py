@@ -25,7 +25,7 @@ from decimal import Decimal
 
 from banking.models import Loan, LoanPayment, RecurringCost, RecurringCostPayment, Transaction
 from core import business_days
-from core.models import UserProfile
+from core.shop import snapshot_for
 from employees.models import Employee, Incentive, SalaryPayment
 
 ZERO = Decimal("0.00")
@@ -471,10 +471,7 @@ def build(user, month=None, today=None):
     closed = business_days.closed_weekdays(user)
     open_days = business_days.open_days_between(first, last, closed)
 
-    profile = (
-        UserProfile.objects.filter(user=user).only("company", "company_address").first()
-    )
-    shop = (profile.company or "").strip() if profile else ""
+    shop = snapshot_for(user)
 
     return {
         "month": {
@@ -484,8 +481,8 @@ def build(user, month=None, today=None):
             "end": last.isoformat(),
         },
         "shop": {
-            "name": shop or (user.get_full_name() or user.username),
-            "address": (profile.company_address or "").strip() if profile else "",
+            "name": shop.store_name or user.username,
+            "address": shop.company_address.strip(),
         },
         "calendar": {
             "days": (last - first).days + 1,
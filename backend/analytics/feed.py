@@ -300,7 +300,7 @@ def build_feed(user):
 
     # Built once and shared: the coach lines and the upcoming-cost card both
     # read today's report, and it is the most expensive thing here.
-    today = services.build_overview(user, preset="today")
+    today = services.build_overview(user, preset="today", sections=coach.SECTIONS)
 
     return {
         "coach": coach.build_messages(user, today=today),
@@ -39,7 +39,7 @@ def _calendar_days_for(open_days, closed):
     The stock rate is measured per trading day, but "আর 5 দিনেই শেষ" is read
     against a calendar. For a Friday-closed shop, 5 trading days is a week.
     """
-    if open_days <= 0 or not closed:
+    if open_days <= 0 or business_days.always_open(closed):
         return open_days
     from datetime import timedelta
     from django.utils import timezone
@@ -50,7 +50,7 @@ def _calendar_days_for(open_days, closed):
     while counted < open_days and walked < 400:
         day += timedelta(days=1)
         walked += 1
-        if day.weekday() not in closed:
+        if business_days.is_open(day, closed):
             counted += 1
     return walked
 
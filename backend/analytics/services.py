@@ -5,10 +5,26 @@ act on today ("collect from these four customers"), and a rule they can check by
 hand is one they will trust. Every number here traces back to a row they entered.
 """
 
+from datetime import timedelta
 from decimal import Decimal
 
-from django.db.models import DecimalField, F, Q, Sum, Value
-from django.db.models.functions import Coalesce
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Max,
+    Min,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 from banking.models import (
     Loan,
@@ -85,31 +101,77 @@ def _change(current, previous):
 # ── the pieces ──────────────────────────────────────────────────────────
 
 
+def _by_window(queryset, lookup, spans, measures):
+    """One aggregate over `queryset` for several windows at once.
+
+    `spans` are (start, end) pairs for a `lookup`__range; `measures` maps a
+    name to (Sum or Count, field, extra Q or None). The rows are limited to
+    the union of the spans, and each measure is computed once per span with
+    a filtered aggregate (FILTER (WHERE ...) on PostgreSQL), so the current
+    and the previous window come back from the same scan. Returns one
+    {name: value} dict per span, sums as Decimal and never None.
+    """
+    union = Q()
+    aggregates = {}
+    for index, span in enumerate(spans):
+        inside = Q(**{f"{lookup}__range": span})
+        union |= inside
+        for name, (function, field, condition) in measures.items():
+            where = inside & condition if condition is not None else inside
+            if function is Count:
+                aggregates[f"{name}_{index}"] = Count(field, filter=where)
+            else:
+                aggregates[f"{name}_{index}"] = Coalesce(
+                    function(field, filter=where), Value(ZERO), output_field=DecimalField()
+                )
+    row = queryset.filter(union).aggregate(**aggregates)
+    return [
+        {name: row[f"{name}_{index}"] for name in measures} for index in range(len(spans))
+    ]
+
+
+def sales_for_windows(user, windows):
+    """sales_for for each (begin, finish) in `windows`, in one query."""
+    orders = Order.objects.filter(user=user).exclude(status__in=DEAD_ORDER_STATES)
+    results = []
+    for row in _by_window(
+        orders,
+        "created_at",
+        windows,
+        {
+            "revenue": (Sum, "total_amount", None),
+            "cogs": (Sum, "total_buy_price", None),
+            "collected": (Sum, "paid_amount", None),
+            "count": (Count, "id", None),
+        },
+    ):
+        revenue, count = row["revenue"], row["count"]
+        results.append(
+            {
+                "revenue": revenue,
+                "cogs": row["cogs"],
+                "gross_profit": revenue - row["cogs"],
+                "orders_count": count,
+                "avg_order_value": (revenue / count) if count else ZERO,
+                "collected": row["collected"],
+            }
+        )
+    return results
+
+
 def sales_for(user, begin, finish):
-    orders = Order.objects.filter(user=user, created_at__range=(begin, finish)).exclude(
-        status__in=DEAD_ORDER_STATES
-    )
-    revenue = _sum(orders, "total_amount")
-    cogs = _sum(orders, "total_buy_price")
-    count = orders.count()
-    return {
-        "revenue": revenue,
-        "cogs": cogs,
-        "gross_profit": revenue - cogs,
-        "orders_count": count,
-        "avg_order_value": (revenue / count) if count else ZERO,
-        "collected": _sum(orders, "paid_amount"),
-    }
+    return sales_for_windows(user, [(begin, finish)])[0]
 
 
-def costs_for(user, begin, finish):
-    """Money spent, split the way the user asked: খরচ and পেমেন্ট side by side."""
+def costs_for_windows(user, windows):
+    """costs_for for each (begin, finish) in `windows`.
+
+    One query per source table whatever the number of windows: the bank
+    debits, their category breakdown, salaries, incentives, loan
+    installments and fixed-cost payments.
+    """
     debits = (
-        Transaction.objects.filter(
-            account__owner=user,
-            type="debit",
-            date__range=(begin, finish),
-        )
+        Transaction.objects.filter(account__owner=user, type="debit")
         .exclude(status="cancelled")
         # Loan installments are reported from LoanPayment instead; counting the
         # transaction as well would charge the shop twice for the same money.
@@ -121,56 +183,101 @@ def costs_for(user, begin, finish):
         # the transaction too would charge the shop twice.
         .filter(recurring_payment__isnull=True)
     )
+    day_spans = [(begin.date(), finish.date()) for begin, finish in windows]
 
-    # "other" is still money that left the till, so it rides with খরচ rather
-    # than falling out of the total unnoticed.
-    expense = _sum(debits.filter(Q(nature="expense") | Q(nature="other")))
-    payment = _sum(debits.filter(nature="payment"))
-    # Rows entered before the nature field existed. Counted as cost (the money
-    # did leave), but surfaced separately so the user knows to classify them.
-    unclassified = _sum(debits.filter(Q(nature="") | Q(nature__isnull=True)))
-
-    salaries = _sum(
-        SalaryRecord.objects.filter(
-            employee__user=user, status="paid", payment_date__range=(begin, finish)
-        ),
-        "net_salary",
+    ledger = _by_window(
+        debits,
+        "date",
+        windows,
+        {
+            # "other" is still money that left the till, so it rides with খরচ
+            # rather than falling out of the total unnoticed.
+            "expense": (Sum, "amount", Q(nature="expense") | Q(nature="other")),
+            "payment": (Sum, "amount", Q(nature="payment")),
+            # Rows entered before the nature field existed. Counted as cost
+            # (the money did leave), but surfaced separately so the user
+            # knows to classify them.
+            "unclassified": (Sum, "amount", Q(nature="") | Q(nature__isnull=True)),
+        },
     )
-    incentives = _sum(
-        Incentive.objects.filter(
-            employee__user=user, status="paid", date_awarded__range=(begin, finish)
-        )
+    salaries = _by_window(
+        SalaryRecord.objects.filter(employee__user=user, status="paid"),
+        "payment_date",
+        windows,
+        {"total": (Sum, "net_salary", None)},
     )
-    loan_paid = _sum(
-        LoanPayment.objects.filter(
-            loan__user=user, paid_on__range=(begin.date(), finish.date())
-        )
+    incentives = _by_window(
+        Incentive.objects.filter(employee__user=user, status="paid"),
+        "date_awarded",
+        windows,
+        {"total": (Sum, "amount", None)},
     )
-    recurring_paid = _sum(
-        RecurringCostPayment.objects.filter(
-            cost__user=user, paid_on__range=(begin.date(), finish.date())
-        )
+    loan_paid = _by_window(
+        LoanPayment.objects.filter(loan__user=user),
+        "paid_on",
+        day_spans,
+        {"total": (Sum, "amount", None)},
+    )
+    recurring_paid = _by_window(
+        RecurringCostPayment.objects.filter(cost__user=user),
+        "paid_on",
+        day_spans,
+        {"total": (Sum, "amount", None)},
     )
 
-    by_category = []
-    rows = (
-        debits.values("category")
-        .annotate(total=Coalesce(Sum("amount"), Value(ZERO), output_field=DecimalField()))
-        .order_by("-total")
+    # The category breakdown for every window from one GROUP BY; a category
+    # with no rows in a window is left out of that window, as before.
+    union = Q()
+    per_category = {}
+    for index, span in enumerate(windows):
+        inside = Q(date__range=span)
+        union |= inside
+        per_category[f"total_{index}"] = Coalesce(
+            Sum("amount", filter=inside), Value(ZERO), output_field=DecimalField()
+        )
+        per_category[f"rows_{index}"] = Count("id", filter=inside)
+    categories = list(
+        debits.filter(union).order_by().values("category").annotate(**per_category)
     )
-    for row in rows:
-        key = row["category"] or ""
-        by_category.append(
+
+    results = []
+    for index in range(len(windows)):
+        by_category = [
             {
-                "category": key,
-                # A category the user typed themselves is not "অন্যান্য" — it is
-                # whatever they named it. Only the known keys get translated;
-                # anything else is shown verbatim, which is the whole point of
-                # letting them add their own.
-                "label": CATEGORY_LABELS.get(key, key or "খাত দেওয়া হয়নি"),
-                "amount": _money(row["total"]),
+                "category": row["category"] or "",
+                # A category the user typed themselves is not "অন্যান্য" — it
+                # is whatever they named it. Only the known keys get
+                # translated; anything else is shown verbatim, which is the
+                # whole point of letting them add their own.
+                "label": CATEGORY_LABELS.get(
+                    row["category"] or "", row["category"] or "খাত দেওয়া হয়নি"
+                ),
+                "amount": _money(row[f"total_{index}"]),
             }
+            for row in sorted(
+                categories, key=lambda row: row[f"total_{index}"], reverse=True
+            )
+            if row[f"rows_{index}"]
+        ]
+        results.append(
+            _costs_result(
+                ledger[index],
+                salaries[index]["total"],
+                incentives[index]["total"],
+                loan_paid[index]["total"],
+                recurring_paid[index]["total"],
+                by_category,
+            )
         )
+    return results
+
+
+def _costs_result(ledger, salaries, incentives, loan_paid, recurring_paid, by_category):
+    expense, payment, unclassified = (
+        ledger["expense"],
+        ledger["payment"],
+        ledger["unclassified"],
+    )
     # Payroll never passes through a bank transaction row, so it is appended
     # rather than aggregated — otherwise the breakdown would not add up to the
     # total the user sees above it.
@@ -213,61 +320,119 @@ def costs_for(user, begin, finish):
     }
 
 
-def receivables_for(user, limit=8):
-    """Who owes money, oldest first — this is the তাগাদা list.
+def costs_for(user, begin, finish):
+    """Money spent, split the way the user asked: খরচ and পেমেন্ট side by side."""
+    return costs_for_windows(user, [(begin, finish)])[0]
 
-    Not period-scoped on purpose: an unpaid bill from three months ago is more
-    urgent than one from yesterday, and filtering it out of the current window
-    would hide exactly the debt that needs chasing.
-    """
-    unpaid = (
-        Order.objects.filter(user=user, total_amount__gt=F("paid_amount"))
-        .exclude(status__in=DEAD_ORDER_STATES)
-        .select_related("customer")
-        .order_by("created_at")
-    )
 
-    by_customer = {}
-    for order in unpaid:
-        key = order.customer_id or f"guest:{order.customer_name or order.order_number}"
-        due = order.total_amount - order.paid_amount
-        entry = by_customer.setdefault(
-            key,
-            {
-                "customer_id": order.customer_id,
-                "name": (order.customer.name if order.customer else order.customer_name)
-                or "নাম নেই",
-                "phone": (order.customer.phone if order.customer else order.customer_phone),
-                "due": ZERO,
-                "orders": 0,
-                "oldest": order.created_at,
-            },
+# Age bands for the receivables histogram: (key, label, first day, last day).
+RECEIVABLE_AGES = [
+    ("0_30", "30 দিন পর্যন্ত", 0, 30),
+    ("31_60", "31-60 দিন", 31, 60),
+    ("61_90", "61-90 দিন", 61, 90),
+    ("90_plus", "90 দিনের বেশি", 91, None),
+]
+
+
+def _unpaid_orders(user):
+    return Order.objects.filter(
+        user=user, total_amount__gt=F("paid_amount")
+    ).exclude(status__in=DEAD_ORDER_STATES)
+
+
+_DUE = ExpressionWrapper(
+    F("total_amount") - F("paid_amount"),
+    output_field=DecimalField(max_digits=14, decimal_places=2),
+)
+
+
+def receivable_groups(user):
+    """Unpaid orders grouped per debtor, one row each, unordered.
+
+    Registered customers group by id; walk-in sales group by the name typed
+    on the bill, or stand alone (keyed by order number) when there was none.
+    `customer_key` and `guest_key` together identify a row.
+    """
+    # order_by() drops Meta.ordering, which would otherwise join the GROUP BY.
+    return (
+        _unpaid_orders(user)
+        .order_by()
+        .annotate(
+            customer_key=Coalesce("customer_id", Value(0)),
+            guest_key=Case(
+                When(customer__isnull=False, then=Value("")),
+                When(customer_name__gt="", then=F("customer_name")),
+                default=F("order_number"),
+                output_field=CharField(),
+            ),
         )
-        entry["due"] += due
-        entry["orders"] += 1
-        if order.created_at < entry["oldest"]:
-            entry["oldest"] = order.created_at
+        .values("customer_key", "guest_key")
+        .annotate(
+            due=Sum(_DUE),
+            orders=Count("id"),
+            oldest=Min("created_at"),
+            name=Coalesce(
+                Max("customer__name"),
+                NullIf(Max("customer_name"), Value("")),
+                Value("নাম নেই"),
+            ),
+            phone=Coalesce(Max("customer__phone"), Max("customer_phone")),
+        )
+    )
 
-    rows = sorted(by_customer.values(), key=lambda r: r["due"], reverse=True)
-    total = sum((r["due"] for r in rows), ZERO)
 
+def receivables_summary(user):
+    """Total due, debtor count and the age histogram, in two queries."""
+    now = timezone.now()
+    bands = {}
+    for key, _, first, last in RECEIVABLE_AGES:
+        window = Q(created_at__lte=now - timedelta(days=first))
+        if last is not None:
+            window &= Q(created_at__gt=now - timedelta(days=last + 1))
+        bands[f"{key}_due"] = Sum(_DUE, filter=window)
+        bands[f"{key}_orders"] = Count("id", filter=window)
+    totals = _unpaid_orders(user).aggregate(total=Sum(_DUE), **bands)
     return {
-        "total": total,
-        "customers_count": len(rows),
-        "top": [
+        "total": totals["total"] or ZERO,
+        "customers_count": receivable_groups(user).count(),
+        "aging": [
             {
-                "customer_id": r["customer_id"],
-                "name": r["name"],
-                "phone": r["phone"],
-                "due": _money(r["due"]),
-                "orders": r["orders"],
-                "oldest": r["oldest"].date().isoformat(),
+                "key": key,
+                "label": label,
+                "due": _money(totals[f"{key}_due"]),
+                "orders": totals[f"{key}_orders"],
             }
-            for r in rows[:limit]
+            for key, label, _, _ in RECEIVABLE_AGES
         ],
     }
 
 
+def receivable_row(group):
+    return {
+        "customer_id": group["customer_key"] or None,
+        "name": group["name"],
+        "phone": group["phone"],
+        "due": _money(group["due"]),
+        "orders": group["orders"],
+        "oldest": group["oldest"].date().isoformat(),
+    }
+
+
+def receivables_for(user, limit=8):
+    """Who owes money, biggest debt first — this is the তাগাদা list.
+
+    Not period-scoped on purpose: an unpaid bill from three months ago is more
+    urgent than one from yesterday, and filtering it out of the current window
+    would hide exactly the debt that needs chasing.
+
+    The grouping happens in the database (receivable_groups): a shop with
+    years of বাকি used to load every unpaid order to hand back eight rows.
+    `aging` splits the total by how old each unpaid order is.
+    """
+    top = receivable_groups(user).order_by("-due", "oldest")[:limit]
+    return {**receivables_summary(user), "top": [receivable_row(r) for r in top]}
+
+
 def inventory_for(user):
     """Money sitting on the shelf. Stock is not a loss, but it is cash you
     cannot spend, which is why it belongs next to the profit figure."""
@@ -691,164 +856,313 @@ def monthly_commitment_for(user, loans, fixed, open_month_days=30):
     }
 
 
-def build_overview(user, preset="this_month", start=None, end=None):
-    first, last, label = periods.resolve(preset, start, end)
-    prev_first, prev_last = periods.previous(first, last)
+class Overview:
+    """Everything the overview can report for one window, each part computed
+    the first time something asks for it and then kept.
 
-    begin, finish = periods.as_range(first, last)
-    prev_begin, prev_finish = periods.as_range(prev_first, prev_last)
+    A section reads the attributes it needs and those pull in what they
+    need in turn (net profit needs the charged costs, which need the
+    commitment, which needs the loans...), so asking for two sections runs
+    only their queries, and a figure shared by several sections — the
+    shop's closed days, the window ranges, the sales of both windows — is
+    worked out once per request.
+    """
 
-    sales = sales_for(user, begin, finish)
-    costs = costs_for(user, begin, finish)
-    prev_sales = sales_for(user, prev_begin, prev_finish)
-    prev_costs = costs_for(user, prev_begin, prev_finish)
+    def __init__(self, user, preset="this_month", start=None, end=None):
+        self.user = user
+        self.preset = preset
+        self.first, self.last, self.label = periods.resolve(preset, start, end)
+        self.prev_first, self.prev_last = periods.previous(self.first, self.last)
+        self.begin, self.finish = periods.as_range(self.first, self.last)
+        self.prev_begin, self.prev_finish = periods.as_range(
+            self.prev_first, self.prev_last
+        )
+
+    @cached_property
+    def _sales(self):
+        # Both windows from the same query, and likewise for costs.
+        return sales_for_windows(
+            self.user, [(self.begin, self.finish), (self.prev_begin, self.prev_finish)]
+        )
+
+    @cached_property
+    def _costs(self):
+        return costs_for_windows(
+            self.user, [(self.begin, self.finish), (self.prev_begin, self.prev_finish)]
+        )
+
+    @property
+    def sales(self):
+        return self._sales[0]
+
+    @property
+    def prev_sales(self):
+        return self._sales[1]
+
+    @property
+    def costs(self):
+        return self._costs[0]
+
+    @property
+    def prev_costs(self):
+        return self._costs[1]
 
     # The shop's own calendar, resolved once and threaded through everything
     # that divides by a day count.
-    closed = business_days.closed_weekdays(user)
-    calendar_days = periods.days_in(first, last)
-    day_count = business_days.open_days_between(first, last, closed)
-    open_month_days = business_days.open_days_in_month(last, closed)
-    prev_day_count = business_days.open_days_between(prev_first, prev_last, closed)
+    @cached_property
+    def closed(self):
+        return business_days.closed_weekdays(self.user)
+
+    @cached_property
+    def day_count(self):
+        return business_days.open_days_between(self.first, self.last, self.closed)
+
+    @cached_property
+    def prev_day_count(self):
+        return business_days.open_days_between(
+            self.prev_first, self.prev_last, self.closed
+        )
+
+    @cached_property
+    def open_month_days(self):
+        return business_days.open_days_in_month(self.last, self.closed)
+
+    @cached_property
+    def loans(self):
+        return loans_for(self.user)
 
-    loans = loans_for(user)
-    fixed = fixed_costs_for(user)
-    commitment = monthly_commitment_for(user, loans, fixed, open_month_days)
+    @cached_property
+    def fixed(self):
+        return fixed_costs_for(self.user)
+
+    @cached_property
+    def commitment(self):
+        return monthly_commitment_for(
+            self.user, self.loans, self.fixed, self.open_month_days
+        )
 
     # What the window's trading actually carries: monthly commitments spread
     # over the month's open days, day-of spending charged to its own day. The
     # cash figure (`costs["total"]`) is still reported — it answers "কত টাকা
     # বেরিয়েছে" — but it is not what a day is judged against.
-    charged = charged_costs_for(costs, commitment, day_count, open_month_days)
-    prev_charged = charged_costs_for(
-        prev_costs, commitment, prev_day_count, open_month_days
-    )
+    @cached_property
+    def charged(self):
+        return charged_costs_for(
+            self.costs, self.commitment, self.day_count, self.open_month_days
+        )
+
+    @cached_property
+    def prev_charged(self):
+        return charged_costs_for(
+            self.prev_costs, self.commitment, self.prev_day_count, self.open_month_days
+        )
+
+    @property
+    def net_profit(self):
+        return self.sales["gross_profit"] - self.charged["total"]
 
-    net_profit = sales["gross_profit"] - charged["total"]
-    prev_net = prev_sales["gross_profit"] - prev_charged["total"]
-    cash_profit = sales["gross_profit"] - costs["total"]
+    @property
+    def prev_net(self):
+        return self.prev_sales["gross_profit"] - self.prev_charged["total"]
+
+    @property
+    def cash_profit(self):
+        return self.sales["gross_profit"] - self.costs["total"]
+
+    @cached_property
+    def targets(self):
+        return build_targets(self.sales, self.charged, self.day_count)
+
+    @cached_property
+    def comparison(self):
+        sales, prev_sales = self.sales, self.prev_sales
+        return {
+            "revenue": _change(sales["revenue"], prev_sales["revenue"]),
+            "gross_profit": _change(sales["gross_profit"], prev_sales["gross_profit"]),
+            "cost": _change(self.charged["total"], self.prev_charged["total"]),
+            "net_profit": _change(self.net_profit, self.prev_net),
+            "orders": _change(sales["orders_count"], prev_sales["orders_count"]),
+        }
+
+    @cached_property
+    def receivables(self):
+        return receivables_for(self.user)
+
+    @cached_property
+    def dead_stock(self):
+        return dead_stock_for(self.user, self.begin, self.finish)
+
+
+def _period_section(o):
+    return {
+        "preset": o.preset,
+        "label": o.label,
+        "start": o.first.isoformat(),
+        "end": o.last.isoformat(),
+        # `days` stays the window's length — it is what the heading says.
+        # `open_days` is what every per-day figure is actually divided by.
+        "days": periods.days_in(o.first, o.last),
+        "open_days": o.day_count,
+        "closed_days": sorted(o.closed),
+        "closed_label": business_days.describe(o.closed),
+    }
+
+
+def _compare_with_section(o):
+    return {
+        "label": periods.COMPARE_LABELS.get(o.preset, "আগের সমান সময়"),
+        "start": o.prev_first.isoformat(),
+        "end": o.prev_last.isoformat(),
+    }
+
+
+def _sales_section(o):
+    sales = o.sales
+    return {
+        "revenue": _money(sales["revenue"]),
+        "cogs": _money(sales["cogs"]),
+        "gross_profit": _money(sales["gross_profit"]),
+        "orders_count": sales["orders_count"],
+        "avg_order_value": _money(sales["avg_order_value"]),
+        "collected": _money(sales["collected"]),
+    }
+
+
+def _costs_section(o):
+    costs, charged = o.costs, o.charged
+    return {
+        "expense": _money(costs["expense"]),
+        "payment": _money(costs["payment"]),
+        "unclassified": _money(costs["unclassified"]),
+        "salaries": _money(costs["salaries"]),
+        "incentives": _money(costs["incentives"]),
+        "loan": _money(costs["loan"]),
+        "recurring": _money(costs["recurring"]),
+        # Cash that actually left in this window. True, and the figure the
+        # খরচ report and the bank statement agree with — but lumpy, because
+        # a month's rent lands on one day.
+        "cash_out": _money(costs["total"]),
+        # What this window's trading carries: monthly commitments spread
+        # over the month's open days, day-of spending on its own day. This
+        # is what every target and the profit figure are judged against.
+        "total": _money(charged["total"]),
+        "variable": _money(charged["variable"]),
+        "periodic": _money(charged["periodic"]),
+        "monthly_share_daily": _money(charged["daily_share"]),
+        "by_category": costs["by_category"],
+    }
 
-    targets = build_targets(sales, charged, day_count)
-    # …and what that profit means in things the shop can actually go and sell.
+
+def _net_section(o):
+    net_profit, revenue = o.net_profit, o.sales["revenue"]
+    return {
+        "profit": _money(net_profit),
+        "is_profit": net_profit >= 0,
+        # Same figure on a cash basis: useful on the day a big bill is
+        # paid, misleading as a measure of how the day traded.
+        "cash_profit": _money(o.cash_profit),
+        "margin_pct": round(float(net_profit / revenue * 100), 1) if revenue else 0.0,
+    }
+
+
+def _to_do_section(o):
+    # What the target's profit means in things the shop can actually go and sell.
     from analytics.mix import what_it_takes
 
-    to_do = what_it_takes(
-        user,
-        targets["daily_profit_needed"],
-        targets["daily_profit"],
+    return what_it_takes(
+        o.user, o.targets["daily_profit_needed"], o.targets["daily_profit"]
     )
 
-    comparison = {
-        "revenue": _change(sales["revenue"], prev_sales["revenue"]),
-        "gross_profit": _change(sales["gross_profit"], prev_sales["gross_profit"]),
-        "cost": _change(charged["total"], prev_charged["total"]),
-        "net_profit": _change(net_profit, prev_net),
-        "orders": _change(sales["orders_count"], prev_sales["orders_count"]),
-    }
 
-    receivables = receivables_for(user)
-    dead_stock = dead_stock_for(user, begin, finish)
-    # The other half of the stock story: what to bring more of.
-    from analytics.restock import restock_suggestions
+def _inventory_section(o):
+    return {
+        key: _money(value) if key != "vehicle_count" else value
+        for key, value in inventory_for(o.user).items()
+    }
 
-    restock_rows = restock_suggestions(user, begin, finish)
 
+def _loans_section(o):
+    loans = o.loans
     return {
-        "period": {
-            "preset": preset,
-            "label": label,
-            "start": first.isoformat(),
-            "end": last.isoformat(),
-            # `days` stays the window's length — it is what the heading says.
-            # `open_days` is what every per-day figure is actually divided by.
-            "days": calendar_days,
-            "open_days": day_count,
-            "closed_days": sorted(closed),
-            "closed_label": business_days.describe(closed),
+        **{
+            key: _money(value)
+            for key, value in loans.items()
+            if key in ("monthly_due", "outstanding", "overdue_amount")
         },
-        "compare_with": {
-            "label": periods.COMPARE_LABELS.get(preset, "আগের সমান সময়"),
-            "start": prev_first.isoformat(),
-            "end": prev_last.isoformat(),
-        },
-        "sales": {
-            "revenue": _money(sales["revenue"]),
-            "cogs": _money(sales["cogs"]),
-            "gross_profit": _money(sales["gross_profit"]),
-            "orders_count": sales["orders_count"],
-            "avg_order_value": _money(sales["avg_order_value"]),
-            "collected": _money(sales["collected"]),
-        },
-        "costs": {
-            "expense": _money(costs["expense"]),
-            "payment": _money(costs["payment"]),
-            "unclassified": _money(costs["unclassified"]),
-            "salaries": _money(costs["salaries"]),
-            "incentives": _money(costs["incentives"]),
-            "loan": _money(costs["loan"]),
-            "recurring": _money(costs["recurring"]),
-            # Cash that actually left in this window. True, and the figure the
-            # খরচ report and the bank statement agree with — but lumpy, because
-            # a month's rent lands on one day.
-            "cash_out": _money(costs["total"]),
-            # What this window's trading carries: monthly commitments spread
-            # over the month's open days, day-of spending on its own day. This
-            # is what every target and the profit figure are judged against.
-            "total": _money(charged["total"]),
-            "variable": _money(charged["variable"]),
-            "periodic": _money(charged["periodic"]),
-            "monthly_share_daily": _money(charged["daily_share"]),
-            "by_category": costs["by_category"],
-        },
-        "net": {
-            "profit": _money(net_profit),
-            "is_profit": net_profit >= 0,
-            # Same figure on a cash basis: useful on the day a big bill is
-            # paid, misleading as a measure of how the day traded.
-            "cash_profit": _money(cash_profit),
-            "margin_pct": (
-                round(float(net_profit / sales["revenue"] * 100), 1)
-                if sales["revenue"]
-                else 0.0
-            ),
-        },
-        "comparison": comparison,
-        "targets": targets,
-        "to_do": to_do,
-        "receivables": receivables,
-        "inventory": {k: _money(v) if k != "vehicle_count" else v
-                      for k, v in inventory_for(user).items()},
-        "loans": {
-            **{
-                key: _money(value)
-                for key, value in loans.items()
-                if key in ("monthly_due", "outstanding", "overdue_amount")
-            },
-            "active_count": loans["active_count"],
-            "overdue_count": loans["overdue_count"],
-            "next": loans["next"],
-        },
-        "monthly_commitment": commitment,
-        "fixed_costs": {
-            "count": fixed["count"],
-            "monthly_total": _money(fixed["monthly_total"]),
-            "unpaid_count": fixed["unpaid_count"],
-            "unpaid_amount": _money(fixed["unpaid_amount"]),
-            "overdue_count": fixed["overdue_count"],
-            "items": fixed["items"],
-        },
-        "dead_stock": dead_stock,
-        "restock": restock_rows,
-        "focus": build_focus(
-            sales,
-            costs,
-            net_profit,
-            targets,
-            receivables,
-            dead_stock,
-            comparison,
-            loans,
-            fixed,
-        ),
-        "customers_count": Customer.objects.filter(user=user).count(),
+        "active_count": loans["active_count"],
+        "overdue_count": loans["overdue_count"],
+        "next": loans["next"],
+    }
+
+
+def _fixed_costs_section(o):
+    fixed = o.fixed
+    return {
+        "count": fixed["count"],
+        "monthly_total": _money(fixed["monthly_total"]),
+        "unpaid_count": fixed["unpaid_count"],
+        "unpaid_amount": _money(fixed["unpaid_amount"]),
+        "overdue_count": fixed["overdue_count"],
+        "items": fixed["items"],
     }
+
+
+def _restock_section(o):
+    # The other half of the stock story: what to bring more of.
+    from analytics.restock import restock_suggestions
+
+    return restock_suggestions(o.user, o.begin, o.finish)
+
+
+def _focus_section(o):
+    return build_focus(
+        o.sales,
+        o.costs,
+        o.net_profit,
+        o.targets,
+        o.receivables,
+        o.dead_stock,
+        o.comparison,
+        o.loans,
+        o.fixed,
+    )
+
+
+# name -> function of an Overview, in the order the response lists them.
+SECTIONS = {
+    "period": _period_section,
+    "compare_with": _compare_with_section,
+    "sales": _sales_section,
+    "costs": _costs_section,
+    "net": _net_section,
+    "comparison": lambda o: o.comparison,
+    "targets": lambda o: o.targets,
+    "to_do": _to_do_section,
+    "receivables": lambda o: o.receivables,
+    "inventory": _inventory_section,
+    "loans": _loans_section,
+    "monthly_commitment": lambda o: o.commitment,
+    "fixed_costs": _fixed_costs_section,
+    "dead_stock": lambda o: o.dead_stock,
+    "restock": _restock_section,
+    "focus": _focus_section,
+    "customers_count": lambda o: Customer.objects.filter(user=o.user).count(),
+}
+
+
+def build_overview(user, preset="this_month", start=None, end=None, sections=None):
+    """The analytics report for one window.
+
+    `sections` limits it to those SECTIONS (plus "period", which every screen
+    titles itself with); None builds them all. ValueError for a name that is
+    not a section.
+    """
+    if sections is None:
+        wanted = set(SECTIONS)
+    else:
+        wanted = set(sections) | {"period"}
+        unknown = wanted - set(SECTIONS)
+        if unknown:
+            raise ValueError(", ".join(sorted(unknown)))
+    overview = Overview(user, preset, start, end)
+    return {name: build(overview) for name, build in SECTIONS.items() if name in wanted}
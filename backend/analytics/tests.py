@@ -1,3 +1,235 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from banking.models import BankAccount, Transaction
+from customers.models import Customer
+from orders.models import Order, OrderItem
+from products.models import Product
+
+from . import services
+
+
+class ReceivablesTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.karim = Customer.objects.create(
+            name='Karim', phone='01700000001', user=self.user
+        )
+
+    def _order(self, total, paid, days_ago, **extra):
+        order = Order.objects.create(
+            user=self.user,
+            total_amount=Decimal(total),
+            paid_amount=Decimal(paid),
+            **extra
+        )
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return order
+
+    def test_groups_customers_and_guests_in_the_database(self):
+        self._order('500', '100', 5, customer=self.karim)
+        self._order('300', '0', 45, customer=self.karim)
+        self._order('200', '50', 100, customer_name='Walk-in Rahim', customer_phone='018')
+        self._order('80', '0', 2)
+        self._order('70', '0', 3)
+        self._order('90', '90', 1, customer=self.karim)
+        self._order('999', '0', 1, customer=self.karim, status='cancelled')
+
+        data = services.receivables_for(self.user, limit=2)
+
+        self.assertEqual(data['total'], Decimal('1000'))
+        self.assertEqual(data['customers_count'], 4)
+        self.assertEqual(
+            data['top'][0],
+            {
+                'customer_id': self.karim.id,
+                'name': 'Karim',
+                'phone': '01700000001',
+                'due': 700.0,
+                'orders': 2,
+                'oldest': data['top'][0]['oldest'],
+            },
+        )
+        self.assertEqual(data['top'][1]['name'], 'Walk-in Rahim')
+        self.assertEqual(data['top'][1]['phone'], '018')
+        self.assertEqual(
+            {band['key']: band['due'] for band in data['aging']},
+            {'0_30': 550.0, '31_60': 300.0, '61_90': 0.0, '90_plus': 150.0},
+        )
+
+        rest = self.client.get(
+            '/api/analytics/detail/', {'topic': 'receivables', 'limit': 2}
+        )
+        self.assertEqual(rest.data['count'], 4)
+        rest = self.client.get(
+            '/api/analytics/detail/',
+            {'topic': 'receivables', 'cursor': rest.data['next']},
+        )
+        self.assertEqual([row['name'] for row in rest.data['rows']], ['নাম নেই', 'নাম নেই'])
+        self.assertIsNone(rest.data['next'])
+
+
+class DetailTableTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _product(self, name, stock, buy_price):
+        return Product.objects.create(
+            name=name, buy_price=buy_price, sell_price=buy_price + 10,
+            stock=stock, user=self.user
+        )
+
+    def test_cursor_walks_every_row_once_in_the_chosen_order(self):
+        for index in range(7):
+            self._product(f'Idle {index}', stock=index % 3 + 1, buy_price=100)
+        sold = self._product('Sold', stock=5, buy_price=100)
+        order = Order.objects.create(user=self.user, total_amount=110, paid_amount=110)
+        OrderItem.objects.create(
+            order=order, product=sold, quantity=1, unit_price=110, buy_price=100
+        )
+
+        seen, cursor = [], None
+        while True:
+            params = {'topic': 'dead_stock', 'sort': '-tied_up', 'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get('/api/analytics/detail/', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['tied_up'] for row in response.data['rows']]
+            cursor = response.data['next']
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(response.data['totals']['tied_up'], sum(seen))
+        self.assertNotIn('Sold', [row['name'] for row in response.data['rows']])
+
+        bad = self.client.get('/api/analytics/detail/', {'topic': 'dead_stock', 'sort': 'href'})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_export_streams_the_same_rows(self):
+        self._product('Tin', stock=2, buy_price=50)
+        self._product('Rod', stock=1, buy_price=70)
+
+        response = self.client.get(
+            '/api/analytics/detail/export/',
+            {'topic': 'dead_stock', 'file': 'csv', 'sort': 'name'},
+        )
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('Rod,'))
+
+        response = self.client.get(
+            '/api/analytics/detail/export/', {'topic': 'dead_stock'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('.xlsx', response['Content-Disposition'])
+
+
+class WindowAggregateTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        now = timezone.now()
+        self.current = (now - timedelta(days=10), now)
+        self.previous = (now - timedelta(days=20), now - timedelta(days=10, seconds=1))
+
+    def _order(self, total, buy, paid, days_ago, status='pending'):
+        order = Order.objects.create(
+            user=self.user, total_amount=Decimal(total), total_buy_price=Decimal(buy),
+            paid_amount=Decimal(paid), status=status
+        )
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+
+    def _debit(self, account, amount, days_ago, nature, category=''):
+        Transaction.objects.create(
+            account=account, type='debit', amount=Decimal(amount), purpose='x',
+            nature=nature, category=category,
+            date=timezone.now() - timedelta(days=days_ago)
+        )
+
+    def test_windows_match_separate_calls(self):
+        self._order('100', '60', '100', 1)
+        self._order('50', '20', '10', 2)
+        self._order('999', '1', '0', 2, status='cancelled')
+        self._order('70', '40', '70', 15)
+        account = BankAccount.objects.create(owner=self.user, name='Cash', balance=Decimal('1000'))
+        self._debit(account, '30', 1, 'expense', 'rent')
+        self._debit(account, '12', 2, 'other', 'rent')
+        self._debit(account, '8', 3, '')
+        self._debit(account, '25', 15, 'payment', 'supplies')
+        self._debit(account, '99', 3, 'withdrawal')
+
+        windows = [self.current, self.previous]
+        sales = services.sales_for_windows(self.user, windows)
+        costs = services.costs_for_windows(self.user, windows)
+
+        self.assertEqual(sales, [services.sales_for(self.user, *w) for w in windows])
+        self.assertEqual(costs, [services.costs_for(self.user, *w) for w in windows])
+
+        self.assertEqual(sales[0]['revenue'], Decimal('150'))
+        self.assertEqual(sales[0]['gross_profit'], Decimal('70'))
+        self.assertEqual(sales[0]['orders_count'], 2)
+        self.assertEqual(sales[0]['collected'], Decimal('110'))
+        self.assertEqual(sales[1]['revenue'], Decimal('70'))
+
+        self.assertEqual(costs[0]['expense'], Decimal('42'))
+        self.assertEqual(costs[0]['unclassified'], Decimal('8'))
+        self.assertEqual(costs[0]['payment'], Decimal('0'))
+        self.assertEqual(costs[0]['total'], Decimal('50'))
+        self.assertEqual(
+            [(row['category'], row['amount']) for row in costs[0]['by_category']],
+            [('rent', 42.0), ('', 8.0)],
+        )
+        self.assertEqual(costs[1]['total'], Decimal('25'))
+        self.assertEqual(
+            [row['category'] for row in costs[1]['by_category']], ['supplies']
+        )
+
+
+class OverviewSectionsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_only_requested_sections_are_built(self):
+        response = self.client.get(
+            '/api/analytics/overview/', {'period': 'today', 'sections': 'sales,targets'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data), ['period', 'sales', 'targets'])
+
+        full = services.build_overview(self.user, preset='today')
+        self.assertEqual(list(full), list(services.SECTIONS))
+        self.assertEqual(response.data['targets'], full['targets'])
+
+        bad = self.client.get('/api/analytics/overview/', {'sections': 'sales,nope'})
+        self.assertEqual(bad.status_code, 400)
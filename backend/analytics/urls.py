@@ -6,6 +6,11 @@ urlpatterns = [
     path("analytics/overview/", views.overview, name="analytics-overview"),
     path("analytics/periods/", views.period_options, name="analytics-periods"),
     path("analytics/detail/", views.detail, name="analytics-detail"),
+    path(
+        "analytics/detail/export/",
+        views.detail_export,
+        name="analytics-detail-export",
+    ),
     path("analytics/feed/", views.dashboard_feed, name="analytics-feed"),
     path(
         "analytics/monthly-expenses/",
@@ -1,9 +1,19 @@
+from django.utils import timezone
+
 from core.scoping import owner_for, require_permission
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from . import details, expense_report, feed, periods, services
+from . import details, expense_report, exports, feed, periods, services
+
+
+def _period(request):
+    return {
+        "preset": request.query_params.get("period", "this_month"),
+        "start": request.query_params.get("start"),
+        "end": request.query_params.get("end"),
+    }
 
 
 @api_view(["GET"])
@@ -14,14 +24,20 @@ def overview(request):
 
     One endpoint rather than six: every figure on the screen is compared against
     the same window, and splitting it would let the sections disagree with each
-    other while the user watches them load.
+    other while the user watches them load. `?sections=sales,costs,targets`
+    builds only those (see services.SECTIONS) for screens that show a few.
     """
-    data = services.build_overview(
-        owner_for(request),
-        preset=request.query_params.get("period", "this_month"),
-        start=request.query_params.get("start"),
-        end=request.query_params.get("end"),
-    )
+    sections = request.query_params.get("sections")
+    try:
+        data = services.build_overview(
+            owner_for(request),
+            sections=[name.strip() for name in sections.split(",") if name.strip()]
+            if sections
+            else None,
+            **_period(request),
+        )
+    except ValueError:
+        return Response({"error": "রিপোর্টের এই অংশ নেই।"}, status=400)
     return Response(data)
 
 
@@ -42,15 +58,20 @@ def detail(request):
 
     All topics share one response shape ({title, note, columns, rows}) so the
     frontend renders any of them with a single table instead of a view per topic.
+    A page at a time: `sort` takes any column marked sortable ("-" for the
+    other way), and `next` in the response is the cursor for the next page.
     """
-    topic = request.query_params.get("topic", "")
-    data = details.build(
-        owner_for(request),
-        topic,
-        preset=request.query_params.get("period", "this_month"),
-        start=request.query_params.get("start"),
-        end=request.query_params.get("end"),
-    )
+    try:
+        data = details.build(
+            owner_for(request),
+            request.query_params.get("topic", ""),
+            sort=request.query_params.get("sort"),
+            cursor=request.query_params.get("cursor"),
+            limit=int(request.query_params.get("limit") or details.PAGE_SIZE),
+            **_period(request),
+        )
+    except ValueError:
+        return Response({"error": "এই ক্রম বা পেজ দেখানো যাচ্ছে না।"}, status=400)
     if data is None:
         return Response(
             {"error": "এই বিষয়ের বিস্তারিত নেই।"}, status=404
@@ -58,6 +79,30 @@ def detail(request):
     return Response(data)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@require_permission("analytics.view")
+def detail_export(request):
+    """Every row of one topic as ?file=xlsx (default) or ?file=csv."""
+    topic = request.query_params.get("topic", "")
+    write = exports.FORMATS.get(request.query_params.get("file", "xlsx"))
+    if write is None:
+        return Response({"error": "শুধু csv বা xlsx ফাইল হয়।"}, status=400)
+    table = details.table(owner_for(request), topic, **_period(request))
+    if table is None:
+        return Response(
+            {"error": "এই বিষয়ের বিস্তারিত নেই।"}, status=404
+        )
+    try:
+        return write(
+            table,
+            request.query_params.get("sort"),
+            f"{topic}-{timezone.localdate().isoformat()}",
+        )
+    except ValueError:
+        return Response({"error": "এই ক্রম বা পেজ দেখানো যাচ্ছে না।"}, status=400)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 @require_permission("analytics.view", "dashboard.money")
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # pg_trgm lookups for products.search
     "rest_framework",
     "rest_framework.authtoken",
     "corsheaders",
@@ -175,6 +176,8 @@ if not DEBUG:
 SESSION_COOKIE_SAMESITE = "Lax"
 
 MIDDLEWARE = [
+    # First, so its Server-Timing total covers every other middleware.
+    "core.timing.RequestTimingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # Add this for static files in production
@@ -222,6 +225,24 @@ DATABASES = {
     }
 }
 
+# Cache
+# "default" is per process and costs no query; DRF's throttles use it on
+# every request. "shared" is one table every worker, management command
+# and shell reads: core.shop and core.bootstrap invalidate by bumping
+# version numbers, and core.admin_dashboard marks its snapshot stale, which
+# only works if every process sees the write. The table is made by a core
+# migration (createcachetable does the same).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "oxm_cache",
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -498,6 +519,9 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
 # ShurjoPay Settings
+# The plugin writes logs/shurjopay_live.log (subscription.pay) and does not
+# make the directory; the log itself is run output and stays out of git.
+os.makedirs(os.path.join(BASE_DIR, "logs"), exist_ok=True)
 SP_USERNAME = config("SP_USERNAME", default="")
 SP_PASSWORD = config("SP_PASSWORD", default="")
 SP_ENDPOINT = config("SP_ENDPOINT", default="https://engine.shurjopayment.com")
@@ -560,3 +584,50 @@ DEFAULT_FROM_EMAIL = _env(
 )
 SERVER_EMAIL = _env("SERVER_EMAIL", "support@oxymanager.com")
 
+
+# ── Database connections ──────────────────────────────────────────────
+# Without CONN_MAX_AGE every request opened its own PostgreSQL connection —
+# TCP handshake, password auth and a fresh backend process — and closed it
+# again, which cost more than most of the queries it then ran. DB_POOL_MODE
+# picks how connections are kept:
+#
+#   persistent   (default) Each worker keeps its connection for
+#                DB_CONN_MAX_AGE seconds. CONN_HEALTH_CHECKS pings it before
+#                a request reuses it, so a connection the server dropped
+#                overnight is replaced instead of failing the first request.
+#   transaction  Behind PgBouncer (or any proxy) in transaction pooling. A
+#                server connection is only ours for one transaction, so
+#                nothing may outlive it: server-side cursors (which
+#                .iterator() opens) are turned off, and no session-level SET
+#                is sent. Give the database role `timezone = 'UTC'`
+#                (ALTER ROLE ... SET timezone TO 'UTC') so Django never needs
+#                its per-connection SET TIME ZONE.
+#   off          The old behaviour: a new connection per request.
+#
+# `python manage.py benchmark_db_connections` measures the difference.
+DB_POOL_MODE = _env("DB_POOL_MODE", "persistent").lower()
+if DB_POOL_MODE not in ("persistent", "transaction", "off"):
+    raise ImproperlyConfigured(
+        f"DB_POOL_MODE must be persistent, transaction or off, not {DB_POOL_MODE!r}"
+    )
+
+DATABASES["default"]["CONN_MAX_AGE"] = (
+    0 if DB_POOL_MODE == "off" else _env("DB_CONN_MAX_AGE", 60, int)
+)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = DB_POOL_MODE != "off"
+if DB_POOL_MODE == "transaction":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+# ── Protected media ───────────────────────────────────────────────────
+# Shop papers are downloaded through signed /api/files/<token>/ links (see
+# core.protected_media). In production set PROTECTED_MEDIA_ACCEL_PREFIX to
+# the nginx `internal` location that aliases MEDIA_ROOT ("/protected-media/"
+# in nginx_oxm.conf) and nginx sends the file; left empty, Django does.
+PROTECTED_MEDIA_ACCEL_PREFIX = _env("PROTECTED_MEDIA_ACCEL_PREFIX", "")
+PROTECTED_MEDIA_LINK_SECONDS = _env("PROTECTED_MEDIA_LINK_SECONDS", 12 * 60 * 60, int)
+
+# ── Request timing ────────────────────────────────────────────────────
+# core.timing logs an API request at WARNING on the "oxm.timing" logger when
+# it is slower than this or runs at least this many queries.
+REQUEST_TIMING_SLOW_MS = _env("REQUEST_TIMING_SLOW_MS", 500, int)
+REQUEST_TIMING_QUERY_WARN = _env("REQUEST_TIMING_QUERY_WARN", 50, int)
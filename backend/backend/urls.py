@@ -31,11 +31,8 @@ urlpatterns = [
     path("api/", include("documents.urls")),  # Shop papers
 ]
 
-# Serve media files during development
+# Serve media files during development. In production nginx serves the
+# public part of /media/ and shop papers go through core.protected_media.
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-else:
-    # In production, static files are served by WhiteNoise middleware
-    # Only add media files serving for production if needed
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0016_alter_transaction_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'date'], name='banking_tra_account_e2ae22_idx'),
+        ),
+    ]
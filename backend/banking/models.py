@@ -1,3 +1,4 @@
+from core.protected_media import protected_url
 from core.uploads import validate_document
 
 from calendar import monthrange
@@ -129,6 +130,8 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ["-date"]
+        # An account's statement pages newest first (core.pagination).
+        indexes = [models.Index(fields=["account", "date"])]
 
     def __str__(self):
         return f"{self.type.title()} - ${self.amount} - {self.account.name}"
@@ -311,8 +314,16 @@ class Loan(models.Model):
             txn.delete()
         return super().delete(*args, **kwargs)
 
+    def _loaded_payments(self):
+        """The payments, if a prefetch already read them; else None."""
+        cache = getattr(self, "_prefetched_objects_cache", {})
+        return list(cache["payments"]) if "payments" in cache else None
+
     @property
     def paid_amount(self):
+        payments = self._loaded_payments()
+        if payments is not None:
+            return sum((payment.amount for payment in payments), Decimal("0"))
         return self.payments.aggregate(total=Sum("amount"))["total"] or Decimal("0")
 
     @property
@@ -366,7 +377,11 @@ class Loan(models.Model):
         borrower who pays two months at once should see the first two rows
         settled, not two arbitrary ones.
         """
-        payments = list(self.payments.order_by("paid_on", "id"))
+        payments = self._loaded_payments()
+        if payments is None:
+            payments = list(self.payments.order_by("paid_on", "id"))
+        else:
+            payments.sort(key=lambda payment: (payment.paid_on, payment.id))
         today = timezone.localdate()
         # Upcoming installments are counted from the DUE DATE of the last
         # settled one — the "কবে দিতে হবে" of installment 8, not the day its
@@ -397,9 +412,9 @@ class Loan(models.Model):
                     "paid_amount": payment.amount if payment else None,
                     "reference": payment.reference if payment else "",
                     # Relative here; LoanSerializer turns it absolute because
-                    # the frontend runs on a different origin than /media.
+                    # the frontend runs on a different origin than the API.
                     "receipt_url": (
-                        payment.receipt.url if payment and payment.receipt else None
+                        protected_url(payment.receipt) if payment and payment.receipt else None
                     ),
                     "days_late": (
                         (payment.paid_on - due).days
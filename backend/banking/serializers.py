@@ -1,3 +1,4 @@
+from core.protected_media import ProtectedFilesMixin, protected_url
 from django.contrib.auth.models import User
 from employees.models import Employee
 from django.utils import timezone
@@ -60,10 +61,16 @@ class BankAccountSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_at", "updated_at", "owner"]
 
+    # The account list annotates these (banking.views.BankAccountViewSet);
+    # a single account read elsewhere falls back to a query each.
     def get_transaction_count(self, obj):
+        if hasattr(obj, "transactions_count"):
+            return obj.transactions_count
         return obj.transactions.count()
 
     def get_total_credits(self, obj):
+        if hasattr(obj, "credits_total"):
+            return obj.credits_total
         return (
             obj.transactions.filter(type="credit", status="verified").aggregate(
                 total=serializers.models.Sum("amount")
@@ -72,6 +79,8 @@ class BankAccountSerializer(serializers.ModelSerializer):
         )
 
     def get_total_debits(self, obj):
+        if hasattr(obj, "debits_total"):
+            return obj.debits_total
         return (
             obj.transactions.filter(type="debit", status="verified").aggregate(
                 total=serializers.models.Sum("amount")
@@ -311,7 +320,9 @@ class LoanSerializer(serializers.ModelSerializer):
         return data
 
 
-class RecurringCostPaymentSerializer(serializers.ModelSerializer):
+class RecurringCostPaymentSerializer(ProtectedFilesMixin, serializers.ModelSerializer):
+    protected_files = ("receipt",)
+
     receipt_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -331,9 +342,7 @@ class RecurringCostPaymentSerializer(serializers.ModelSerializer):
     def get_receipt_url(self, obj):
         if not obj.receipt:
             return None
-        request = self.context.get("request")
-        url = obj.receipt.url
-        return request.build_absolute_uri(url) if request else url
+        return protected_url(obj.receipt, self.context.get("request"))
 
 
 class RecurringCostSerializer(serializers.ModelSerializer):
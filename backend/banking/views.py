@@ -1,9 +1,12 @@
+from core import sparse
+from core.idempotency import idempotent
+from core.pagination import KeysetPaginationMixin
 from core.scoping import HasPermission, owner_for
 from datetime import date, timedelta
 from decimal import Decimal, InvalidOperation
 
 from django.db import transaction as db_transaction
-from django.db.models import Q
+from django.db.models import Count, DecimalField, OuterRef, Q
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from employees.models import Employee
@@ -39,11 +42,12 @@ from .serializers import (
 )
 
 
-class TransactionPagination(PageNumberPagination):
+class TransactionPagination(KeysetPaginationMixin, PageNumberPagination):
     """Custom pagination for transactions"""
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
+    cursor_keys = ("date", "id")
 
 
 def has_active_banking_plan(user):
@@ -91,6 +95,21 @@ class BankAccountViewSet(viewsets.ModelViewSet):
             # Regular users can only see their own accounts
             queryset = BankAccount.objects.filter(owner=user, is_active=True)
 
+        # What BankAccountSerializer shows per account, read with the rows
+        # rather than three queries per account.
+        transactions = Transaction.objects.filter(account=OuterRef("pk"))
+        verified = transactions.filter(status="verified")
+        money = DecimalField(max_digits=15, decimal_places=2)
+        queryset = queryset.select_related("owner").annotate(
+            transactions_count=sparse.per_row(transactions, Count("id")),
+            credits_total=sparse.per_row(
+                verified.filter(type="credit"), Sum("amount"), money
+            ),
+            debits_total=sparse.per_row(
+                verified.filter(type="debit"), Sum("amount"), money
+            ),
+        )
+
         # Order by: Main account first, then by creation date (newest first)
         return queryset.extra(
             select={"is_main": "CASE WHEN name = 'Main' THEN 0 ELSE 1 END"}
@@ -280,6 +299,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
     search_fields = ["purpose", "reference_number"]
     ordering_fields = ["date", "amount", "type"]
     ordering = ["-date"]
+    cursor_keys = ("date", "id")
 
     def get_queryset(self):
         """Return transactions based on user permissions"""
@@ -920,6 +940,7 @@ class LoanViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=True, methods=["post"])
+    @idempotent
     def pay(self, request, pk=None):
         """Record an installment.
 
@@ -1047,6 +1068,7 @@ class RecurringCostViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=True, methods=["post"])
+    @idempotent
     def pay(self, request, pk=None):
         """Settle one month.
 
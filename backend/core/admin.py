@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, Category, UserSettings, Gift, Achievement, Level, Brand, PaymentMethod, CustomDomain, DNSRecord
+from .models import UserProfile, Category, UserSettings, ShopHoliday, Gift, Achievement, Level, Brand, PaymentMethod, CustomDomain, DNSRecord
 
 
 @admin.register(UserProfile)
@@ -60,6 +60,14 @@ class UserSettingsAdmin(admin.ModelAdmin):
         return qs.filter(user=request.user)
 
 
+@admin.register(ShopHoliday)
+class ShopHolidayAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'name', 'created_at')
+    list_filter = ('date',)
+    search_fields = ('user__username', 'name')
+    date_hierarchy = 'date'
+
+
 @admin.register(Gift)
 class GiftAdmin(admin.ModelAdmin):
     list_display = ('name', 'user', 'is_active', 'created_at', 'updated_at')
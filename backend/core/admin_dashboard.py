@@ -1,18 +1,41 @@
 """Stats for the OxyManager admin dashboard.
 
+The figures are platform-wide — every shop's orders, stock and bank
+balances — and used to be recomputed on every admin index load: a dozen
+aggregates over whole tables, slower with every shop that signs up. They
+are now taken by `take_snapshot()` into core.PlatformSnapshot, one row per
+day, and the page reads that row:
+
+    python manage.py refresh_platform_kpis      # from cron, every few minutes
+
+The page shows how old the figures are. It retakes them itself only when
+there is nothing to show, when the row is from an earlier day (its "today"
+would be wrong), or when it is older than STALE_SECONDS and something has
+been written since: saving an order, product, customer, employee, bank
+account or user marks the snapshot stale (core.models). The mark is kept
+in the "shared" cache (settings.CACHES), so a save in any API worker
+reaches the worker serving the admin, and the cron clears it for all.
+
 Everything here is defensive: a missing app, a renamed field or an empty
-table must degrade to a dash, never take the admin down — this runs on
-every admin index page load.
+table must degrade to a dash, never take the admin down.
 """
 
 from datetime import timedelta
 
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.db.models import F, Sum
 from django.urls import reverse
 from django.utils import timezone
 
+STALE_KEY = "platform_kpis:stale"
+STALE_SECONDS = 15 * 60
+#: Days of closing figures behind each trend line.
+TREND_DAYS = 14
+
+cache = caches["shared"]
+
 
 def _safe(fn, default=None):
     try:
@@ -38,6 +61,12 @@ def _money(value):
         return str(value)
 
 
+def _amount(value):
+    # Sums are stored as floats: DjangoJSONEncoder would write a Decimal as a
+    # string, and "0" is truthy.
+    return None if value is None else float(value)
+
+
 def _admin_url(app_label, model_name):
     try:
         return reverse(f"admin:{app_label}_{model_name}_changelist")
@@ -45,6 +74,135 @@ def _admin_url(app_label, model_name):
         return "#"
 
 
+def mark_stale():
+    """Something the dashboard counts has changed; see STALE_SECONDS."""
+    # add(): once marked, further saves only read the row.
+    cache.add(STALE_KEY, True, None)
+
+
+def collect():
+    """Every figure the dashboard shows, computed now. None: not available."""
+    User = get_user_model()
+    now = timezone.now()
+    today = timezone.localdate()
+    month_start = today.replace(day=1)
+    week_ago = now - timedelta(days=7)
+
+    Product = _model("products.Product")
+    Order = _model("orders.Order")
+    Customer = _model("customers.Customer")
+    Employee = _model("employees.Employee")
+    BankAccount = _model("banking.BankAccount")
+
+    figures = {
+        "users": _safe(lambda: User.objects.count(), 0),
+        "users_active_week": _safe(
+            lambda: User.objects.filter(last_login__gte=week_ago).count()
+        ),
+    }
+
+    if Order is not None:
+        figures.update({
+            "sales_today": _safe(
+                lambda: _amount(
+                    Order.objects.filter(created_at__date=today).aggregate(
+                        t=Sum("total_amount")
+                    )["t"]
+                )
+            ),
+            "orders_today": _safe(
+                lambda: Order.objects.filter(created_at__date=today).count(), 0
+            ),
+            "sales_month": _safe(
+                lambda: _amount(
+                    Order.objects.filter(created_at__date__gte=month_start).aggregate(
+                        t=Sum("total_amount")
+                    )["t"]
+                )
+            ),
+            "due_total": _safe(
+                lambda: _amount(Order.objects.aggregate(t=Sum("due_amount"))["t"])
+            ),
+            "due_orders": _safe(lambda: Order.objects.filter(due_amount__gt=0).count(), 0),
+            "pending_orders": _safe(
+                lambda: Order.objects.filter(status="pending").count(), 0
+            ),
+        })
+
+    if Product is not None:
+        # Only products that actually track stock can run out.
+        tracked = dict(no_stock_required=False, has_variants=False)
+        figures.update({
+            "products": _safe(lambda: Product.objects.count(), 0),
+            "out_of_stock": _safe(
+                lambda: Product.objects.filter(stock__lte=0, **tracked).count(), 0
+            ),
+            "low_stock": _safe(
+                lambda: Product.objects.filter(
+                    stock__gt=0, stock__lte=10, **tracked
+                ).count(),
+                0,
+            ),
+            # Money sitting on the shelf (buy price x stock).
+            "stock_value": _safe(
+                lambda: _amount(
+                    Product.objects.filter(no_stock_required=False)
+                    .annotate(v=F("stock") * F("buy_price"))
+                    .aggregate(t=Sum("v"))["t"]
+                )
+            ),
+        })
+
+    if Customer is not None:
+        figures["customers"] = _safe(lambda: Customer.objects.count(), 0)
+    if Employee is not None:
+        figures["employees"] = _safe(lambda: Employee.objects.count(), 0)
+        figures["employees_active"] = _safe(
+            lambda: Employee.objects.filter(status="active").count(), 0
+        )
+    if BankAccount is not None:
+        figures["bank_balance"] = _safe(
+            lambda: _amount(BankAccount.objects.aggregate(t=Sum("balance"))["t"])
+        )
+    return figures
+
+
+def take_snapshot():
+    """Compute the figures and store them as today's row."""
+    from core.models import PlatformSnapshot
+
+    # Cleared first, so a write made while the figures are computed marks
+    # the new snapshot stale again rather than being lost.
+    cache.delete(STALE_KEY)
+    snapshot, _ = PlatformSnapshot.objects.update_or_create(
+        day=timezone.localdate(),
+        defaults={"taken_at": timezone.now(), "figures": collect()},
+    )
+    return snapshot
+
+
+def _needs_retake(snapshot):
+    if snapshot is None or snapshot.day != timezone.localdate():
+        return True
+    age = (timezone.now() - snapshot.taken_at).total_seconds()
+    return age > STALE_SECONDS and bool(cache.get(STALE_KEY))
+
+
+def _trend(history, name):
+    """SVG polyline points for `name` over `history` (oldest first), or ""."""
+    values = [row.figures.get(name) for row in history]
+    values = [value for value in values if value is not None]
+    if len(values) < 2:
+        return ""
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    step = 60 / (len(values) - 1)
+    return " ".join(
+        f"{index * step:.1f},{16 - (value - low) / span * 14 - 1:.1f}"
+        for index, value in enumerate(values)
+    )
+
+
 def dashboard_context(request):
     """Context processor: only does work on the admin index page.
 
@@ -63,61 +221,52 @@ def dashboard_context(request):
 
 
 def build_dashboard(request):
-    """Return {oxm_kpis, oxm_alerts} for templates/admin/index.html."""
-    User = get_user_model()
-    now = timezone.now()
-    today = now.date()
-    month_start = today.replace(day=1)
+    """Return {oxm_kpis, oxm_alerts, oxm_kpis_taken_at} for admin/index.html."""
+    from core.models import PlatformSnapshot
 
-    Product = _model("products.Product")
-    Order = _model("orders.Order")
-    Customer = _model("customers.Customer")
-    Employee = _model("employees.Employee")
-    BankAccount = _model("banking.BankAccount")
+    history = list(PlatformSnapshot.objects.all()[:TREND_DAYS])
+    latest = history[0] if history else None
+    if _needs_retake(latest):
+        latest = _safe(take_snapshot, latest)
+        if latest is None:
+            return {}
+        history = [latest] + [row for row in history if row.day != latest.day]
+    history.reverse()
+    figures = latest.figures
 
     kpis = []
     alerts = []
 
     # ── Sales: today and this month ──────────────────────────
-    if Order is not None:
-        today_total = _safe(
-            lambda: Order.objects.filter(created_at__date=today).aggregate(
-                t=Sum("total_amount")
-            )["t"]
-        )
-        today_count = _safe(
-            lambda: Order.objects.filter(created_at__date=today).count(), 0
-        )
+    if "sales_today" in figures:
         kpis.append({
             "label": "আজকের বিক্রি",
-            "value": f"৳{_money(today_total)}",
-            "meta": f"{today_count} টা অর্ডার",
+            "value": f"৳{_money(figures['sales_today'])}",
+            "meta": f"{figures['orders_today']} টা অর্ডার",
             "icon": "fas fa-receipt",
             "tone": "accent",
+            "trend": _trend(history, "sales_today"),
         })
 
-        month_total = _safe(
-            lambda: Order.objects.filter(
-                created_at__date__gte=month_start
-            ).aggregate(t=Sum("total_amount"))["t"]
-        )
+        month_start = latest.day.replace(day=1)
         kpis.append({
             "label": "এই মাসের বিক্রি",
-            "value": f"৳{_money(month_total)}",
+            "value": f"৳{_money(figures['sales_month'])}",
             "meta": f"{month_start.strftime('%d %b')} থেকে আজ পর্যন্ত",
             "icon": "fas fa-chart-line",
             "tone": "success",
+            "trend": _trend(history, "sales_month"),
         })
 
-        due_total = _safe(lambda: Order.objects.aggregate(t=Sum("due_amount"))["t"])
-        due_count = _safe(lambda: Order.objects.filter(due_amount__gt=0).count(), 0)
-        if due_total:
+        due_count = figures["due_orders"]
+        if figures["due_total"]:
             kpis.append({
                 "label": "মোট বাকি",
-                "value": f"৳{_money(due_total)}",
+                "value": f"৳{_money(figures['due_total'])}",
                 "meta": f"{due_count} টা অর্ডারে",
                 "icon": "fas fa-hand-holding-usd",
                 "tone": "danger",
+                "trend": _trend(history, "due_total"),
             })
         if due_count:
             alerts.append({
@@ -127,7 +276,7 @@ def build_dashboard(request):
                 "tone": "danger",
             })
 
-        pending = _safe(lambda: Order.objects.filter(status="pending").count(), 0)
+        pending = figures["pending_orders"]
         if pending:
             alerts.append({
                 "label": f"{pending} টা অর্ডার এখনো অপেক্ষমাণ",
@@ -137,100 +286,84 @@ def build_dashboard(request):
             })
 
     # ── Stock health ─────────────────────────────────────────
-    if Product is not None:
+    if "products" in figures:
         kpis.append({
             "label": "প্রোডাক্ট",
-            "value": _safe(lambda: Product.objects.count(), 0),
+            "value": figures["products"],
             "meta": "মোট আইটেম",
             "icon": "fas fa-box",
             "tone": "muted",
+            "trend": _trend(history, "products"),
         })
 
-        # Only products that actually track stock can run out.
-        out_of_stock = _safe(
-            lambda: Product.objects.filter(
-                stock__lte=0, no_stock_required=False, has_variants=False
-            ).count(),
-            0,
-        )
-        low_stock = _safe(
-            lambda: Product.objects.filter(
-                stock__gt=0, stock__lte=10, no_stock_required=False, has_variants=False
-            ).count(),
-            0,
-        )
-        if out_of_stock:
+        if figures["out_of_stock"]:
             alerts.append({
-                "label": f"{out_of_stock} টা প্রোডাক্টের স্টক শেষ",
+                "label": f"{figures['out_of_stock']} টা প্রোডাক্টের স্টক শেষ",
                 "icon": "fas fa-times-circle",
                 "url": _admin_url("products", "product"),
                 "tone": "danger",
             })
-        if low_stock:
+        if figures["low_stock"]:
             alerts.append({
-                "label": f"{low_stock} টা প্রোডাক্টের স্টক কমে এসেছে",
+                "label": f"{figures['low_stock']} টা প্রোডাক্টের স্টক কমে এসেছে",
                 "icon": "fas fa-exclamation-triangle",
                 "url": _admin_url("products", "product"),
                 "tone": "warn",
             })
 
-        # Money sitting on the shelf (buy price x stock).
-        stock_value = _safe(
-            lambda: Product.objects.filter(no_stock_required=False)
-            .annotate(v=F("stock") * F("buy_price"))
-            .aggregate(t=Sum("v"))["t"]
-        )
-        if stock_value:
+        if figures["stock_value"]:
             kpis.append({
                 "label": "স্টকের দাম",
-                "value": f"৳{_money(stock_value)}",
+                "value": f"৳{_money(figures['stock_value'])}",
                 "meta": "কেনা দামে",
                 "icon": "fas fa-warehouse",
                 "tone": "muted",
+                "trend": _trend(history, "stock_value"),
             })
 
     # ── People ───────────────────────────────────────────────
-    if Customer is not None:
+    if "customers" in figures:
         kpis.append({
             "label": "কাস্টমার",
-            "value": _safe(lambda: Customer.objects.count(), 0),
+            "value": figures["customers"],
             "meta": "মোট",
             "icon": "fas fa-user-friends",
             "tone": "muted",
+            "trend": _trend(history, "customers"),
         })
-    if Employee is not None:
-        active = _safe(lambda: Employee.objects.filter(status="active").count(), 0)
+    if "employees" in figures:
         kpis.append({
             "label": "কর্মচারী",
-            "value": _safe(lambda: Employee.objects.count(), 0),
-            "meta": f"{active} জন সক্রিয়",
+            "value": figures["employees"],
+            "meta": f"{figures['employees_active']} জন সক্রিয়",
             "icon": "fas fa-id-badge",
             "tone": "muted",
         })
 
     # ── Bank ─────────────────────────────────────────────────
-    if BankAccount is not None:
-        balance = _safe(lambda: BankAccount.objects.aggregate(t=Sum("balance"))["t"])
-        if balance is not None:
-            kpis.append({
-                "label": "ব্যাংক ব্যালেন্স",
-                "value": f"৳{_money(balance)}",
-                "meta": "সব অ্যাকাউন্ট মিলিয়ে",
-                "icon": "fas fa-university",
-                "tone": "success",
-            })
+    if figures.get("bank_balance") is not None:
+        kpis.append({
+            "label": "ব্যাংক ব্যালেন্স",
+            "value": f"৳{_money(figures['bank_balance'])}",
+            "meta": "সব অ্যাকাউন্ট মিলিয়ে",
+            "icon": "fas fa-university",
+            "tone": "success",
+            "trend": _trend(history, "bank_balance"),
+        })
 
     # ── Accounts ─────────────────────────────────────────────
-    week_ago = now - timedelta(days=7)
+    active = figures.get("users_active_week")
     kpis.append({
         "label": "ইউজার",
-        "value": _safe(lambda: User.objects.count(), 0),
-        "meta": _safe(
-            lambda: f"{User.objects.filter(last_login__gte=week_ago).count()} জন এই সপ্তাহে সক্রিয়",
-            "",
-        ),
+        "value": figures["users"],
+        "meta": "" if active is None else f"{active} জন এই সপ্তাহে সক্রিয়",
         "icon": "fas fa-users",
         "tone": "muted",
+        "trend": _trend(history, "users"),
     })
 
-    return {"oxm_kpis": kpis, "oxm_alerts": alerts}
+    return {
+        "oxm_kpis": kpis,
+        "oxm_alerts": alerts,
+        "oxm_kpis_taken_at": latest.taken_at,
+    }
@@ -0,0 +1,138 @@
+"""Everything the app needs when it opens, from one cached read per shop.
+
+Logging in used to cost far more than checking a password. Each login ran
+get_or_create on the profile and on the settings, looked up the SMS balance
+and saved the staff login row. Worse, any save of the User (the password
+hash being upgraded, say) went through core.models.save_user_profile, which
+saved the profile and the settings again whether or not anything had
+changed. On reload the app then asked profile, settings and subscription
+for the same things one by one.
+
+`payload_for(owner)` is the part that depends only on the shop: its
+profile, settings, subscription and SMS balance. It is cached under two
+version numbers (core.shop): "shop", bumped when the profile, settings or
+owner change, and "billing", bumped when the subscription or the SMS
+balance does. `respond(request, user, access, owner, token)` adds what
+belongs to this login (the user, the staff permissions and the token)
+and builds the response login and GET /api/auth/bootstrap/ both return.
+
+On the login path the only writes left are the token, created once, and
+the last_login stamp, written with a plain UPDATE so no save signal runs.
+
+    python manage.py benchmark_login
+
+measures logins per second with the password hasher held fixed.
+"""
+
+from django.core.cache import caches
+
+from core import shop
+
+CACHE_SECONDS = 24 * 60 * 60
+
+cache = caches["shared"]
+
+
+def _key(owner_id):
+    return (
+        f"bootstrap:{owner_id}:{shop.version(owner_id)}"
+        f":{shop.version(owner_id, 'billing')}"
+    )
+
+
+def forget(owner_id):
+    """Retire the owner's cached subscription and SMS balance."""
+    shop.bump(owner_id, "billing")
+
+
+def _subscription(owner):
+    from subscription.models import UserSubscription
+    from subscription.serializers import UserSubscriptionSerializer
+
+    subscription = (
+        UserSubscription.objects.select_related("plan").filter(user=owner).first()
+    )
+    if subscription is None:
+        return None
+    return UserSubscriptionSerializer(subscription).data
+
+
+def _build(owner):
+    from subscription.models import UserSMSCredit
+
+    snapshot = shop.snapshot_for(owner)
+    credits = (
+        UserSMSCredit.objects.filter(user=owner).values_list("credits", flat=True).first()
+    )
+    return {
+        "profile": {
+            "company": snapshot.company,
+            "company_address": snapshot.company_address,
+            "phone": snapshot.phone,
+            "contact_number": snapshot.contact_number,
+            "address": snapshot.address,
+            "city": snapshot.city,
+            "post_code": snapshot.post_code,
+            # Relative; made absolute per request, whose host it needs.
+            "store_logo": snapshot.store_logo_url,
+            "banner_image": snapshot.banner_image_url,
+            "created_at": snapshot.profile_created_at,
+            "updated_at": snapshot.profile_updated_at,
+            "sms_credits": credits or 0,
+        },
+        "settings": {
+            "language": snapshot.language,
+            "currency": snapshot.currency,
+            "currency_symbol": snapshot.currency_symbol,
+            "email_notifications": snapshot.email_notifications,
+            "marketing_notifications": snapshot.marketing_notifications,
+            "closed_days": list(snapshot.closed_days),
+            "created_at": snapshot.settings_created_at,
+            "updated_at": snapshot.settings_updated_at,
+        },
+        "subscription": _subscription(owner),
+    }
+
+
+def payload_for(owner):
+    """The shop's half of the bootstrap response; rebuilt only after a save."""
+    key = _key(owner.pk)
+    payload = cache.get(key)
+    if payload is None:
+        payload = _build(owner)
+        cache.set(key, payload, CACHE_SECONDS)
+    return payload
+
+
+def respond(request, user, access, owner, token):
+    """The login/bootstrap body for `user`, reading the shop as `owner`."""
+    from core.views import build_absolute_url
+
+    payload = payload_for(owner)
+    profile = dict(payload["profile"])
+    profile["store_logo"] = build_absolute_url(request, profile["store_logo"])
+    profile["banner_image"] = build_absolute_url(request, profile["banner_image"])
+    return {
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "date_joined": user.date_joined,
+            "last_login": user.last_login,
+            "is_active": user.is_active,
+            "is_staff": user.is_staff,
+            "is_superuser": user.is_superuser,
+            # Everything the frontend needs to draw the right menu.
+            "is_employee": access is not None,
+            "employee_name": access.employee.name if access else None,
+            "employee_id": access.employee_id if access else None,
+            "store_owner": owner.username,
+            "permissions": list(access.permissions or []) if access else None,
+        },
+        "profile": profile,
+        "settings": payload["settings"],
+        "subscription": payload["subscription"],
+        "token": token,
+    }
@@ -14,10 +14,29 @@ Weekday numbers are Python's `date.weekday()` — Monday 0 through Sunday 6 —
 the value stored in settings can be compared to a date without translation. The
 UI orders them Saturday-first because that is where a Bangladeshi week starts,
 but the stored numbers are unaffected by that.
+
+Besides its weekly closed days a shop shuts for Eid, a hartal or a wedding in
+the family; those dates are ShopHoliday rows. `closed_weekdays(user)` hands
+back both as one ShopCalendar, which is still the set of closed weekday
+numbers every caller already tests with `in`, and carries the sorted holiday
+dates next to it. Counting open days is arithmetic (whole weeks, the days
+left over, minus the holidays in range found by bisection), not a walk over
+the window.
+
+A report asks for the calendar several times per request, so each process
+keeps it under the shop's version number (core.shop), the one the
+ShopSnapshot its weekdays come from is cached under. The process holds
+that number for a few seconds, so asking again costs no query. Saving
+UserSettings bumps the number already; saving a holiday bumps it through
+`forget()`. The saving process builds the calendar again on its next
+read, and the others within core.shop.VERSION_SECONDS.
 """
 
+from bisect import bisect_left, bisect_right
 from datetime import date, timedelta
 
+from core import shop
+
 #: Saturday first: the order a Bangladeshi shopkeeper reads a week in. The
 #: number is still Python's weekday(), so nothing downstream has to convert.
 WEEKDAYS = [
@@ -55,20 +74,68 @@ def clean(values):
     return [number for number, _, _ in WEEKDAYS if number in keep]
 
 
-def closed_weekdays(user):
-    """The weekday numbers this shop is shut on, as a set."""
-    from core.models import UserSettings
+class ShopCalendar(frozenset):
+    """The weekday numbers a shop is shut on, plus its one-off `holidays`.
+
+    A frozenset so `weekday in closed`, `sorted(closed)` and describe() keep
+    working on it. `holidays` is a sorted tuple of dates, without those that
+    fall on a closed weekday anyway, so nothing is subtracted twice.
+    """
+
+    def __new__(cls, weekdays=(), holidays=()):
+        calendar = super().__new__(cls, weekdays)
+        calendar.holidays = tuple(
+            sorted(day for day in set(holidays) if day.weekday() not in calendar)
+        )
+        calendar.holiday_set = frozenset(calendar.holidays)
+        return calendar
+
+
+#: How many shops' calendars one process keeps.
+LOCAL_SIZE = 256
+
+_local = {}
+
+
+def _build(user):
+    from core.models import ShopHoliday
 
+    holidays = ShopHoliday.objects.filter(user_id=user.pk).values_list("date", flat=True)
+    return ShopCalendar(shop.snapshot_for(user).closed_days, holidays)
+
+
+def closed_weekdays(user):
+    """This shop's ShopCalendar: the weekdays it is shut on, and its holidays."""
     if user is None or not getattr(user, "is_authenticated", True):
-        return set()
-    settings = UserSettings.objects.filter(user=user).only("closed_days").first()
-    if settings is None:
-        return set()
-    return set(clean(settings.closed_days))
+        return ShopCalendar()
+    key = (user.pk, shop.version(user.pk))
+    calendar = _local.get(key)
+    if calendar is None:
+        calendar = _build(user)
+        if len(_local) >= LOCAL_SIZE:
+            _local.clear()
+        _local[key] = calendar
+    return calendar
+
+
+def forget(user_id):
+    """Retire a shop's calendar in every process; called when a holiday changes."""
+    shop.bump(user_id)
+
+
+def _holidays(closed):
+    return getattr(closed, "holidays", ())
+
+
+def always_open(closed):
+    """True when neither a weekday nor a holiday is ever closed."""
+    return not closed and not _holidays(closed)
 
 
 def is_open(day, closed):
-    return day.weekday() not in closed
+    return day.weekday() not in closed and day not in getattr(
+        closed, "holiday_set", ()
+    )
 
 
 def open_days_between(first, last, closed):
@@ -81,15 +148,17 @@ def open_days_between(first, last, closed):
     """
     if last < first:
         first, last = last, first
-    if not closed:
-        return max(1, (last - first).days + 1)
-
-    total = 0
-    day = first
-    while day <= last:
-        if day.weekday() not in closed:
-            total += 1
-        day += timedelta(days=1)
+    length = (last - first).days + 1
+    if always_open(closed):
+        return max(1, length)
+
+    weeks, rest = divmod(length, 7)
+    start = first.weekday()
+    total = weeks * (7 - len(closed)) + sum(
+        1 for step in range(rest) if (start + step) % 7 not in closed
+    )
+    holidays = _holidays(closed)
+    total -= bisect_right(holidays, last) - bisect_left(holidays, first)
     return max(1, total)
 
 
@@ -106,11 +175,12 @@ def open_days_in_month(day, closed):
 def next_open_day(day, closed):
     """`day` itself when the shop is open, otherwise the next day it is.
 
-    Bounded at seven steps — `clean()` guarantees at least one open weekday, so
-    the loop always terminates, but the bound makes that guarantee local.
+    Bounded at seven steps per holiday — `clean()` guarantees at least one
+    open weekday, so the loop always terminates, but the bound makes that
+    guarantee local.
     """
-    for _ in range(7):
-        if day.weekday() not in closed:
+    for _ in range(7 * (len(_holidays(closed)) + 1)):
+        if is_open(day, closed):
             return day
         day += timedelta(days=1)
     return day
@@ -141,8 +211,13 @@ def describe(closed):
 def summary(user):
     """The block every report attaches so the UI can explain its own numbers."""
     closed = closed_weekdays(user)
+    today = date.today()
     return {
         "closed_days": sorted(closed),
         "open_per_week": 7 - len(closed),
         "label": describe(closed),
+        "upcoming_holidays": [
+            day.isoformat()
+            for day in closed.holidays[bisect_left(closed.holidays, today):][:5]
+        ],
     }
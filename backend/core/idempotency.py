@@ -0,0 +1,167 @@
+"""Making a retried POST safe to send twice.
+
+The endpoints that move money — booking an order, paying a loan installment
+or a monthly cost, paying salaries, sending an SMS — ran their whole write
+path again on every request. A till whose connection timed out after the
+server had committed could not know whether to retry, and a shop owner who
+pressed "জমা দিন" twice on a slow network paid the installment twice.
+
+A client that wants to retry safely sends an `Idempotency-Key` header, any
+string it chooses (a UUID per button press is typical). The first request
+with a key claims it in the IdempotencyKey table, runs the view and stores
+the response next to the key. A request repeating the key then gets:
+
+  * the stored response, replayed with no writes at all, if the body matches;
+  * 409 while the first copy is still running;
+  * 422 if the same key comes with a different body, which is a client bug
+    rather than a retry.
+
+The view and the stored response commit in one transaction, so there is no
+moment where the money has moved but the key still looks unused. A request
+that fails with an exception or a 5xx gives the key back so it can be
+retried. A view that sends something out of the building (an SMS) opts out
+of that with `external=True`; see `idempotent`. Without the header nothing
+changes.
+
+Keys are kept per login for IdempotencyKey.LIFETIME_HOURS.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "HTTP_IDEMPOTENCY_KEY"
+
+# A claim this old with no response belongs to a worker that died mid-request.
+STALE_AFTER = timedelta(minutes=5)
+
+
+def _request_of(args):
+    # Plain function views get the request first, viewset methods after self.
+    for arg in args[:2]:
+        if hasattr(arg, "META"):
+            return arg
+    return None
+
+
+def fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    raw = f"{request.method} {request.path}\n{body}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _claim(user, key, digest):
+    """(record, None) when this request owns the key, else (None, response)."""
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=user, key=key, fingerprint=digest
+                ), None
+        except IntegrityError:
+            pass
+
+        existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if existing is None:
+            continue
+        abandoned = existing.status_code is None and (
+            timezone.now() - existing.created_at > STALE_AFTER
+        )
+        if existing.is_expired or abandoned:
+            existing.delete()
+            continue
+        if existing.fingerprint != digest:
+            return None, Response(
+                {"error": "এই Idempotency-Key আগে অন্য একটা অনুরোধে ব্যবহার হয়েছে।"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if existing.status_code is None:
+            return None, Response(
+                {"error": "একই অনুরোধ এখনও চলছে, একটু পরে আবার চেষ্টা করুন।"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        replay = Response(existing.response_body, status=existing.status_code)
+        replay["Idempotent-Replayed"] = "true"
+        return None, replay
+
+    return None, Response(
+        {"error": "একই অনুরোধ এখনও চলছে, একটু পরে আবার চেষ্টা করুন।"},
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def idempotent(view=None, *, external=False):
+    """Honour `Idempotency-Key` on a POST view or viewset action.
+
+    Goes inside `@api_view` / `@action` and any permission decorator, so a
+    request that is refused never claims a key.
+
+    `external=True` is for a view whose effect leaves the building (an SMS
+    handed to the gateway) and so cannot be rolled back with its writes.
+    The view runs outside the key's transaction and the key is never given
+    back: whatever it answered is replayed, and if it raised, the retry is
+    told the outcome is unknown instead of sending the message again.
+    """
+    if view is None:
+        return lambda view: idempotent(view, external=external)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        request = _request_of(args)
+        key = request.META.get(HEADER, "").strip() if request is not None else ""
+        if not key or request.method != "POST" or not request.user.is_authenticated:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"error": "Idempotency-Key 255 অক্ষরের বেশি হতে পারবে না।"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        record, replay = _claim(request.user, key, fingerprint(request))
+        if replay is not None:
+            return replay
+
+        if external:
+            return _run_external(record, view, args, kwargs)
+
+        try:
+            with transaction.atomic():
+                response = view(*args, **kwargs)
+                if response.status_code < 500 and hasattr(response, "data"):
+                    _answer(record, response.status_code, response.data)
+        except Exception:
+            record.delete()
+            raise
+        if record.status_code is None:
+            record.delete()
+        return response
+
+    return wrapper
+
+
+def _answer(record, status_code, body):
+    record.status_code = status_code
+    record.response_body = body
+    record.save(update_fields=["status_code", "response_body"])
+
+
+def _run_external(record, view, args, kwargs):
+    try:
+        response = view(*args, **kwargs)
+    except Exception:
+        _answer(
+            record,
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            {"error": "আগের অনুরোধের ফল জানা যায়নি। আবার পাঠানোর আগে ইতিহাস দেখে নিন।"},
+        )
+        raise
+    _answer(record, response.status_code, getattr(response, "data", None))
+    return response
@@ -0,0 +1,140 @@
+"""Small copies of uploaded photos for the places that show them small.
+
+Product photos, store logos and banners are kept exactly as uploaded, which
+is usually a phone photo of several megabytes. The product grid, the order
+picker and the storefront showed those originals at 60-200 pixels, so a
+page of twenty products downloaded twenty full photos.
+
+For each image we now keep a few derivatives, scaled to fit a square of
+SIZES[name] pixels and never enlarged:
+
+  thumb  lists, pickers, the storefront logo
+  card   product cards and the storefront grid
+  large  the product page and the banner
+
+They are WebP (JPEG where this Pillow was built without WebP), written under
+MEDIA_ROOT/derived/<size>/ next to a mirror of the original's path. The
+phone's EXIF block, which carries the GPS position the photo was taken at,
+is not copied, and the pixels are turned upright first so that dropping the
+orientation tag does not leave a photo on its side.
+
+Derivatives are made when the photo is uploaded, by `derive()`, which
+records the name of the original they were made from in the model's
+`<field>_derived` column. `image_sizes()` only compares that column with
+the image's name: it builds URLs and never touches storage, so listing
+products does not depend on how fast the disk or bucket answers. Until the
+names match (a photo uploaded before this existed, one replaced through
+the admin, or one Pillow cannot read: HEIC without a plugin, a damaged
+upload) every size is the original's URL. The first two are filled by
+
+    python manage.py backfill_image_derivatives
+"""
+
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+logger = logging.getLogger(__name__)
+
+SIZES = {"thumb": 160, "card": 480, "large": 1200}
+
+DERIVED_DIR = "derived"
+
+if features.check("webp"):
+    FORMAT, EXTENSION, SAVE_OPTIONS = "WEBP", ".webp", {"quality": 80, "method": 4}
+else:
+    FORMAT, EXTENSION, SAVE_OPTIONS = "JPEG", ".jpg", {"quality": 82, "optimize": True}
+
+
+def derivative_name(name, size):
+    """Storage name of the `size` copy of the file stored as `name`."""
+    stem = os.path.splitext(name)[0]
+    return f"{DERIVED_DIR}/{size}/{stem}{EXTENSION}"
+
+
+def _render(source, edge):
+    image = source.copy()
+    image.thumbnail((edge, edge), Image.LANCZOS)
+    if FORMAT == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    # No exif= argument: the copy carries no metadata.
+    image.save(buffer, FORMAT, **SAVE_OPTIONS)
+    return buffer.getvalue()
+
+
+def make_derivatives(name, storage=default_storage):
+    """Write every size of the image stored as `name`. False if unreadable."""
+    try:
+        with storage.open(name, "rb") as handle:
+            source = Image.open(handle)
+            source.load()
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError, ValueError):
+        logger.info("No derivatives for %s: not an image Pillow can read", name)
+        return False
+
+    source = ImageOps.exif_transpose(source)
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+
+    for size, edge in SIZES.items():
+        target = derivative_name(name, size)
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(_render(source, edge)))
+    return True
+
+
+def derived_field(field_name):
+    """The column recording which original `field_name`'s copies are of."""
+    return f"{field_name}_derived"
+
+
+def derive(instance, field_name):
+    """Make the derivatives of instance.<field_name> and record them.
+
+    The column is written with an UPDATE, not save(), so the model's save
+    signals do not run a second time for the same upload.
+    """
+    field_file = getattr(instance, field_name)
+    made = bool(field_file) and make_derivatives(field_file.name, field_file.storage)
+    column = derived_field(field_name)
+    setattr(instance, column, field_file.name if made else "")
+    type(instance)._default_manager.filter(pk=instance.pk).update(
+        **{column: getattr(instance, column)}
+    )
+    return made
+
+
+def delete_derivatives(name, storage=default_storage):
+    for size in SIZES:
+        target = derivative_name(name, size)
+        if storage.exists(target):
+            storage.delete(target)
+
+
+def image_sizes(field_file, derived, request=None):
+    """{"original": url, "thumb": url, ...} for an ImageField value, or None.
+
+    `derived` is the value of the field's `_derived` column. URLs are
+    absolute when `request` is given, as DRF's ImageField makes them;
+    otherwise they are the storage's relative URLs, as `.url` is.
+    """
+    if not field_file:
+        return None
+    storage = field_file.storage
+    name = field_file.name
+    urls = {"original": storage.url(name)}
+    if derived == name:
+        for size in SIZES:
+            urls[size] = storage.url(derivative_name(name, size))
+    else:
+        for size in SIZES:
+            urls[size] = urls["original"]
+    if request is not None:
+        urls = {key: request.build_absolute_uri(url) for key, url in urls.items()}
+    return urls
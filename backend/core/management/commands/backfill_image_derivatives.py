@@ -0,0 +1,71 @@
+"""Make the small copies of images that do not have them yet.
+
+    python manage.py backfill_image_derivatives
+    python manage.py backfill_image_derivatives --model products.ProductPhoto
+
+Uploads make their derivatives themselves (core.images.derive). This picks
+up the rest: images uploaded before derivatives existed, and images
+replaced by a path that does not call derive(), such as the admin. An
+image field takes part when its model has the `<field>_derived` column.
+Files Pillow cannot read, or that are missing from storage, are counted
+and left as they are; they keep being served as the original. Safe to
+run again: only images whose column does not name them are read.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, ImageField, Q
+
+from core.images import derive, derived_field
+
+BATCH = 200
+
+
+def derived_images():
+    """(model, field name) for every image field that keeps derivatives."""
+    found = []
+    for model in apps.get_models():
+        names = {field.name for field in model._meta.get_fields()}
+        for field in model._meta.get_fields():
+            if isinstance(field, ImageField) and derived_field(field.name) in names:
+                found.append((model, field.name))
+    return found
+
+
+class Command(BaseCommand):
+    help = "Make the thumb/card/large copies of images uploaded without them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", help="app_label.ModelName; default all")
+
+    def handle(self, *args, **options):
+        images = derived_images()
+        if options["model"]:
+            try:
+                model = apps.get_model(options["model"])
+            except (LookupError, ValueError):
+                raise CommandError(f'Unknown model "{options["model"]}".')
+            images = [(m, name) for m, name in images if m is model]
+            if not images:
+                raise CommandError(f"{model._meta.label} keeps no image derivatives.")
+
+        for model, name in images:
+            made, failed = self._backfill(model, name)
+            self.stdout.write(
+                f"{model._meta.label + '.' + name:<36} {made:>6} made  "
+                f"{failed:>6} unreadable or missing"
+            )
+
+    def _backfill(self, model, name):
+        pending = model._default_manager.exclude(
+            Q(**{name: ""})
+            | Q(**{f"{name}__isnull": True})
+            | Q(**{derived_field(name): F(name)})
+        )
+        made = failed = 0
+        for row in pending.iterator(chunk_size=BATCH):
+            if derive(row, name):
+                made += 1
+            else:
+                failed += 1
+        return made, failed
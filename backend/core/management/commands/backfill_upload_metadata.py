@@ -0,0 +1,70 @@
+"""Fill the upload metadata columns for files uploaded before they existed.
+
+    python manage.py backfill_upload_metadata
+    python manage.py backfill_upload_metadata --model documents.ImportantDocument
+
+Reads each stored file once and records its size, MIME type, hash and, for
+images, dimensions (see core.uploads.FileMetadata). Rows whose file is
+missing from storage are counted and left empty, so a list shows no size
+for them rather than failing. Safe to run again: only rows without a hash
+are read.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from core.uploads import FileMetadata
+
+BATCH = 200
+
+
+def metadata_models():
+    return [model for model in apps.get_models() if issubclass(model, FileMetadata)]
+
+
+class Command(BaseCommand):
+    help = "Record size, type, hash and dimensions of already uploaded files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", help="app_label.ModelName; default all")
+
+    def handle(self, *args, **options):
+        models = metadata_models()
+        if options["model"]:
+            try:
+                model = apps.get_model(options["model"])
+            except (LookupError, ValueError):
+                raise CommandError(f'Unknown model "{options["model"]}".')
+            if model not in models:
+                raise CommandError(f"{model._meta.label} has no upload metadata.")
+            models = [model]
+
+        for model in models:
+            filled, missing = self._backfill(model)
+            self.stdout.write(
+                f"{model._meta.label:<32} {filled:>6} filled  {missing:>6} missing files"
+            )
+
+    def _backfill(self, model):
+        source = model.metadata_source
+        pending = model._default_manager.filter(file_sha256="").exclude(
+            Q(**{source: ""}) | Q(**{f"{source}__isnull": True})
+        )
+        filled = missing = 0
+        batch = []
+        for row in pending.iterator(chunk_size=BATCH):
+            try:
+                row.record_file_metadata()
+            except OSError:
+                missing += 1
+                continue
+            batch.append(row)
+            if len(batch) >= BATCH:
+                model._default_manager.bulk_update(batch, model.metadata_columns)
+                filled += len(batch)
+                batch = []
+        if batch:
+            model._default_manager.bulk_update(batch, model.metadata_columns)
+            filled += len(batch)
+        return filled, missing
@@ -0,0 +1,89 @@
+"""Per-request latency with and without connection reuse.
+
+    python manage.py benchmark_db_connections --username shopowner
+
+Replays the same GET requests in-process twice: once closing the database
+connection at the end of every request, as CONN_MAX_AGE=0 does, and once
+keeping it, as DB_POOL_MODE=persistent does. Run it against the real
+database server; against a local socket the difference is smaller than
+across a network.
+
+/api/health/ touches no tables, so it shows the request overhead on its
+own. The product list authenticates and queries, so it shows what reuse
+saves on a typical dashboard call.
+"""
+
+import statistics
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+PATHS = ["/api/health/", "/api/products/"]
+
+
+class Command(BaseCommand):
+    help = "Compare request latency with and without persistent DB connections."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Login to request as")
+        parser.add_argument("--requests", type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist.')
+
+        # The test client's "testserver" is not in ALLOWED_HOSTS.
+        host = next(
+            (h for h in settings.ALLOWED_HOSTS if h not in ("*", "") and not h.startswith(".")),
+            "localhost",
+        )
+        client = APIClient(HTTP_HOST=host)
+        client.force_authenticate(user=user)
+        configured = connection.settings_dict["CONN_MAX_AGE"]
+        self.stdout.write(
+            f"{connection.vendor} at {connection.settings_dict.get('HOST') or 'local'}"
+        )
+        # Hundreds of requests a second from one login would trip the user
+        # throttle; what is being measured here is the connection, not it.
+        unthrottled = mock.patch.object(
+            SimpleRateThrottle, "allow_request", return_value=True
+        )
+        try:
+            unthrottled.start()
+            for path in PATHS:
+                for label, max_age in (("new connection", 0), ("reused", 600)):
+                    timings = self._run(client, path, max_age, options["requests"])
+                    self.stdout.write(
+                        f"  {path:<18} {label:<15} "
+                        f"p50 {statistics.median(timings):7.2f}ms  "
+                        f"p95 {timings[int(len(timings) * 0.95) - 1]:7.2f}ms"
+                    )
+        finally:
+            unthrottled.stop()
+            connection.settings_dict["CONN_MAX_AGE"] = configured
+            connection.close()
+
+    def _run(self, client, path, max_age, count):
+        connection.settings_dict["CONN_MAX_AGE"] = max_age
+        connection.close()
+        client.get(path)  # warm up imports and caches
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.get(path)
+            # What the request_finished signal does at the end of a real
+            # request; the test client leaves it out.
+            close_old_connections()
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f"{path} answered {response.status_code}")
+        timings.sort()
+        return timings
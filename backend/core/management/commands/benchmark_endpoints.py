@@ -0,0 +1,151 @@
+"""Time the heavy read endpoints for one shop and write a JSON report.
+
+    python manage.py benchmark_endpoints --username bigshop --output before.json
+    python manage.py benchmark_endpoints --username bigshop --compare before.json
+
+Meant to run against a shop made by generate_shop, on the production
+database engine. Each endpoint is requested once to warm up and then
+`--repeat` times in-process; the report records the median, p95 and
+slowest time, the number of queries (core.timing.QueryCounter) and the
+response size.
+
+Keep the report of each release. `--compare` prints every endpoint next
+to the same one in an earlier report, so a change that made the overview
+twice as slow, or added a query per row to the order list, shows up
+before it ships rather than in a shopkeeper's complaint.
+"""
+
+import json
+import statistics
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+from core.timing import QueryCounter
+
+# name -> path
+ENDPOINTS = {
+    "analytics-overview": "/api/analytics/overview/",
+    "analytics-feed": "/api/analytics/feed/",
+    "analytics-receivables": "/api/analytics/detail/?topic=receivables",
+    "analytics-dead-stock": "/api/analytics/detail/?topic=dead_stock",
+    "analytics-low-margin": "/api/analytics/detail/?topic=low_margin",
+    "analytics-costs": "/api/analytics/detail/?topic=costs",
+    "analytics-dead-stock-export": "/api/analytics/detail/export/?topic=dead_stock&file=csv",
+    "product-list": "/api/products/",
+    "product-search": "/api/products/search/?q=rice",
+    "product-fast-search": "/api/products/fast-search/?q=rice",
+    "order-list": "/api/orders/",
+    "order-product-summary": "/api/orders/product_summary/",
+    "order-stats": "/api/orders/stats/",
+    "customer-list": "/api/customers/",
+    "due-book": "/api/duebook/customers/",
+    "transactions-export": "/api/banking/transactions/export_xlsx/",
+}
+
+
+def _size(response):
+    if getattr(response, "streaming", False):
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the heavy read endpoints and write or compare a JSON report."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Login to request as")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--only", nargs="+", choices=sorted(ENDPOINTS), help="Endpoints to run"
+        )
+        parser.add_argument("--output", help="Write the report to this file")
+        parser.add_argument("--compare", help="An earlier report to compare against")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist.')
+
+        baseline = {}
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as handle:
+                    baseline = json.load(handle)["endpoints"]
+            except (OSError, ValueError, KeyError) as error:
+                raise CommandError(f"Cannot read {options['compare']}: {error}")
+
+        # The test client's "testserver" is not in ALLOWED_HOSTS.
+        host = next(
+            (h for h in settings.ALLOWED_HOSTS if h not in ("*", "") and not h.startswith(".")),
+            "localhost",
+        )
+        client = APIClient(HTTP_HOST=host)
+        client.force_authenticate(user=user)
+        repeat = max(1, options["repeat"])
+        names = options["only"] or list(ENDPOINTS)
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "username": user.username,
+            "repeat": repeat,
+            "endpoints": {},
+        }
+        # What is measured is the endpoint, not the per-user throttle.
+        with mock.patch.object(SimpleRateThrottle, "allow_request", return_value=True):
+            for name in names:
+                result = self._measure(client, ENDPOINTS[name], repeat)
+                report["endpoints"][name] = result
+                self.stdout.write(self._line(name, result, baseline.get(name)))
+
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def _measure(self, client, path, repeat):
+        response = client.get(path)  # warm up imports and caches
+        size = _size(response)
+        timings = []
+        counter = QueryCounter()
+        for _ in range(repeat):
+            counter = QueryCounter()
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                response = client.get(path)
+                _size(response)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            "path": path,
+            "status": response.status_code,
+            "p50_ms": round(statistics.median(timings), 1),
+            "p95_ms": round(timings[max(0, int(len(timings) * 0.95) - 1)], 1),
+            "max_ms": round(timings[-1], 1),
+            "queries": counter.count,
+            "bytes": size,
+        }
+
+    def _line(self, name, result, before):
+        line = (
+            f"{name:<24} {result['status']}  p50 {result['p50_ms']:8.1f}ms  "
+            f"p95 {result['p95_ms']:8.1f}ms  {result['queries']:5} queries  "
+            f"{result['bytes']:>9,} bytes"
+        )
+        if before:
+            change = result["p50_ms"] - before["p50_ms"]
+            percent = change / before["p50_ms"] * 100 if before["p50_ms"] else 0
+            line += (
+                f"   was p50 {before['p50_ms']:.1f}ms ({percent:+.0f}%), "
+                f"{before['queries']} queries"
+            )
+        return line
@@ -0,0 +1,105 @@
+"""Logins per second, with the password hasher held fixed.
+
+    python manage.py benchmark_login
+    python manage.py benchmark_login --hasher pbkdf2 --logins 50
+
+Creates a throwaway owner whose password is hashed with `--hasher`, posts
+to /api/auth/login/ `--logins` times in-process and prints logins per
+second with the queries and writes (INSERT, UPDATE, DELETE) one login
+makes. Everything it creates is rolled back at the end.
+
+The default hasher, md5, is there to take the password check out of the
+figure, so what is left is what the login path itself costs: run it
+before and after a change to see that part move. With pbkdf2 (Django's
+default, and what production uses) the hash dominates and the figure is
+the real ceiling of one worker.
+"""
+
+import statistics
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+from core.timing import QueryCounter
+
+HASHERS = {
+    "md5": "django.contrib.auth.hashers.MD5PasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _WriteCounter(QueryCounter):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(WRITES):
+            self.writes += 1
+        return super().__call__(execute, sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = "Measure logins per second with a fixed password hasher."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=200)
+        parser.add_argument("--hasher", choices=sorted(HASHERS), default="md5")
+
+    def handle(self, *args, **options):
+        logins = max(1, options["logins"])
+        # The test client's "testserver" is not in ALLOWED_HOSTS.
+        host = next(
+            (h for h in settings.ALLOWED_HOSTS if h not in ("*", "") and not h.startswith(".")),
+            "localhost",
+        )
+        client = APIClient(HTTP_HOST=host)
+        credentials = {"username": "benchmark-login", "password": "benchmark-login-pw"}
+
+        with override_settings(PASSWORD_HASHERS=[HASHERS[options["hasher"]]]), \
+                mock.patch.object(SimpleRateThrottle, "allow_request", return_value=True):
+            try:
+                with transaction.atomic():
+                    User.objects.create_user(**credentials)
+                    result = self._measure(client, credentials, logins)
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        self.stdout.write(
+            f"{options['hasher']:<7} {logins} logins  "
+            f"{result['per_second']:8.1f}/s  p50 {result['p50_ms']:.1f}ms  "
+            f"{result['queries']} queries, {result['writes']} writes per login"
+        )
+
+    def _measure(self, client, credentials, logins):
+        response = client.post("/api/auth/login/", credentials, format="json")
+        if response.status_code != 200:
+            raise RuntimeError(f"Login failed: {response.status_code} {response.data}")
+        timings = []
+        counter = _WriteCounter()
+        for _ in range(logins):
+            counter = _WriteCounter()
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                client.post("/api/auth/login/", credentials, format="json")
+            timings.append(time.perf_counter() - started)
+        return {
+            "per_second": logins / sum(timings),
+            "p50_ms": statistics.median(timings) * 1000,
+            "queries": counter.count,
+            "writes": counter.writes,
+        }
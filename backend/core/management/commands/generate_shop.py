@@ -0,0 +1,429 @@
+"""Build a large synthetic shop to measure the API against.
+
+    python manage.py generate_shop --username bigshop
+    python manage.py generate_shop --username bigshop --scale 0.1
+    python manage.py generate_shop --username bigshop --undo
+
+Performance work here kept being judged on the demo seeds: a few dozen
+products and orders, where every endpoint is fast and an N+1 costs nothing.
+The shops that complain have tens of thousands of SKUs and years of sales.
+
+This creates one tenant at that size (by default 50k products, a fifth of
+them with variants, 20k customers, 500k orders with their items and
+payments, dues on a share of them, 200k bank transactions, loans with
+instalments, and a year of payroll) with `bulk_create` in batches, spread
+over the last `--days` days. The random generator is seeded, so the same
+arguments give the same shop, and benchmark_endpoints reports from two
+releases compare like with like.
+
+Rows are written directly, not through the API or the models' save(), so
+no stock movements, order numbers from the daily counter, or balance
+updates are produced: order totals, account balances and search_text are
+filled in here instead, and the order counters are rebuilt from the
+orders. The tenant is marked, and `--undo` deletes it and everything it
+owns.
+"""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from banking.models import BankAccount, Loan, LoanPayment, Transaction
+from core.models import Category
+from customers.models import Customer, DuePayment
+from employees.models import Employee, SalaryRecord
+from orders import counters
+from orders.models import Order, OrderItem, OrderPayment
+from products.models import Product, ProductVariant
+from products.search import search_text_for
+from suppliers.models import Supplier
+
+MARKER = "[generated-shop]"
+BATCH = 2000
+
+DEFAULTS = {
+    "products": 50_000,
+    "customers": 20_000,
+    "orders": 500_000,
+    "transactions": 200_000,
+    "loans": 20,
+    "employees": 50,
+}
+
+WORDS = [
+    "চাল", "ডাল", "তেল", "চিনি", "লবণ", "আটা", "ময়দা", "সাবান", "শ্যাম্পু",
+    "বিস্কুট", "Rice", "Oil", "Soap", "Filter", "Bearing", "Cable", "Chain",
+    "Helmet", "Tyre", "Battery", "Mirror", "Brake", "Clutch", "Plug",
+]
+SIZES = ["S", "M", "L", "XL"]
+COLORS = ["Red", "Blue", "Black", "White"]
+EXPENSE_CATEGORIES = [
+    "rent", "utilities", "internet", "transport", "marketing", "supplies",
+    "maintenance",
+]
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+
+
+def _batches(total, size=BATCH):
+    for start in range(0, total, size):
+        yield start, min(start + size, total)
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal("0.01"))
+
+
+class Command(BaseCommand):
+    help = "Generate a large synthetic shop for benchmarking, or remove it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True, help="Login to create")
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Multiply every default count, e.g. 0.01 for a quick run",
+        )
+        for name, default in DEFAULTS.items():
+            parser.add_argument(f"--{name}", type=int, help=f"Default {default:,}")
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--undo", action="store_true")
+
+    def handle(self, *args, **options):
+        username = options["username"]
+        existing = User.objects.filter(username=username).first()
+
+        if options["undo"]:
+            if existing is None:
+                raise CommandError(f'User "{username}" does not exist.')
+            if existing.last_name != MARKER:
+                raise CommandError(f'User "{username}" was not made by generate_shop.')
+            self.stdout.write(f"Deleting {username} and everything it owns...")
+            with transaction.atomic():
+                existing.delete()
+            self.stdout.write(self.style.SUCCESS("Removed."))
+            return
+
+        if existing is not None:
+            raise CommandError(f'User "{username}" already exists; use --undo first.')
+
+        counts = {
+            name: options[name]
+            if options[name] is not None
+            else max(1, int(default * options["scale"]))
+            for name, default in DEFAULTS.items()
+        }
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        self.days = max(1, options["days"])
+
+        owner = User.objects.create_user(
+            username=username,
+            email=f"{username}@example.invalid",
+            password=username,
+            last_name=MARKER,
+        )
+        self.stdout.write(f"Created {username} (password: {username})")
+
+        steps = [
+            ("catalogue", lambda: self._catalogue(owner, counts["products"])),
+            ("customers", lambda: self._customers(owner, counts["customers"])),
+            ("orders", lambda: self._orders(owner, counts["orders"])),
+            ("banking", lambda: self._banking(owner, counts)),
+            ("payroll", lambda: self._payroll(owner, counts["employees"])),
+        ]
+        for label, step in steps:
+            started = timezone.now()
+            with transaction.atomic():
+                created = step()
+            seconds = (timezone.now() - started).total_seconds()
+            self.stdout.write(f"  {label:<10} {created:>10,} rows  {seconds:7.1f}s")
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def _moment(self):
+        """A random time within the last `days` days."""
+        return self.now - timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def _catalogue(self, owner, count):
+        rng = self.rng
+        categories = Category.objects.bulk_create(
+            [Category(name=f"Category {i}", user=owner) for i in range(50)]
+        )
+        suppliers = Supplier.objects.bulk_create(
+            [Supplier(name=f"Supplier {i}", user=owner) for i in range(200)]
+        )
+        created = len(categories) + len(suppliers)
+
+        # (product id, name, buy, sell, [(variant id, details, buy, sell)])
+        self.catalogue = []
+        for start, end in _batches(count):
+            products = []
+            for i in range(start, end):
+                buy = _money(rng.uniform(20, 5000))
+                product = Product(
+                    user=owner,
+                    name=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                    product_code=f"SKU{i:06d}",
+                    category=rng.choice(categories),
+                    supplier=rng.choice(suppliers),
+                    location=f"Rack {i % 40}",
+                    has_variants=i % 5 == 0,
+                    buy_price=buy,
+                    sell_price=_money(buy * Decimal("1.25")),
+                    stock=0 if i % 5 == 0 else rng.randrange(0, 500),
+                )
+                product.search_text = search_text_for(product)
+                products.append(product)
+            products = Product.objects.bulk_create(products)
+
+            variants = [
+                ProductVariant(
+                    product=product,
+                    color=color,
+                    size=size,
+                    buy_price=product.buy_price,
+                    sell_price=product.sell_price,
+                    stock=rng.randrange(0, 100),
+                )
+                for product in products
+                if product.has_variants
+                for color, size in zip(rng.sample(COLORS, 3), rng.sample(SIZES, 3))
+            ]
+            variants = ProductVariant.objects.bulk_create(variants)
+            created += len(products) + len(variants)
+
+            by_product = {}
+            for variant in variants:
+                by_product.setdefault(variant.product_id, []).append(
+                    (
+                        variant.pk,
+                        f"{variant.color} / {variant.size}",
+                        variant.buy_price,
+                        variant.sell_price,
+                    )
+                )
+            for product in products:
+                self.catalogue.append(
+                    (
+                        product.pk,
+                        product.name,
+                        product.buy_price,
+                        product.sell_price,
+                        by_product.get(product.pk, []),
+                    )
+                )
+        return created
+
+    def _customers(self, owner, count):
+        self.customers = []
+        for start, end in _batches(count):
+            customers = Customer.objects.bulk_create(
+                [
+                    Customer(
+                        user=owner,
+                        name=f"Customer {i}",
+                        phone=f"01{i:09d}",
+                        address=f"Road {i % 120}, Dhaka",
+                    )
+                    for i in range(start, end)
+                ]
+            )
+            self.customers.extend(customers)
+        return count
+
+    def _orders(self, owner, count):
+        rng = self.rng
+        created = 0
+        for start, end in _batches(count):
+            orders, lines = [], []
+            for i in range(start, end):
+                customer = rng.choice(self.customers) if rng.random() < 0.7 else None
+                order = Order(
+                    user=owner,
+                    order_number=f"G{owner.pk}-{i:08d}",
+                    status="completed",
+                    customer=customer,
+                    customer_name=customer.name if customer else "Walk-in",
+                    customer_phone=customer.phone if customer else "",
+                )
+                order_lines = []
+                subtotal = total_buy = Decimal("0")
+                for pk, name, buy, sell, variants in rng.sample(
+                    self.catalogue, min(len(self.catalogue), rng.randint(1, 3))
+                ):
+                    variant_id, details = None, None
+                    if variants:
+                        variant_id, details, buy, sell = rng.choice(variants)
+                    quantity = rng.randint(1, 5)
+                    order_lines.append(
+                        OrderItem(
+                            product_id=pk,
+                            variant_id=variant_id,
+                            product_name=name,
+                            variant_details=details,
+                            quantity=quantity,
+                            unit_price=sell,
+                            buy_price=buy,
+                            total_price=sell * quantity,
+                        )
+                    )
+                    subtotal += sell * quantity
+                    total_buy += buy * quantity
+                order.apply_totals(subtotal, total_buy, subtotal)
+                # Most sales are paid in full; some customers leave a due.
+                if customer is not None and rng.random() < 0.15:
+                    order.paid_amount = _money(order.total_amount * Decimal(rng.choice(["0", "0.5"])))
+                else:
+                    order.paid_amount = order.total_amount
+                order.due_amount = order.total_amount - order.paid_amount
+                orders.append(order)
+                lines.append(order_lines)
+
+            orders = Order.objects.bulk_create(orders)
+            items, payments, dues = [], [], []
+            for order, order_lines in zip(orders, lines):
+                for item in order_lines:
+                    item.order = order
+                items.extend(order_lines)
+                if order.paid_amount:
+                    payments.append(
+                        OrderPayment(
+                            order=order,
+                            method=rng.choice(["cash", "cash", "bkash", "bank"]),
+                            amount=order.paid_amount,
+                            user=owner,
+                        )
+                    )
+                if order.due_amount:
+                    dues.append(
+                        DuePayment(
+                            user=owner,
+                            customer=order.customer,
+                            order=order,
+                            amount=order.due_amount,
+                            payment_type="due",
+                            due_date=(self.now + timedelta(days=rng.randint(-30, 30))).date(),
+                            status="pending",
+                        )
+                    )
+                # created_at is auto_now_add, which bulk_create fills with now.
+                order.created_at = self._moment()
+            OrderItem.objects.bulk_create(items)
+            OrderPayment.objects.bulk_create(payments)
+            DuePayment.objects.bulk_create(dues)
+            Order.objects.bulk_update(orders, ["created_at"])
+            created += len(orders) + len(items) + len(payments) + len(dues)
+        counters.reconcile(owner.pk)
+        return created
+
+    def _banking(self, owner, counts):
+        rng = self.rng
+        accounts = BankAccount.objects.bulk_create(
+            [
+                BankAccount(name=name, owner=owner, balance=Decimal("0"))
+                for name in ("Cash Box", "Dutch-Bangla", "bKash Merchant", "City Bank")
+            ]
+        )
+        balances = {account.pk: Decimal("0") for account in accounts}
+        created = len(accounts)
+
+        for start, end in _batches(counts["transactions"]):
+            rows = []
+            for i in range(start, end):
+                account = rng.choice(accounts)
+                if rng.random() < 0.4:
+                    kind, nature, category = "credit", "income", ""
+                    amount = _money(rng.uniform(500, 50000))
+                else:
+                    kind = "debit"
+                    nature = "payment" if rng.random() < 0.3 else "expense"
+                    category = rng.choice(EXPENSE_CATEGORIES)
+                    amount = _money(rng.uniform(100, 20000))
+                balances[account.pk] += amount if kind == "credit" else -amount
+                rows.append(
+                    Transaction(
+                        account=account,
+                        type=kind,
+                        nature=nature,
+                        category=category,
+                        amount=amount,
+                        purpose=f"{category or 'sales'} {i}",
+                        date=self._moment(),
+                        reference_number=f"GEN{owner.pk}-{i:08d}",
+                    )
+                )
+            Transaction.objects.bulk_create(rows)
+            created += len(rows)
+
+        for account in accounts:
+            account.balance = balances[account.pk]
+        BankAccount.objects.bulk_update(accounts, ["balance"])
+
+        loans = Loan.objects.bulk_create(
+            [
+                Loan(
+                    user=owner,
+                    account=rng.choice(accounts),
+                    lender=f"Lender {i}",
+                    principal=Decimal("100000"),
+                    total_payable=Decimal("120000"),
+                    installment_amount=Decimal("10000"),
+                    installment_count=12,
+                    start_date=(self.now - timedelta(days=rng.randrange(self.days))).date(),
+                )
+                for i in range(counts["loans"])
+            ]
+        )
+        payments = LoanPayment.objects.bulk_create(
+            [
+                LoanPayment(loan=loan, amount=loan.installment_amount)
+                for loan in loans
+                for _ in range(rng.randint(0, 11))
+            ]
+        )
+        return created + len(loans) + len(payments)
+
+    def _payroll(self, owner, count):
+        rng = self.rng
+        employees = Employee.objects.bulk_create(
+            [
+                Employee(
+                    user=owner,
+                    employee_id=f"GEN-{i:04d}",
+                    name=f"Employee {i}",
+                    email=f"employee{i}@example.invalid",
+                    phone=f"018{i:08d}",
+                    role="Sales",
+                    department="Shop",
+                    salary=Decimal(rng.randrange(10000, 30000, 500)),
+                    hiring_date=date(2020, 1, 1),
+                )
+                for i in range(count)
+            ]
+        )
+        today = self.now.date()
+        records = []
+        for back in range(12):
+            year, month = divmod(today.year * 12 + today.month - 1 - back, 12)
+            for employee in employees:
+                records.append(
+                    SalaryRecord(
+                        employee=employee,
+                        month=MONTHS[month],
+                        year=year,
+                        base_salary=employee.salary,
+                        net_salary=employee.salary,
+                        status="paid" if back else "pending",
+                    )
+                )
+        SalaryRecord.objects.bulk_create(records, batch_size=BATCH)
+        return len(employees) + len(records)
@@ -0,0 +1,23 @@
+"""Delete Idempotency-Key records past their lifetime.
+
+Expired keys are already ignored when a request arrives, so this only keeps
+the table small. Run it daily from cron:
+
+    python manage.py prune_idempotency_keys
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records older than their lifetime."
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=IdempotencyKey.LIFETIME_HOURS)
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {deleted} expired idempotency key(s).")
@@ -0,0 +1,35 @@
+"""Retake the admin dashboard's platform-wide figures.
+
+The admin index reads them from core.PlatformSnapshot instead of scanning
+every shop's tables on each load (see core.admin_dashboard). Run it from
+cron every few minutes, so the page never has to take them itself:
+
+    */5 * * * * python manage.py refresh_platform_kpis
+
+Each run replaces today's row; earlier days keep their last figures for
+the trend lines, until they are `--keep-days` old.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.admin_dashboard import take_snapshot
+from core.models import PlatformSnapshot
+
+
+class Command(BaseCommand):
+    help = "Store today's platform-wide figures for the admin dashboard."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-days", type=int, default=365)
+
+    def handle(self, *args, **options):
+        snapshot = take_snapshot()
+        cutoff = timezone.localdate() - timedelta(days=max(1, options["keep_days"]))
+        deleted, _ = PlatformSnapshot.objects.filter(day__lt=cutoff).delete()
+        self.stdout.write(
+            f"Took {len(snapshot.figures)} figure(s) for {snapshot.day}; "
+            f"deleted {deleted} old snapshot(s)."
+        )
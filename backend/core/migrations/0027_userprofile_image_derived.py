@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_platformsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='banner_image_derived',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='store_logo_derived',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+    ]
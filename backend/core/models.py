@@ -1,9 +1,12 @@
+from datetime import timedelta
+
 from core.uploads import validate_image
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 
@@ -39,6 +42,13 @@ class UserProfile(models.Model):
         validators=[validate_image],upload_to="store_logos/", blank=True, null=True)
     banner_image = models.ImageField(
         validators=[validate_image],upload_to="banner_images/", blank=True, null=True)
+    # Which logo and banner the small copies were made from; see core.images.
+    store_logo_derived = models.CharField(
+        max_length=100, blank=True, default="", editable=False
+    )
+    banner_image_derived = models.CharField(
+        max_length=100, blank=True, default="", editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -127,18 +137,104 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, "profile"):
-        instance.profile.save()
-    else:
+def save_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    # Only makes sure an older account has both rows. Re-saving them on every
+    # User save wrote two rows per login and per password-hash upgrade, and
+    # saved nothing, since neither holds a copy of anything on User.
+    if created or update_fields:
+        return
+    if not hasattr(instance, "profile"):
         UserProfile.objects.create(user=instance)
-
-    if hasattr(instance, "settings"):
-        instance.settings.save()
-    else:
+    if not hasattr(instance, "settings"):
         UserSettings.objects.create(user=instance)
 
 
+class ShopHoliday(models.Model):
+    """A day the shop is shut outside its weekly closed days: Eid, a hartal.
+
+    Read through core.business_days, which takes these days out of every
+    open-day count the way it does the weekly ones.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="shop_holidays")
+    date = models.DateField()
+    name = models.CharField(max_length=100, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["date"]
+        unique_together = ["user", "date"]
+
+    def __str__(self):
+        return f"{self.user.username} — {self.date}"
+
+
+@receiver(post_save, sender=ShopHoliday)
+@receiver(post_delete, sender=ShopHoliday)
+def forget_business_calendar(sender, instance, **kwargs):
+    from core.business_days import forget
+
+    forget(instance.user_id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=UserSettings)
+@receiver(post_delete, sender=UserSettings)
+def forget_shop_snapshot(sender, instance, **kwargs):
+    from core.shop import bump
+
+    bump(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def forget_shop_owner_name(sender, instance, update_fields=None, **kwargs):
+    # The snapshot carries the owner's name for SMS signatures; a save that
+    # only touches the password or last_login leaves it alone.
+    if update_fields and not {"first_name", "last_name"} & set(update_fields):
+        return
+    from core.shop import bump
+
+    bump(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender="orders.Order")
+@receiver(post_delete, sender="orders.Order")
+@receiver(post_save, sender="products.Product")
+@receiver(post_delete, sender="products.Product")
+@receiver(post_save, sender="customers.Customer")
+@receiver(post_delete, sender="customers.Customer")
+@receiver(post_save, sender="employees.Employee")
+@receiver(post_delete, sender="employees.Employee")
+@receiver(post_save, sender="banking.BankAccount")
+@receiver(post_delete, sender="banking.BankAccount")
+def outdate_platform_snapshot(sender, **kwargs):
+    from core.admin_dashboard import mark_stale
+
+    mark_stale()
+
+
+class PlatformSnapshot(models.Model):
+    """The admin dashboard's platform-wide figures for one day.
+
+    Written by core.admin_dashboard.take_snapshot, which replaces the day's
+    row each time it runs, so the newest row is what the dashboard shows and
+    the rows before it are one closing figure per day for its trend lines.
+    """
+
+    day = models.DateField(unique=True)
+    taken_at = models.DateTimeField(default=timezone.now)
+    figures = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"{self.day} ({self.taken_at:%H:%M})"
+
+
 class Gift(models.Model):
     name = models.CharField(max_length=100)
     is_active = models.BooleanField(default=True)
@@ -346,3 +442,37 @@ class PasswordResetCode(models.Model):
             and not self.is_expired
             and self.attempts < self.MAX_ATTEMPTS
         )
+
+
+class IdempotencyKey(models.Model):
+    """One `Idempotency-Key` a client sent, and the answer it got.
+
+    Written before the view runs (response empty) so a second copy of the
+    request arriving mid-flight can be told to wait, and filled in afterwards
+    so a retry is answered from here without running the view again. See
+    core.idempotency.
+    """
+
+    LIFETIME_HOURS = 24
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(
+        max_length=64, help_text="SHA-256 of method, path and body"
+    )
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ["user", "key"]
+        indexes = [models.Index(fields=["created_at"])]
+
+    def __str__(self):
+        return f"{self.user.username} — {self.key}"
+
+    @property
+    def is_expired(self):
+        return timezone.now() >= self.created_at + timedelta(hours=self.LIFETIME_HOURS)
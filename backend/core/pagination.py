@@ -1,7 +1,153 @@
+import datetime
+import json
+from decimal import Decimal
+
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_SALT = "core.pagination.cursor"
+
+
+def after(fields, values, descending):
+    """Rows strictly after `values` in the (fields...) order — the keyset."""
+    lookup = "lt" if descending else "gt"
+    condition = Q()
+    for index, name in enumerate(fields):
+        step = Q(**{f"{name}__{lookup}": values[index]})
+        for prior, value in zip(fields[:index], values[:index]):
+            step &= Q(**{prior: value})
+        condition |= step
+    return condition
+
+
+def plain(value):
+    """A cursor position as JSON can carry it; the field parses it back."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(state):
+    """`state` (anything JSON can carry) as a signed, URL-safe token."""
+    return signing.dumps(state, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    """What `encode_cursor` put in `token`. ValueError for anything else."""
+    try:
+        return signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise ValueError(token)
+
+
+def approximate_count(queryset):
+    """The planner's estimate of how many rows `queryset` has, or None.
+
+    PostgreSQL only: EXPLAIN reads table statistics and does not touch the
+    rows, so it costs the same for ten orders as for ten million. Other
+    databases give None rather than a COUNT(*) in disguise.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPaginationMixin:
+    """An opt-in cursor mode for long, newest-first lists.
+
+    Page numbers cost a COUNT(*) on every page and an OFFSET that reads and
+    throws away every row before the page, so page 500 of the orders was
+    500 times the work of page 1. An endpoint that sets `cursor_keys` (on
+    the view, or on its paginator) also answers
+
+        ?cursor=            the first page
+        ?cursor=<next>      the page after it
+
+    walking the rows newest first by those keys, e.g. ("created_at", "id"):
+    WHERE (created_at, id) < (the last row's) ORDER BY created_at DESC,
+    id DESC LIMIT n, which an index on the keys serves at any depth. The
+    cursor is signed, so it only ever carries values this server wrote;
+    ?ordering= does not apply in this mode. There is no total unless the
+    client asks for `?count=approx`, which is the planner's estimate (see
+    approximate_count). Without ?cursor the endpoint pages by number, as
+    before.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_keys = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        keys = getattr(view, "cursor_keys", None) or self.cursor_keys
+        if not keys or self.cursor_query_param not in request.query_params:
+            self.keyset = None
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = keys
+        self.request = request
+        token = request.query_params.get(self.cursor_query_param)
+        queryset = queryset.order_by(*(f"-{key}" for key in keys))
+        if token:
+            try:
+                position = decode_cursor(token)
+            except ValueError:
+                raise NotFound("Invalid cursor.")
+            if not isinstance(position, list) or len(position) != len(keys):
+                raise NotFound("Invalid cursor.")
+            rows = queryset.filter(after(list(keys), position, descending=True))
+        else:
+            rows = queryset
+
+        self.approximate = None
+        if request.query_params.get("count") == "approx":
+            self.approximate = approximate_count(queryset)
+
+        size = self.get_page_size(request) or 10
+        page = list(rows[: size + 1])
+        self.next_position = None
+        if len(page) > size:
+            page = page[:size]
+            self.next_position = [plain(getattr(page[-1], key)) for key in keys]
+        return page
+
+    def get_next_link(self):
+        if self.keyset is None:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            encode_cursor(self.next_position),
+        )
+
+    def get_paginated_response(self, data):
+        if self.keyset is None:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "count": self.approximate,
+                "next": self.get_next_link(),
+                "previous": None,
+                "results": data,
+            }
+        )
 
 
-class StandardPagination(PageNumberPagination):
+class StandardPagination(KeysetPaginationMixin, PageNumberPagination):
     """Default paginator for every list endpoint.
 
     Plain PageNumberPagination ignores `?page_size=`, so the "কয়টা দেখাবেন"
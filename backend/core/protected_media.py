@@ -0,0 +1,188 @@
+"""Shop papers: checked by Django, sent by nginx.
+
+Purchase and payment proofs, employee and vehicle papers, loan and rent
+receipts and the important-documents folder all sat under MEDIA_ROOT, and
+nginx served /media/ to anyone who had the URL. The API decided who could
+see a row, but the paper behind it was a guessable public link. Streaming
+the bytes through a view would fix that at the price of a gunicorn worker
+held for every PDF download, which on a phone connection is many seconds.
+
+So the work is split:
+
+  * Serializers that can already see a row (owner-scoped, permission
+    checked) hand out `protected_url(file)`: /api/files/<token>/, where the
+    token is the file's storage name signed with SECRET_KEY and a time. A
+    link works for PROTECTED_MEDIA_LINK_SECONDS and cannot be edited into
+    another file. It
+    needs no Authorization header, so the "দেখুন" link can still be opened
+    in a new tab.
+  * `download` checks the signature and answers with `serve_file`. With
+    PROTECTED_MEDIA_ACCEL_PREFIX set, that is an empty response carrying
+    `X-Accel-Redirect`, and nginx sends the file from its `internal`
+    location, with Range, If-Modified-Since and sendfile, without holding a
+    Python worker. Without it (development, tests), Django sends the file
+    itself and handles single Range requests and If-None-Match /
+    If-Modified-Since, so a PDF viewer can still seek.
+
+nginx_oxm.conf refuses those folders under the public /media/ location;
+photos, logos and their derivatives stay public there.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+SALT = "core.protected_media"
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def link_max_age():
+    return getattr(settings, "PROTECTED_MEDIA_LINK_SECONDS", 12 * 60 * 60)
+
+
+def protected_url(field_file, request=None):
+    """A signed download link for `field_file`, absolute when given `request`."""
+    if not field_file:
+        return None
+    token = signing.dumps(field_file.name, salt=SALT, compress=True)
+    url = f"/api/files/{token}/"
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class ProtectedFilesMixin:
+    """Mixin for ModelSerializers whose file fields hold shop papers.
+
+    The fields named in `protected_files` keep their upload handling and
+    validators, and read back as signed links instead of /media/ URLs.
+    """
+
+    protected_files: tuple = ()
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get("request")
+        for name in self.protected_files:
+            if name in data:
+                data[name] = protected_url(getattr(instance, name), request)
+        return data
+
+
+def _etag(stat):
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def _byte_range(request, size, etag, mtime):
+    """(start, end) of a satisfiable single Range, None for the whole file.
+
+    Raises ValueError for a range that lies outside the file.
+    """
+    header = request.META.get("HTTP_RANGE", "")
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != int(mtime):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(0, size - int(last)), size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _read(handle, start, length):
+    with handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, name, filename=None, as_attachment=False, storage=default_storage):
+    """Response that delivers the stored file `name`. Check access first."""
+    filename = filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    disposition = content_disposition_header(as_attachment, filename)
+
+    prefix = getattr(settings, "PROTECTED_MEDIA_ACCEL_PREFIX", "")
+    if prefix:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(name)
+        response["Content-Disposition"] = disposition
+        response["Cache-Control"] = "private, max-age=3600"
+        return response
+
+    try:
+        path = storage.path(name)
+        stat = os.stat(path)
+    except (FileNotFoundError, NotImplementedError):
+        raise Http404
+    etag = _etag(stat)
+
+    unchanged = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if unchanged is not None:
+        return unchanged
+
+    try:
+        span = _byte_range(request, stat.st_size, etag, stat.st_mtime)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+        return response
+
+    if span is None:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    else:
+        start, end = span
+        response = StreamingHttpResponse(
+            _read(open(path, "rb"), start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = str(end - start + 1)
+    response["Content-Disposition"] = disposition
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = "private, max-age=3600"
+    return response
+
+
+@require_safe
+def download(request, token):
+    """GET /api/files/<token>/ — the target of `protected_url`."""
+    try:
+        name = signing.loads(token, salt=SALT, max_age=link_max_age())
+    except signing.BadSignature:
+        # SignatureExpired is a BadSignature too.
+        raise Http404
+    if not default_storage.exists(name):
+        raise Http404
+    return serve_file(request, name, as_attachment=request.GET.get("download") == "1")
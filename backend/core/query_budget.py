@@ -0,0 +1,110 @@
+"""Query budgets for the list endpoints that N+1s creep into.
+
+A budget is the most queries one page of an endpoint may run, written as
+a fixed part plus a part per row, for a shop seeded by `seed_shop`. A
+"row" there is one of each thing the budgeted endpoints list: two
+products (one with a variant), a customer, an order, a bank account and a
+loan.
+
+`QueryBudgetMixin.assertQueryBudget` seeds two rows, counts the queries a
+page takes, seeds two more and counts again. Both counts must fit the
+budget. A new per-row query therefore fails as soon as the shop grows,
+and a new fixed query fails straight away.
+
+Every per-row figure is 0: a page costs the same however many rows it
+shows. Keep it that way. When a change really needs another fixed query,
+raise the number in the same commit, so the reviewer sees it.
+
+The counts come from core.timing.QueryCounter, the same counter the
+request middleware uses for the Server-Timing header.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+
+from .timing import QueryCounter
+
+# name -> (url, fixed queries, queries per seeded row)
+BUDGETS = {
+    "product-list": ("/api/products/", 5, 0),
+    "customer-list": ("/api/customers/", 4, 0),
+    "order-list": ("/api/orders/", 7, 0),
+    "loan-list": ("/api/banking/loans/", 4, 0),
+    "bank-account-list": ("/api/banking/accounts/", 4, 0),
+}
+
+
+def seed_shop(owner, count, offset=0):
+    """`count` more of everything the budgeted endpoints list."""
+    from banking.models import BankAccount, Loan, LoanPayment, Transaction
+    from customers.models import Customer
+    from orders.models import Order, OrderItem, OrderPayment
+    from products.models import Product, ProductVariant
+
+    for i in range(offset, offset + count):
+        product = Product.objects.create(
+            name=f"Product {i}", buy_price=10, sell_price=15, stock=100, user=owner
+        )
+        shirt = Product.objects.create(
+            name=f"Shirt {i}", has_variants=True, user=owner
+        )
+        variant = ProductVariant.objects.create(
+            product=shirt, color="Red", size="M", buy_price=100, sell_price=150, stock=20
+        )
+
+        customer = Customer.objects.create(
+            name=f"Customer {i}", phone=f"0170000{i:04d}", user=owner
+        )
+        order = Order.objects.create(customer=customer, user=owner)
+        OrderItem.objects.create(
+            order=order, product=product, quantity=1, unit_price=15, buy_price=10
+        )
+        OrderItem.objects.create(
+            order=order, product=shirt, variant=variant, quantity=1,
+            unit_price=150, buy_price=100,
+        )
+        OrderPayment.objects.create(order=order, method="cash", amount=50, user=owner)
+
+        account = BankAccount.objects.create(
+            name=f"Account {i}", owner=owner, balance=Decimal("0")
+        )
+        Transaction.objects.create(
+            account=account, type="credit", amount=Decimal("500"), purpose="Opening"
+        )
+        loan = Loan.objects.create(
+            user=owner,
+            account=account,
+            lender=f"Lender {i}",
+            principal=1000,
+            total_payable=1200,
+            installment_amount=100,
+            installment_count=12,
+            start_date=date(2024, 1, 1),
+        )
+        LoanPayment.objects.create(loan=loan, amount=100)
+
+
+class QueryBudgetMixin:
+    """For APITestCase subclasses with `self.user` authenticated."""
+
+    def count_queries(self, url):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 400, f"{url} answered {response.status_code}")
+        return counter.count
+
+    def assertQueryBudget(self, name, size=2):
+        url, fixed, per_row = BUDGETS[name]
+        for rows in (size, size * 2):
+            seed_shop(self.user, size, offset=rows - size)
+            used = self.count_queries(url)
+            allowed = fixed + per_row * rows
+            self.assertLessEqual(
+                used,
+                allowed,
+                f"{name}: {used} queries with {rows} rows, budget is {allowed} "
+                f"({fixed} + {per_row} per row)",
+            )
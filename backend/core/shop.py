@@ -0,0 +1,180 @@
+"""One cached read of who the shop is: its name, address, currency, calendar.
+
+The profile and settings rows are tiny and almost never change, but they
+were read on nearly every request that shows the shop to anyone: each SMS
+looked up the company name for its signature, the expense report loaded the
+profile again, the business calendar loaded the settings, and login,
+profile and settings each ran get_or_create on both.
+
+`snapshot_for(owner)` builds a frozen ShopSnapshot from the two rows once
+and keeps it in the cache under the owner's current version number. Saving
+the profile, the settings or the user behind them bumps that number (see
+core.models), so the next read builds a new snapshot and the old one simply
+expires; nothing has to find and delete it. The numbers live in the
+"shared" cache (settings.CACHES, a database table), so a bump made by any
+worker, a management command or a shell reaches every process.
+
+Reading that table on every ask would cost a query each time, so a process
+holds each number it read for VERSION_SECONDS, and keeps the last snapshots
+it built under the same numbers. A repeat ask costs no query and no
+unpickling. The process that bumps sees its own bump at once; the others
+see it within VERSION_SECONDS.
+
+Editing still goes through the models; this is only for reading.
+"""
+
+import time
+from dataclasses import dataclass
+
+from django.core.cache import caches
+
+CACHE_SECONDS = 24 * 60 * 60
+
+#: How long a process trusts a version number it read from the shared cache.
+VERSION_SECONDS = 10
+
+cache = caches["shared"]
+
+#: How many owners' snapshots one process keeps unpickled.
+LOCAL_SIZE = 256
+
+_local = {}
+
+_versions = {}
+
+
+@dataclass(frozen=True)
+class ShopSnapshot:
+    owner_id: int
+    owner_name: str
+    company: str
+    company_address: str
+    phone: str
+    contact_number: str
+    address: str
+    city: str
+    post_code: str
+    store_logo_url: str
+    banner_image_url: str
+    profile_created_at: object
+    profile_updated_at: object
+    language: str
+    currency: str
+    currency_symbol: str
+    email_notifications: bool
+    marketing_notifications: bool
+    closed_days: tuple
+    settings_created_at: object
+    settings_updated_at: object
+
+    @property
+    def store_name(self):
+        """What the shop signs with: its name, else the owner's, else None."""
+        return self.company.strip() or self.owner_name.strip() or None
+
+
+def _version_key(owner_id, scope):
+    return f"{scope}:version:{owner_id}"
+
+
+def _snapshot_key(owner_id, version):
+    return f"shop:snapshot:{owner_id}:{version}"
+
+
+def _first_version():
+    # A number no earlier version of this owner can have had: if the cache
+    # loses the version key (culled, cleared), counting again from 1 would
+    # find snapshots cached under the old 1, 2, 3 that have not expired.
+    return time.time_ns() // 1000
+
+
+def version(owner_id, scope="shop"):
+    """The owner's current version number for `scope`.
+
+    Anything cached under a key that includes it is current until bump().
+    core.bootstrap keeps a second scope, "billing", for the subscription and
+    SMS balance, which change far more often than the shop itself.
+    """
+    key = _version_key(owner_id, scope)
+    held = _versions.get(key)
+    if held is not None and held[0] > time.monotonic():
+        return held[1]
+
+    number = cache.get(key)
+    if number is None:
+        number = _first_version()
+        # add(), so two processes starting cold agree on the first number.
+        if not cache.add(key, number, None):
+            number = cache.get(key, number)
+    _hold(key, number)
+    return number
+
+
+def bump(owner_id, scope="shop"):
+    """Retire what is cached for the owner under `scope`; called on save."""
+    key = _version_key(owner_id, scope)
+    try:
+        number = cache.incr(key)
+    except ValueError:
+        # Nothing cached yet, or the cache was cleared.
+        number = _first_version()
+        cache.set(key, number, None)
+    _hold(key, number)
+
+
+def _hold(key, number):
+    if len(_versions) >= LOCAL_SIZE * 2:
+        _versions.clear()
+    _versions[key] = (time.monotonic() + VERSION_SECONDS, number)
+
+
+def _build(owner):
+    from core.business_days import clean
+    from core.models import UserProfile, UserSettings
+
+    profile, _ = UserProfile.objects.get_or_create(user=owner)
+    settings, _ = UserSettings.objects.get_or_create(user=owner)
+    return ShopSnapshot(
+        owner_id=owner.pk,
+        owner_name=owner.get_full_name() or "",
+        company=profile.company or "",
+        company_address=profile.company_address or "",
+        phone=profile.phone or "",
+        contact_number=profile.contact_number or "",
+        address=profile.address or "",
+        city=profile.city or "",
+        post_code=profile.post_code or "",
+        store_logo_url=profile.store_logo.url if profile.store_logo else "",
+        banner_image_url=profile.banner_image.url if profile.banner_image else "",
+        profile_created_at=profile.created_at,
+        profile_updated_at=profile.updated_at,
+        language=settings.language,
+        currency=settings.currency,
+        currency_symbol=settings.currency_symbol,
+        email_notifications=settings.email_notifications,
+        marketing_notifications=settings.marketing_notifications,
+        closed_days=tuple(clean(settings.closed_days)),
+        settings_created_at=settings.created_at,
+        settings_updated_at=settings.updated_at,
+    )
+
+
+def snapshot_for(owner):
+    """The owner's ShopSnapshot, built from the database at most once per version.
+
+    `owner` is the shop's user (owner_for(request)), not a staff login.
+    Creates the profile and settings rows if the account somehow has none.
+    """
+    key = (owner.pk, version(owner.pk))
+    snapshot = _local.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = cache.get(_snapshot_key(*key))
+    if snapshot is None:
+        snapshot = _build(owner)
+        cache.set(_snapshot_key(*key), snapshot, CACHE_SECONDS)
+    if len(_local) >= LOCAL_SIZE:
+        _local.clear()
+    _local[key] = snapshot
+    return snapshot
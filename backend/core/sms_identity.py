@@ -13,20 +13,19 @@ The signature is counted before the credit check, so the shop is charged for
 what actually gets sent.
 """
 
-from core.models import UserProfile
+from core.shop import snapshot_for
 
 
 def store_name_for(user):
-    """What the shop calls itself, or None when nothing is set."""
+    """What the shop calls itself, or None when nothing is set.
+
+    Falls back to the person's own name — still better than an anonymous
+    text — and only gives up when even that is blank. Read from the cached
+    shop snapshot, so a batch of reminders does not look the name up per SMS.
+    """
     if user is None or not getattr(user, "is_authenticated", False):
         return None
-    profile = UserProfile.objects.filter(user=user).only("company").first()
-    name = (profile.company or "").strip() if profile else ""
-    if not name:
-        # Fall back to the person's own name — still better than an anonymous
-        # text — and only give up when even that is blank.
-        name = (user.get_full_name() or "").strip()
-    return name or None
+    return snapshot_for(user).store_name
 
 
 def with_store_signature(message, user):
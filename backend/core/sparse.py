@@ -0,0 +1,106 @@
+"""?fields= and ?omit=: list only the columns a screen will show.
+
+A product picker needs an id, a name, a price and the stock, but the
+product list serializer computed all twenty-nine fields for every row,
+among them what was sold (an aggregate per variant), the vehicle counts
+and the photo sizes. The customer and order lists were the same.
+
+    GET /api/products/?fields=id,name,sell_price,total_stock
+    GET /api/orders/?omit=items,payments
+
+A serializer with SparseFieldsMixin drops the fields the request leaves out
+before anything is read, so a field that is not sent is not computed. The
+view hands the same request to `shape()` with a plan naming what each
+field needs from the database (joins, prefetches, annotations), and only
+what the kept fields need is added to the queryset. With neither parameter
+nothing changes.
+
+Only GET is trimmed; a create or update always answers in full. A name the
+serializer does not have is a 400, so a typo does not quietly empty a table.
+"""
+
+from django.db.models import IntegerField, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import ValidationError
+
+
+def _names(request, param):
+    raw = request.query_params.get(param, "")
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+def requested(request, names):
+    """The subset of `names` (a serializer's field names) this request keeps."""
+    if request is None or request.method != "GET":
+        return list(names)
+    only, omit = _names(request, "fields"), _names(request, "omit")
+    if not only and not omit:
+        return list(names)
+    unknown = [name for name in only + omit if name not in names]
+    if unknown:
+        raise ValidationError({"fields": f"Unknown field(s): {', '.join(unknown)}"})
+    return [name for name in names if (not only or name in only) and name not in omit]
+
+
+class SparseFieldsMixin:
+    """Drop the fields a GET's ?fields= / ?omit= leaves out.
+
+    Applies to the top-level serializer only: a nested one is built without
+    the request in its context.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method != "GET":
+            return
+        keep = set(requested(request, list(self.fields)))
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+def shape(queryset, request, serializer_class, plan):
+    """Add to `queryset` what the kept fields of `serializer_class` need.
+
+    `plan` maps a field name to a dict with any of "select" (select_related
+    paths), "prefetch" (prefetch_related lookups) and "annotate" (name ->
+    expression). Fields without an entry need nothing beyond the row.
+    """
+    select, prefetch, annotate = [], [], {}
+    for name in requested(request, serializer_class.Meta.fields):
+        needs = plan.get(name, {})
+        select += [path for path in needs.get("select", ()) if path not in select]
+        prefetch += [
+            lookup for lookup in needs.get("prefetch", ()) if lookup not in prefetch
+        ]
+        annotate.update(needs.get("annotate", {}))
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if annotate:
+        queryset = queryset.annotate(**annotate)
+    return queryset
+
+
+def per_row(queryset, aggregate, output_field=None):
+    """`aggregate` over `queryset` for each outer row, 0 where there is none.
+
+    `queryset` is already filtered to the outer row with OuterRef(...); the
+    constant grouping only turns it into a single-value subquery.
+    """
+    output_field = output_field or IntegerField()
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .annotate(_row=Value(1))
+            .values("_row")
+            .annotate(value=aggregate)
+            .values("value")[:1],
+            output_field=output_field,
+        ),
+        Value(0),
+        output_field=output_field,
+    )
+
@@ -1,3 +1,309 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from . import admin_dashboard, business_days, shop
+from .models import PlatformSnapshot, ShopHoliday
+from .protected_media import protected_url
+from .query_budget import QueryBudgetMixin
+
+
+class EndpointQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_product_list(self):
+        self.assertQueryBudget("product-list")
+
+    def test_customer_list(self):
+        self.assertQueryBudget("customer-list")
+
+    def test_order_list(self):
+        self.assertQueryBudget("order-list")
+
+    def test_loan_list(self):
+        self.assertQueryBudget("loan-list")
+
+    def test_bank_account_list(self):
+        self.assertQueryBudget("bank-account-list")
+
+    def test_server_timing_header(self):
+        response = self.client.get("/api/products/")
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn('total;dur=', response["Server-Timing"])
+
+
+class GenerateShopCommandTest(TestCase):
+    def test_generate_and_undo(self):
+        from orders.models import Order
+        from products.models import Product, ProductTombstone
+
+        call_command(
+            'generate_shop', '--username', 'bigshop', '--scale', '0.0001',
+            stdout=StringIO(),
+        )
+        owner = User.objects.get(username='bigshop')
+        self.assertEqual(Product.objects.filter(user=owner).count(), 5)
+        order = Order.objects.filter(user=owner).first()
+        self.assertGreater(order.items.count(), 0)
+        self.assertEqual(order.due_amount, order.total_amount - order.paid_amount)
+
+        call_command('generate_shop', '--username', 'bigshop', '--undo', stdout=StringIO())
+        self.assertFalse(User.objects.filter(username='bigshop').exists())
+        self.assertFalse(ProductTombstone.objects.exists())
+
+
+class ProtectedMediaTest(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media, PROTECTED_MEDIA_ACCEL_PREFIX='')
+        override.enable()
+        self.addCleanup(override.disable)
+        name = default_storage.save('purchase_proofs/bill.pdf', ContentFile(b'0123456789'))
+        self.url = protected_url(File(None, name))
+
+    def test_signed_link_serves_ranges_and_revalidates(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        partial = self.client.get(self.url, HTTP_RANGE='bytes=2-4')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(b''.join(partial.streaming_content), b'234')
+
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=20-').status_code, 416)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+
+    def test_tampered_link_is_refused(self):
+        self.assertEqual(self.client.get(self.url[:-3] + 'xx/').status_code, 404)
+
+    def test_nginx_sends_the_file_when_configured(self):
+        with override_settings(PROTECTED_MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/purchase_proofs/bill.pdf')
+        self.assertEqual(response.content, b'')
+
+
+class BusinessCalendarTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_counts_match_a_day_walk_and_follow_holiday_changes(self):
+        self.user.settings.closed_days = [4]
+        self.user.settings.save()
+        response = self.client.post(
+            '/api/auth/settings/holidays/',
+            {'start': '2026-03-19', 'end': '2026-03-22', 'name': 'Eid'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['holidays']), 4)
+
+        calendar = business_days.closed_weekdays(self.user)
+        # 20 March 2026 is a Friday, already closed every week.
+        self.assertEqual(calendar.holidays, (date(2026, 3, 19), date(2026, 3, 21), date(2026, 3, 22)))
+        start = date(2026, 2, 25)
+        for offset in range(0, 40, 3):
+            for length in (0, 1, 6, 7, 8, 29, 45):
+                first = start + timedelta(days=offset)
+                last = first + timedelta(days=length)
+                walked = sum(
+                    1 for n in range(length + 1)
+                    if business_days.is_open(first + timedelta(days=n), calendar)
+                )
+                self.assertEqual(
+                    business_days.open_days_between(first, last, calendar), max(1, walked)
+                )
+        self.assertEqual(
+            business_days.next_open_day(date(2026, 3, 19), calendar), date(2026, 3, 23)
+        )
+
+        with self.assertNumQueries(0):
+            self.assertIs(business_days.closed_weekdays(self.user), calendar)
+
+        eid = ShopHoliday.objects.get(date='2026-03-22')
+        self.client.delete(f'/api/auth/settings/holidays/{eid.id}/')
+        self.assertEqual(len(business_days.closed_weekdays(self.user).holidays), 2)
+
+
+class ShopSnapshotTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            first_name='Rahim'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_read_once_and_rebuilt_after_a_save(self):
+        first = shop.snapshot_for(self.user)
+        self.assertEqual(first.store_name, 'Rahim')
+        with self.assertNumQueries(0):
+            self.assertIs(shop.snapshot_for(self.user), first)
+        with self.assertRaises(AttributeError):
+            first.company = 'Other'
+
+        profile = self.user.profile
+        profile.company = 'Rahim Store'
+        profile.save()
+        self.assertEqual(shop.snapshot_for(self.user).store_name, 'Rahim Store')
+
+        self.user.settings.closed_days = [4]
+        self.user.settings.save()
+        response = self.client.get('/api/auth/settings/')
+        self.assertEqual(response.data['settings']['closed_days'], [4])
+
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['profile']['company'], 'Rahim Store')
+
+    def test_a_bump_in_another_process_is_seen_within_version_seconds(self):
+        first = shop.snapshot_for(self.user)
+        # Another worker: its own connection to the shared cache, its own memo.
+        other = caches.create_connection('shared')
+        with mock.patch.object(shop, 'cache', other), mock.patch.object(shop, '_versions', {}):
+            shop.bump(self.user.pk)
+
+        self.assertIs(shop.snapshot_for(self.user), first)
+        later = time.monotonic() + shop.VERSION_SECONDS + 1
+        with mock.patch('core.shop.time.monotonic', return_value=later):
+            self.assertIsNot(shop.snapshot_for(self.user), first)
+
+
+class LoginBootstrapTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def test_login_writes_only_the_token_and_last_login(self):
+        profile_stamp = self.user.profile.updated_at
+        credentials = {'username': 'TestUser', 'password': 'testpass123'}
+        response = self.client.post('/api/auth/login/', credentials, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['store_owner'], 'testuser')
+        self.assertIn('subscription', response.data)
+
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.updated_at, profile_stamp)
+
+        # Warm: both authenticate lookups and the case-insensitive match, the
+        # staff row, the token and the last_login UPDATE, then the payload
+        # from the shared cache. Nothing from the shop.
+        with self.assertNumQueries(7):
+            self.client.post('/api/auth/login/', credentials, format='json')
+
+        token = response.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.user.settings.currency = 'BDT'
+        self.user.settings.save()
+        again = self.client.get('/api/auth/bootstrap/')
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data['token'], token)
+        self.assertEqual(again.data['settings']['currency_symbol'], '৳')
+
+
+class PlatformSnapshotTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', password='testpass123', is_staff=True, is_superuser=True
+        )
+        self.client.force_login(self.admin)
+
+    def test_admin_index_reads_the_snapshot_until_it_goes_stale(self):
+        response = self.client.get('/admin/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'আগের হিসাব')
+        snapshot = PlatformSnapshot.objects.get()
+        self.assertEqual(snapshot.figures['users'], 1)
+
+        # Fresh: one read of the stored rows, no platform-wide scans.
+        with self.assertNumQueries(1):
+            admin_dashboard.build_dashboard(None)
+
+        User.objects.create_user(username='shop', password='testpass123')
+        admin_dashboard.build_dashboard(None)
+        self.assertEqual(PlatformSnapshot.objects.get().figures['users'], 1)
+
+        PlatformSnapshot.objects.update(taken_at=snapshot.taken_at - timedelta(hours=1))
+        context = admin_dashboard.build_dashboard(None)
+        self.assertEqual(PlatformSnapshot.objects.get().figures['users'], 2)
+        self.assertEqual(context['oxm_kpis'][-1]['value'], 2)
+
+    def test_a_save_in_one_process_marks_the_snapshot_stale_for_another(self):
+        snapshot = admin_dashboard.take_snapshot()
+        PlatformSnapshot.objects.update(taken_at=snapshot.taken_at - timedelta(hours=1))
+        snapshot.refresh_from_db()
+        self.assertFalse(admin_dashboard._needs_retake(snapshot))
+
+        # Another worker's connection to the same cache.
+        other = caches.create_connection('shared')
+        with mock.patch.object(admin_dashboard, 'cache', other):
+            User.objects.create_user(username='shop', password='testpass123')
+        self.assertTrue(admin_dashboard._needs_retake(snapshot))
+
+        with mock.patch.object(admin_dashboard, 'cache', other):
+            admin_dashboard.take_snapshot()
+        self.assertFalse(admin_dashboard._needs_retake(snapshot))
+
+    def test_command_keeps_one_row_per_day(self):
+        PlatformSnapshot.objects.create(day=timezone.localdate() - timedelta(days=400))
+        PlatformSnapshot.objects.create(day=timezone.localdate() - timedelta(days=1), figures={'users': 0})
+        call_command('refresh_platform_kpis', stdout=StringIO())
+        call_command('refresh_platform_kpis', stdout=StringIO())
+        self.assertEqual(PlatformSnapshot.objects.count(), 2)
+        context = admin_dashboard.build_dashboard(None)
+        self.assertTrue(context['oxm_kpis'][-1]['trend'])
+
+
+class IdempotentSmsTest(APITestCase):
+    def setUp(self):
+        from subscription.models import UserSMSCredit
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        UserSMSCredit.objects.create(user=self.user, credits=10)
+
+    def test_a_send_that_blew_up_is_not_sent_again(self):
+        body = {'phone': '01700000000', 'message': 'Hello'}
+        with mock.patch('core.views.send_sms_via_gateway', side_effect=RuntimeError) as send:
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/send-sms/', body, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+            response = self.client.post(
+                '/api/send-sms/', body, format='json', HTTP_IDEMPOTENCY_KEY='k1'
+            )
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
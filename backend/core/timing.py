@@ -0,0 +1,121 @@
+"""How many queries a request ran, and where its time went.
+
+Endpoints here tend to slide into N+1 queries without anyone noticing: a
+serializer field that reads a related row, a property that aggregates, and
+the product list that took 8 queries last month takes 208 once the shop has
+200 products. Nothing in a response showed it.
+
+RequestTimingMiddleware counts every query the request runs through Django
+(with `connection.execute_wrapper`, so it works with DEBUG off) and splits
+the wall time into:
+
+  db      time spent inside those queries
+  render  turning the DRF response into JSON, measured from the moment the
+          view hands back its response to the moment rendering finishes
+  app     everything else: middleware, authentication, the view's own Python
+
+They go out as a `Server-Timing` header, which the browser's network panel
+shows next to the request, and as one structured log line per API request
+on the "oxm.timing" logger. Requests slower than REQUEST_TIMING_SLOW_MS, or
+running more than REQUEST_TIMING_QUERY_WARN queries, are logged at WARNING
+and everything else at DEBUG, so production logs only carry the outliers.
+
+core.query_budget turns the same counts into test failures.
+"""
+
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("oxm.timing")
+
+
+class QueryCounter:
+    """`execute_wrapper` callback that tallies queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "REQUEST_TIMING_SLOW_MS", 500)
+        self.query_warn = getattr(settings, "REQUEST_TIMING_QUERY_WARN", 50)
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request._timing_render = [None, None]
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        render = 0.0
+        render_started, render_done = request._timing_render
+        if render_started is not None and render_done is not None:
+            render = render_done - render_started
+        app = max(0.0, total - counter.seconds - render)
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={counter.seconds * 1000:.1f};desc="{counter.count} queries"',
+                f"render;dur={render * 1000:.1f}",
+                f"app;dur={app * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+        if request.path.startswith("/api/"):
+            self._log(request, response, counter, render, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and before the response is rendered;
+        # a DRF Response is a template response, so this brackets rendering.
+        marks = request._timing_render
+        marks[0] = time.perf_counter()
+
+        def rendered(response):
+            marks[1] = time.perf_counter()
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def _log(self, request, response, counter, render, total):
+        total_ms = total * 1000
+        slow = total_ms >= self.slow_ms or counter.count >= self.query_warn
+        level = logging.WARNING if slow else logging.DEBUG
+        if not logger.isEnabledFor(level):
+            return
+        match = getattr(request, "resolver_match", None)
+        logger.log(
+            level,
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "view": match.view_name if match else None,
+                    "status": response.status_code,
+                    "queries": counter.count,
+                    "db_ms": round(counter.seconds * 1000, 1),
+                    "render_ms": round(render * 1000, 1),
+                    "total_ms": round(total_ms, 1),
+                }
+            ),
+        )
@@ -8,11 +8,38 @@ The dangerous case is not really `.php` (the media path is usually served as
 static files). It is `.html` and `.svg`: those are served from the app's own
 origin, and the "দেখুন" links open them in a tab, so an uploaded document can
 run JavaScript with the viewer's session — stored XSS through a file upload.
+
+`FileMetadata` is the other half: what was uploaded, recorded once. List
+screens showed each paper's size through `file.size`, a disk stat per row
+(and a network round trip on remote storage), wrapped in try/except for the
+files that had gone missing. Models that hold a shop paper now inherit
+FileMetadata, and its save() reads a new upload once, while it is still in
+memory or in the temporary upload file, for:
+
+  file_size     bytes
+  file_mime     from the extension, or from Pillow when it is an image
+  file_sha256   of the content
+  file_width,   for images Pillow can read; empty otherwise
+  file_height
+
+A list then reads columns and never touches the disk. The hash also stops
+the same receipt photographed once and uploaded twice from being stored
+twice: when a row of the same model and the same shop already holds
+identical content, the new row points at that file instead of writing a
+copy. Deleting goes through `release_file`, which leaves a file alone while
+another row still points at it.
+
+Rows from before the columns existed are filled by
+`python manage.py backfill_upload_metadata`.
 """
 
+import hashlib
+import mimetypes
 import os
 
 from django.core.exceptions import ValidationError
+from django.db import models
+from PIL import Image, UnidentifiedImageError
 
 # Extensions the shop actually needs for receipts, papers and photos.
 DOCUMENT_EXTENSIONS = {
@@ -77,3 +104,144 @@ def document_error(value):
     except ValidationError as exc:
         return exc.messages[0]
     return None
+
+
+def describe(field_file):
+    """Size, MIME type, SHA-256 and image dimensions of a stored or new file."""
+    name = field_file.name or ""
+    digest = hashlib.sha256()
+    size = 0
+    width = height = None
+    mime = mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+    field_file.open("rb")
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+        if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+            field_file.seek(0)
+            try:
+                with Image.open(field_file) as image:
+                    width, height = image.size
+                    mime = Image.MIME.get(image.format, mime)
+            except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+                pass
+        field_file.seek(0)
+    finally:
+        # A new upload is saved to storage after this; only close what we
+        # opened from storage ourselves.
+        if field_file._committed:
+            field_file.close()
+
+    return {
+        "file_size": size,
+        "file_mime": mime,
+        "file_sha256": digest.hexdigest(),
+        "file_width": width,
+        "file_height": height,
+    }
+
+
+class FileMetadata(models.Model):
+    """Abstract base for a model holding one uploaded paper.
+
+    `metadata_source` names its FileField; `metadata_owner` is the lookup
+    path to the owning shop's user, which bounds deduplication.
+    """
+
+    metadata_source = "file"
+    metadata_owner = "user"
+
+    file_size = models.BigIntegerField(blank=True, null=True, editable=False)
+    file_mime = models.CharField(max_length=100, blank=True, default="", editable=False)
+    file_sha256 = models.CharField(
+        max_length=64, blank=True, default="", db_index=True, editable=False
+    )
+    file_width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    file_height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+
+    METADATA_FIELDS = ("file_size", "file_mime", "file_sha256", "file_width", "file_height")
+    #: Every column record_file_metadata sets, for `update_fields`.
+    metadata_columns = METADATA_FIELDS
+
+    class Meta:
+        abstract = True
+
+    def _owner_id(self):
+        obj = self
+        *path, last = self.metadata_owner.split("__")
+        for part in path:
+            obj = getattr(obj, part, None)
+            if obj is None:
+                return None
+        return getattr(obj, f"{last}_id", None)
+
+    def _identical_file(self, sha256):
+        """Name of a stored file with this content, held by this shop's rows."""
+        owner_id = self._owner_id()
+        if owner_id is None:
+            return None
+        source = self.metadata_source
+        names = (
+            type(self)
+            ._default_manager.filter(**{"file_sha256": sha256, self.metadata_owner: owner_id})
+            .exclude(pk=self.pk)
+            .exclude(**{source: ""})
+            .exclude(**{f"{source}__isnull": True})
+            .values_list(source, flat=True)
+        )
+        storage = getattr(self, source).storage
+        for name in names[:5]:
+            if storage.exists(name):
+                return name
+        return None
+
+    def record_file_metadata(self):
+        """Fill the metadata columns from the file as it is now."""
+        stored = getattr(self, self.metadata_source)
+        if not stored:
+            values = dict.fromkeys(self.METADATA_FIELDS)
+            values["file_mime"] = values["file_sha256"] = ""
+        else:
+            values = describe(stored)
+        for field, value in values.items():
+            setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        stored = getattr(self, self.metadata_source)
+        fresh = bool(stored) and not stored._committed
+        if fresh or (not stored and self.file_sha256):
+            self.record_file_metadata()
+            if fresh:
+                twin = self._identical_file(self.file_sha256)
+                if twin:
+                    # Point at the copy we already have; FileField.pre_save
+                    # only writes files that are not yet committed.
+                    stored.name = twin
+                    stored._committed = True
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and self.metadata_source in update_fields:
+                kwargs["update_fields"] = list(update_fields) + [
+                    f for f in self.metadata_columns if f not in update_fields
+                ]
+        super().save(*args, **kwargs)
+
+
+def release_file(instance, field_file=None):
+    """Delete a FileMetadata row's file from storage unless another row uses it.
+
+    Pass `field_file` when the row's field has already been cleared or
+    replaced, or the row itself deleted.
+    """
+    stored = field_file if field_file is not None else getattr(instance, instance.metadata_source)
+    if not stored:
+        return
+    shared = (
+        type(instance)
+        ._default_manager.filter(**{instance.metadata_source: stored.name})
+        .exclude(pk=instance.pk)
+        .exists()
+    )
+    if not shared:
+        stored.storage.delete(stored.name)
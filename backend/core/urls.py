@@ -2,6 +2,7 @@ from django.urls import path
 from . import password_reset
 from . import views
 from . import api_views
+from . import protected_media
 
 urlpatterns = [
     path('', views.api_root, name='api-root'),
@@ -9,6 +10,7 @@ urlpatterns = [
     path('auth/register/', views.register, name='register'),
     path('auth/login/', views.login, name='login'),
     path('auth/logout/', views.logout, name='logout'),
+    path('auth/bootstrap/', views.session_bootstrap, name='session-bootstrap'),
     path('auth/profile/', views.profile, name='profile'),
     path('auth/profile/upload-logo/',
          views.upload_store_logo, name='upload-store-logo'),
@@ -19,6 +21,9 @@ urlpatterns = [
     path('auth/profile/remove-banner/',
          views.remove_banner_image, name='remove-banner-image'),
     path('auth/settings/', views.user_settings, name='user-settings'),
+    path('auth/settings/holidays/', views.shop_holidays, name='shop-holidays'),
+    path('auth/settings/holidays/<int:holiday_id>/',
+         views.shop_holiday_detail, name='shop-holiday-detail'),
     path('auth/change-password/', views.change_password, name='change-password'),
     path('auth/request-password-reset/',
          views.request_password_reset, name='request-password-reset'),
@@ -72,4 +77,7 @@ urlpatterns = [
     
     # Public store access by domain
     path('store/<str:domain>/', views.get_store_by_domain, name='store-by-domain'),
+
+    # Signed links to shop papers (core.protected_media)
+    path('files/<str:token>/', protected_media.download, name='protected-file'),
 ]
@@ -1,17 +1,21 @@
 import json
 import logging
 import os
+from datetime import date, timedelta
 
 import requests
 from django.conf import settings
 from django.contrib.auth import authenticate
 from django.db.models import Q
 from django.utils import timezone
-from core import business_days
+from core import bootstrap, business_days
 from core.sms_gateway import send_sms as send_sms_via_gateway
 
 logger = logging.getLogger(__name__)
+from core.idempotency import idempotent
+from core.images import delete_derivatives, derive, derived_field, image_sizes
 from core.scoping import owner_for, owner_only, require_permission
+from core.shop import snapshot_for
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
@@ -34,6 +38,7 @@ from .models import (
     Gift,
     Level,
     PaymentMethod,
+    ShopHoliday,
     UserProfile,
     UserSettings,
 )
@@ -70,6 +75,16 @@ def build_absolute_url(request, relative_url):
     return f"{base_url}{relative_url}"
 
 
+def absolute_image_sizes(request, instance, field_name):
+    """core.images.image_sizes with every URL made absolute like the rest."""
+    sizes = image_sizes(
+        getattr(instance, field_name), getattr(instance, derived_field(field_name))
+    )
+    if sizes is None:
+        return None
+    return {key: build_absolute_url(request, url) for key, url in sizes.items()}
+
+
 class LoginThrottle(AnonRateThrottle):
     """Password guessing budget, per IP.
 
@@ -274,6 +289,17 @@ def _staff_login(identifier, password):
     return authenticate(username=access.account.username, password=password)
 
 
+def _login_access(user):
+    """The staff login row with its employee and owner, in one query; None for an owner."""
+    from employees.models import EmployeeAccess
+
+    return (
+        EmployeeAccess.objects.select_related("employee__user")
+        .filter(account=user)
+        .first()
+    )
+
+
 @api_view(["POST"])
 @permission_classes([AllowAny])
 @throttle_classes([LoginThrottle])
@@ -300,11 +326,15 @@ def login(request):
         # match, but ONLY when it resolves to exactly one user. This avoids any
         # ambiguity where usernames differ only by case (e.g. "Asad" vs "asad").
         if user is None:
-            matches = User.objects.filter(username__iexact=username)
-            if matches.count() == 1:
-                user = authenticate(
-                    username=matches.first().username, password=password
-                )
+            matches = list(
+                User.objects.filter(username__iexact=username).values_list(
+                    "username", flat=True
+                )[:2]
+            )
+            # The exact name was already tried; hashing the same wrong
+            # password against it twice only doubles the cost of a typo.
+            if len(matches) == 1 and matches[0] != username:
+                user = authenticate(username=matches[0], password=password)
 
         # Staff sign in with the phone or email their employer already had on
         # file — nobody hands a shop assistant a generated username. Resolved
@@ -318,15 +348,10 @@ def login(request):
                 {"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED
             )
 
-        # Get or create token
-        token, created = Token.objects.get_or_create(user=user)
-
         # A staff login reads the *shop's* branding and settings, not its own —
         # the assistant works inside their employer's store, so the logo, the
         # currency and the SMS balance all come from the owner.
-        from core.scoping import staff_access
-
-        access = staff_access(user)
+        access = _login_access(user)
         if access is not None and not access.is_enabled:
             return Response(
                 {"error": "আপনার লগইন বন্ধ করে দেওয়া হয়েছে। মালিককে বলুন।"},
@@ -334,71 +359,20 @@ def login(request):
             )
         data_owner = access.owner if access else user
 
-        profile, profile_created = UserProfile.objects.get_or_create(user=data_owner)
-        settings, settings_created = UserSettings.objects.get_or_create(user=data_owner)
+        token, created = Token.objects.get_or_create(user=user)
 
+        # The only other write a login makes. A plain UPDATE, so no User
+        # save signal runs for it.
+        now = timezone.now()
+        User.objects.filter(pk=user.pk).update(last_login=now)
+        user.last_login = now
         if access is not None:
-            access.last_login_at = timezone.now()
-            access.save(update_fields=["last_login_at"])
-
-        # Get SMS credits
-        from subscription.models import UserSMSCredit
-
-        try:
-            sms_credit = UserSMSCredit.objects.get(user=data_owner)
-            sms_credits = sms_credit.credits
-        except UserSMSCredit.DoesNotExist:
-            sms_credits = 0
+            type(access).objects.filter(pk=access.pk).update(last_login_at=now)
 
         return Response(
             {
                 "message": "Login successful",
-                "user": {
-                    "id": user.id,
-                    "username": user.username,
-                    "email": user.email,
-                    "first_name": user.first_name,
-                    "last_name": user.last_name,
-                    "date_joined": user.date_joined,
-                    "last_login": user.last_login,
-                    "is_active": user.is_active,
-                    "is_staff": user.is_staff,
-                    "is_superuser": user.is_superuser,
-                    # Everything the frontend needs to draw the right menu.
-                    "is_employee": access is not None,
-                    "employee_name": access.employee.name if access else None,
-                    "employee_id": access.employee_id if access else None,
-                    "store_owner": data_owner.username,
-                    "permissions": list(access.permissions or []) if access else None,
-                },
-                "profile": {
-                    "company": profile.company or "",
-                    "company_address": profile.company_address or "",
-                    "phone": profile.phone or "",
-                    "contact_number": profile.contact_number or "",
-                    "address": profile.address or "",
-                    "store_logo": build_absolute_url(request, profile.store_logo.url)
-                    if profile.store_logo
-                    else "",
-                    "banner_image": build_absolute_url(
-                        request, profile.banner_image.url
-                    )
-                    if profile.banner_image
-                    else "",
-                    "created_at": profile.created_at,
-                    "updated_at": profile.updated_at,
-                    "sms_credits": sms_credits,
-                },
-                "settings": {
-                    "language": settings.language,
-                    "currency": settings.currency,
-                    "currency_symbol": settings.currency_symbol,
-                    "email_notifications": settings.email_notifications,
-                    "marketing_notifications": settings.marketing_notifications,
-                    "created_at": settings.created_at,
-                    "updated_at": settings.updated_at,
-                },
-                "token": token.key,
+                **bootstrap.respond(request, user, access, data_owner, token.key),
             },
             status=status.HTTP_200_OK,
         )
@@ -407,6 +381,29 @@ def login(request):
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def session_bootstrap(request):
+    """
+    What the app needs on reload, in the same shape login returns
+    """
+    user = request.user
+    access = _login_access(user)
+    if access is not None and not access.is_enabled:
+        return Response(
+            {"error": "আপনার লগইন বন্ধ করে দেওয়া হয়েছে। মালিককে বলুন।"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    if isinstance(request.auth, Token):
+        token = request.auth
+    else:
+        token, created = Token.objects.get_or_create(user=user)
+    return Response(
+        bootstrap.respond(request, user, access, access.owner if access else user, token.key),
+        status=status.HTTP_200_OK,
+    )
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def logout(request):
@@ -433,11 +430,8 @@ def profile(request):
     user = owner_for(request)
 
     if request.method == "GET":
-        # Get profile data
-        profile, created = UserProfile.objects.get_or_create(user=user)
-
-        # Get user settings
-        settings, settings_created = UserSettings.objects.get_or_create(user=user)
+        # Profile and settings come from the cached shop snapshot.
+        shop = snapshot_for(user)
 
         # Get SMS credits
         from subscription.models import UserSMSCredit
@@ -463,33 +457,27 @@ def profile(request):
                     "is_superuser": user.is_superuser,
                 },
                 "profile": {
-                    "company": profile.company or "",
-                    "company_address": profile.company_address or "",
-                    "phone": profile.phone or "",
-                    "contact_number": profile.contact_number or "",
-                    "address": profile.address or "",
-                    "city": profile.city or "",
-                    "post_code": profile.post_code or "",
-                    "store_logo": build_absolute_url(request, profile.store_logo.url)
-                    if profile.store_logo
-                    else "",
-                    "banner_image": build_absolute_url(
-                        request, profile.banner_image.url
-                    )
-                    if profile.banner_image
-                    else "",
-                    "created_at": profile.created_at,
-                    "updated_at": profile.updated_at,
+                    "company": shop.company,
+                    "company_address": shop.company_address,
+                    "phone": shop.phone,
+                    "contact_number": shop.contact_number,
+                    "address": shop.address,
+                    "city": shop.city,
+                    "post_code": shop.post_code,
+                    "store_logo": build_absolute_url(request, shop.store_logo_url),
+                    "banner_image": build_absolute_url(request, shop.banner_image_url),
+                    "created_at": shop.profile_created_at,
+                    "updated_at": shop.profile_updated_at,
                     "sms_credits": sms_credits,
                 },
                 "settings": {
-                    "language": settings.language,
-                    "currency": settings.currency,
-                    "currency_symbol": settings.currency_symbol,
-                    "email_notifications": settings.email_notifications,
-                    "marketing_notifications": settings.marketing_notifications,
-                    "created_at": settings.created_at,
-                    "updated_at": settings.updated_at,
+                    "language": shop.language,
+                    "currency": shop.currency,
+                    "currency_symbol": shop.currency_symbol,
+                    "email_notifications": shop.email_notifications,
+                    "marketing_notifications": shop.marketing_notifications,
+                    "created_at": shop.settings_created_at,
+                    "updated_at": shop.settings_updated_at,
                 },
             },
             status=status.HTTP_200_OK,
@@ -603,6 +591,7 @@ def upload_store_logo(request):
         # Delete old logo if exists
         if profile.store_logo:
             try:
+                delete_derivatives(profile.store_logo.name)
                 old_logo_path = profile.store_logo.path
                 if os.path.exists(old_logo_path):
                     os.remove(old_logo_path)
@@ -611,11 +600,13 @@ def upload_store_logo(request):
 
         profile.store_logo = file
         profile.save()
+        derive(profile, "store_logo")
 
         return Response(
             {
                 "message": "Store logo uploaded successfully",
                 "store_logo_url": build_absolute_url(request, profile.store_logo.url),
+                "store_logo_sizes": absolute_image_sizes(request, profile, "store_logo"),
             },
             status=status.HTTP_200_OK,
         )
@@ -659,6 +650,7 @@ def upload_banner_image(request):
         # Delete old banner if exists
         if profile.banner_image:
             try:
+                delete_derivatives(profile.banner_image.name)
                 old_banner_path = profile.banner_image.path
                 if os.path.exists(old_banner_path):
                     os.remove(old_banner_path)
@@ -667,11 +659,13 @@ def upload_banner_image(request):
 
         profile.banner_image = file
         profile.save()
+        derive(profile, "banner_image")
 
         return Response(
             {
                 "message": "Banner image uploaded successfully",
                 "banner_image_url": build_absolute_url(request, profile.banner_image.url),
+                "banner_image_sizes": absolute_image_sizes(request, profile, "banner_image"),
             },
             status=status.HTTP_200_OK,
         )
@@ -689,6 +683,7 @@ def remove_store_logo(request):
     try:
         profile = UserProfile.objects.get(user=request.user)
         if profile.store_logo:
+            delete_derivatives(profile.store_logo.name)
             profile.store_logo.delete()
             profile.store_logo = None
             profile.save()
@@ -714,6 +709,7 @@ def remove_banner_image(request):
     try:
         profile = UserProfile.objects.get(user=request.user)
         if profile.banner_image:
+            delete_derivatives(profile.banner_image.name)
             profile.banner_image.delete()
             profile.banner_image = None
             profile.save()
@@ -928,24 +924,21 @@ def user_settings(request):
 
     if request.method == "GET":
         try:
-            # Get or create settings
-            settings, created = UserSettings.objects.get_or_create(user=user)
+            shop = snapshot_for(user)
 
             return Response(
                 {
                     "settings": {
-                        "language": settings.language,
-                        "currency": settings.currency,
-                        "currency_symbol": settings.currency_symbol,
-                        "email_notifications": settings.email_notifications,
-                        "marketing_notifications": settings.marketing_notifications,
+                        "language": shop.language,
+                        "currency": shop.currency,
+                        "currency_symbol": shop.currency_symbol,
+                        "email_notifications": shop.email_notifications,
+                        "marketing_notifications": shop.marketing_notifications,
                         # The shop's weekly holidays. Every per-day target in
                         # the app divides by the open days these leave behind —
                         # see core.business_days.
-                        "closed_days": business_days.clean(settings.closed_days),
-                        "closed_days_label": business_days.describe(
-                            settings.closed_days
-                        ),
+                        "closed_days": list(shop.closed_days),
+                        "closed_days_label": business_days.describe(shop.closed_days),
                         "weekday_options": [
                             {"value": number, "label": bangla, "short": short}
                             for number, bangla, short in business_days.WEEKDAYS
@@ -1038,6 +1031,84 @@ def user_settings(request):
             )
 
 
+#: A closure entered as a range (Eid, a run of hartal days) is stored a day per
+#: row; this keeps a mistyped year from writing hundreds of them.
+MAX_HOLIDAY_SPAN = 31
+
+
+def _holiday_json(holiday):
+    return {"id": holiday.id, "date": holiday.date.isoformat(), "name": holiday.name}
+
+
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated])
+def shop_holidays(request):
+    """
+    List (?year=) or add the days the shop is shut besides its weekly
+    closed days. POST {date, name} or {start, end, name}; dates already
+    marked are left as they are. See core.business_days.
+    """
+    user = owner_for(request)
+
+    if request.method == "GET":
+        holidays = ShopHoliday.objects.filter(user=user)
+        year = request.query_params.get("year")
+        if year:
+            if not year.isdigit():
+                return Response(
+                    {"error": "year must be a number"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            holidays = holidays.filter(date__year=int(year))
+        return Response({"holidays": [_holiday_json(h) for h in holidays]})
+
+    try:
+        start = date.fromisoformat(str(request.data.get("start") or request.data.get("date")))
+        end = date.fromisoformat(str(request.data.get("end") or start))
+    except ValueError:
+        return Response(
+            {"error": "date (or start and end) must be YYYY-MM-DD"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if end < start or (end - start).days >= MAX_HOLIDAY_SPAN:
+        return Response(
+            {"error": f"A closure runs forward and at most {MAX_HOLIDAY_SPAN} days"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    name = str(request.data.get("name") or "")[:100]
+    ShopHoliday.objects.bulk_create(
+        [
+            ShopHoliday(user=user, date=start + timedelta(days=offset), name=name)
+            for offset in range((end - start).days + 1)
+        ],
+        ignore_conflicts=True,
+    )
+    # bulk_create sends no post_save, so the cached calendar is dropped here.
+    business_days.forget(user.pk)
+    added = ShopHoliday.objects.filter(user=user, date__range=(start, end))
+    return Response(
+        {"holidays": [_holiday_json(h) for h in added]},
+        status=status.HTTP_201_CREATED,
+    )
+
+
+@api_view(["DELETE"])
+@permission_classes([IsAuthenticated])
+def shop_holiday_detail(request, holiday_id):
+    """
+    Remove one holiday, reopening that day.
+    """
+    deleted, _ = ShopHoliday.objects.filter(
+        user=owner_for(request), id=holiday_id
+    ).delete()
+    if not deleted:
+        return Response(
+            {"error": "Holiday not found"}, status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def change_password(request):
@@ -1829,6 +1900,7 @@ def toggle_level(request, level_id):
 @permission_classes([IsAuthenticated])
 @api_view(["POST", "GET"])
 @require_permission("sms.send")
+@idempotent(external=True)
 def smsSend(request):
     from subscription.models import SMSSentHistory, UserSMSCredit
     import re
@@ -2721,6 +2793,10 @@ def get_store_by_domain(request, domain):
                     "banner": build_absolute_url(request, user_profile.banner_image.url)
                     if user_profile.banner_image
                     else None,
+                    "logo_sizes": absolute_image_sizes(request, user_profile, "store_logo"),
+                    "banner_sizes": absolute_image_sizes(
+                        request, user_profile, "banner_image"
+                    ),
                     "contact_email": store_settings.contact_email
                     if store_settings
                     else user_profile.user.email,
@@ -50,6 +50,10 @@ class Customer(models.Model):
         """Calculate total number of orders for this customer"""
         from orders.models import Order
 
+        # The annotations here and below come from the customer list; see
+        # customers.views.LIST_PLAN.
+        if hasattr(self, "orders_count"):
+            return self.orders_count
         return Order.objects.filter(user=self.user, customer=self).count()
 
     @property
@@ -57,6 +61,8 @@ class Customer(models.Model):
         """Calculate total amount spent by this customer"""
         from orders.models import Order
 
+        if hasattr(self, "orders_total"):
+            return self.orders_total
         total = Order.objects.filter(user=self.user, customer=self).aggregate(
             total=Sum("total_amount")
         )["total"]
@@ -67,6 +73,8 @@ class Customer(models.Model):
         """Get the date of the last order"""
         from orders.models import Order
 
+        if hasattr(self, "last_ordered_at"):
+            return self.last_ordered_at
         last_order = (
             Order.objects.filter(user=self.user, customer=self)
             .order_by("-created_at")
@@ -77,11 +85,15 @@ class Customer(models.Model):
     @property
     def active_gifts_count(self):
         """Count of active gifts for this customer"""
+        if hasattr(self, "active_gifts"):
+            return self.active_gifts
         return self.customer_gifts.filter(status="active").count()
 
     @property
     def total_points(self):
         """Calculate total achievement points earned"""
+        if hasattr(self, "points_total"):
+            return self.points_total
         return (
             self.customer_achievements.aggregate(total=Sum("achievement__points"))[
                 "total"
@@ -92,6 +104,8 @@ class Customer(models.Model):
     @property
     def current_level(self):
         """Get current customer level"""
+        if hasattr(self, "current_levels"):
+            return self.current_levels[0] if self.current_levels else None
         return self.customer_levels.filter(is_current=True).first()
 
 
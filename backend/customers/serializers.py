@@ -1,5 +1,6 @@
 from core.ownership import OwnedRelationsMixin
 from core.models import Achievement, Gift, Level
+from core.sparse import SparseFieldsMixin
 from rest_framework import serializers
 
 from .models import (
@@ -13,7 +14,9 @@ from .models import (
 )
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """A customer with their order totals; takes ?fields= and ?omit=."""
+
     total_orders = serializers.ReadOnlyField()
     total_spent = serializers.ReadOnlyField()
     last_order_date = serializers.ReadOnlyField()
@@ -1,8 +1,19 @@
 from core.scoping import HasPermission, owner_for, require_permission
 from datetime import datetime, timedelta
 
+from core import sparse
 from core.models import Achievement, Gift, Level
-from django.db.models import Avg, Q, Sum
+from django.db.models import (
+    Count,
+    DecimalField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status
@@ -19,6 +30,8 @@ from .models import (
     SMSLog,
     Transaction,
 )
+from orders.models import Order
+
 from .serializers import (
     AchievementForCustomerSerializer,
     CustomerAchievementSerializer,
@@ -35,6 +48,57 @@ from .serializers import (
 )
 
 
+_ORDERS = Order.objects.filter(customer=OuterRef("pk"), user=OuterRef("user"))
+
+#: What each CustomerSerializer field needs; see core.sparse.
+LIST_PLAN = {
+    "total_orders": {"annotate": {"orders_count": sparse.per_row(_ORDERS, Count("pk"))}},
+    "total_spent": {
+        "annotate": {
+            "orders_total": sparse.per_row(
+                _ORDERS,
+                Sum("total_amount"),
+                DecimalField(max_digits=16, decimal_places=2),
+            )
+        }
+    },
+    "last_order_date": {
+        "annotate": {
+            "last_ordered_at": Subquery(
+                _ORDERS.order_by("-created_at").values("created_at")[:1]
+            )
+        }
+    },
+    "active_gifts_count": {
+        "annotate": {
+            "active_gifts": sparse.per_row(
+                CustomerGift.objects.filter(customer=OuterRef("pk"), status="active"),
+                Count("pk"),
+            )
+        }
+    },
+    "total_points": {
+        "annotate": {
+            "points_total": sparse.per_row(
+                CustomerAchievement.objects.filter(customer=OuterRef("pk")),
+                Sum("achievement__points"),
+            )
+        }
+    },
+    "current_level": {
+        "prefetch": (
+            Prefetch(
+                "customer_levels",
+                queryset=CustomerLevel.objects.filter(is_current=True).select_related(
+                    "level"
+                ),
+                to_attr="current_levels",
+            ),
+        )
+    },
+}
+
+
 class CustomerListCreateView(generics.ListCreateAPIView):
     """List all customers or create a new customer"""
 
@@ -57,7 +121,11 @@ class CustomerListCreateView(generics.ListCreateAPIView):
     ordering = ["-created_at"]
 
     def get_queryset(self):
-        return Customer.objects.filter(user=owner_for(self.request))
+        customers = Customer.objects.filter(user=owner_for(self.request))
+        if self.request.method == "GET":
+            # Only what the requested fields read (?fields= / ?omit=).
+            return sparse.shape(customers, self.request, CustomerSerializer, LIST_PLAN)
+        return customers
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -516,29 +584,35 @@ def customer_statistics(request):
     total_customers = Customer.objects.filter(user=user).count()
     active_customers = Customer.objects.filter(user=user, status="active").count()
 
-    # Import Order from orders app
-    from orders.models import Order
-
-    total_orders = Order.objects.filter(user=user).count()
+    # Order totals come from the running counters (orders.counters), not a
+    # pass over every order the shop has taken.
+    from orders import counters
 
-    # Revenue statistics
-    revenue_stats = Order.objects.filter(user=user, status="completed").aggregate(
-        total_revenue=Sum("total_amount"), average_order_value=Avg("total_amount")
+    (lifetime,) = counters.totals(user)
+    average_order_value = (
+        lifetime.completed_revenue / lifetime.completed_orders
+        if lifetime.completed_orders
+        else 0
     )
 
-    # Top customers by spending
+    # Top customers by spending. Annotated as orders_total, which
+    # Customer.total_spent reads, so the five rows cost no further queries.
     top_customers = (
         Customer.objects.filter(user=user)
-        .annotate(total_spent_calc=Sum("orders__total_amount"))
-        .order_by("-total_spent_calc")[:5]
+        .annotate(
+            orders_total=Coalesce(
+                Sum("orders__total_amount"), Value(0), output_field=DecimalField()
+            )
+        )
+        .order_by("-orders_total")[:5]
     )
 
     stats_data = {
         "total_customers": total_customers,
         "active_customers": active_customers,
-        "total_orders": total_orders,
-        "total_revenue": revenue_stats["total_revenue"] or 0,
-        "average_order_value": revenue_stats["average_order_value"] or 0,
+        "total_orders": lifetime.orders,
+        "total_revenue": lifetime.completed_revenue,
+        "average_order_value": average_order_value,
         "top_customers": top_customers,
     }
 
@@ -16,15 +16,19 @@ from django.contrib.auth.models import User
 from django.db import models
 from django.utils import timezone
 
+from core.uploads import FileMetadata
+
 
 def document_upload_path(instance, filename):
     """Group uploads by owner and month so the media dir stays navigable."""
     return f"important_documents/{instance.owner_id}/{timezone.now():%Y/%m}/{filename}"
 
 
-class ImportantDocument(models.Model):
+class ImportantDocument(FileMetadata):
     """One paper the shop needs to keep."""
 
+    metadata_owner = "owner"
+
     DOC_TYPES = [
         ("trade_license", "ট্রেড লাইসেন্স"),
         ("tin", "টিন সার্টিফিকেট"),
@@ -134,14 +138,3 @@ class ImportantDocument(models.Model):
     def extension(self):
         return os.path.splitext(self.file.name)[1].lower().lstrip(".") if self.file else ""
 
-    @property
-    def file_size(self):
-        """Bytes, or None when the file is missing from disk.
-
-        Storage backends raise rather than return 0 for a deleted file, and a
-        list page must not 500 because one upload went missing.
-        """
-        try:
-            return self.file.size if self.file else None
-        except (OSError, ValueError):
-            return None
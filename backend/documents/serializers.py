@@ -1,5 +1,6 @@
 import os
 
+from core.protected_media import protected_url
 from rest_framework import serializers
 
 from .models import ImportantDocument
@@ -52,8 +53,7 @@ class ImportantDocumentSerializer(serializers.ModelSerializer):
     def get_file_url(self, obj):
         if not obj.file:
             return None
-        request = self.context.get("request")
-        return request.build_absolute_uri(obj.file.url) if request else obj.file.url
+        return protected_url(obj.file, self.context.get("request"))
 
     def get_uploaded_by_name(self, obj):
         if not obj.uploaded_by:
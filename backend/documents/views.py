@@ -10,6 +10,7 @@ from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 
 from core.scoping import HasPermission, owner_for
+from core.uploads import release_file
 
 from .models import ImportantDocument
 from .serializers import (
@@ -56,15 +57,14 @@ class ImportantDocumentViewSet(viewsets.ModelViewSet):
         )
 
     def perform_destroy(self, instance):
-        """Delete the row and the blob together.
+        """Delete the row and, unless another row shares it, the blob.
 
         Django stopped removing files on delete in 1.3; without this the media
         dir grows forever with papers the owner believes they deleted.
         """
         stored = instance.file
         super().perform_destroy(instance)
-        if stored:
-            stored.delete(save=False)
+        release_file(instance, stored)
 
     @action(detail=False, methods=["get"])
     def stats(self, request):
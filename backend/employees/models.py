@@ -1,4 +1,4 @@
-from core.uploads import validate_document, validate_image
+from core.uploads import FileMetadata, validate_document, validate_image
 
 from django.db import models
 from django.contrib.auth.models import User
@@ -273,7 +273,10 @@ class Task(models.Model):
         return f"{self.title} - {self.employee.name}"
 
 
-class Document(models.Model):
+class Document(FileMetadata):
+    metadata_owner = 'employee__user'
+    metadata_columns = FileMetadata.METADATA_FIELDS + ('size',)
+
     CATEGORY_CHOICES = [
         ('contract', 'Contract'),
         ('id_document', 'ID Document'),
@@ -307,10 +310,10 @@ class Document(models.Model):
             return self.file.name.split('.')[-1].lower()
         return 'unknown'
 
-    def save(self, *args, **kwargs):
-        if self.file:
-            self.size = self.file.size
-        super().save(*args, **kwargs)
+    def record_file_metadata(self):
+        # `size` predates file_size; keep it for existing clients.
+        super().record_file_metadata()
+        self.size = self.file_size or 0
 
 class EmployeeAccess(models.Model):
     """A login the shop owner hands to one employee.
@@ -14,6 +14,7 @@ and the difference is the answer to every question the owner asks.
 from decimal import Decimal, InvalidOperation
 
 from banking.models import BankAccount, Transaction
+from core.idempotency import idempotent
 from core.scoping import can, owner_for
 from django.db import transaction as db_transaction
 from django.db.models import Sum
@@ -211,6 +212,7 @@ def _pay_one(owner, employee, amount, kind, method, paid_on, note, account, reco
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@idempotent
 def pay_salaries(request):
     """Pay one or several employees in a single action.
 
@@ -1,4 +1,5 @@
 from core.ownership import OwnedRelationsMixin
+from core.protected_media import ProtectedFilesMixin, protected_url
 from rest_framework import serializers
 
 from .models import (
@@ -66,8 +67,11 @@ class TaskSerializer(OwnedRelationsMixin, serializers.ModelSerializer):
         extra_kwargs = {"employee": {"read_only": True}}
 
 
-class DocumentSerializer(OwnedRelationsMixin, serializers.ModelSerializer):
+class DocumentSerializer(
+    ProtectedFilesMixin, OwnedRelationsMixin, serializers.ModelSerializer
+):
     owned_relations = ("employee",)
+    protected_files = ("file",)
 
     file_type = serializers.CharField(read_only=True)
     url = serializers.SerializerMethodField()
@@ -79,9 +83,7 @@ class DocumentSerializer(OwnedRelationsMixin, serializers.ModelSerializer):
         extra_kwargs = {"employee": {"read_only": True}, "size": {"read_only": True}}
 
     def get_url(self, obj):
-        if obj.file:
-            return obj.file.url
-        return None
+        return protected_url(obj.file, self.context.get("request"))
 
     def create(self, validated_data):
         # Remove employee_id from validated_data as it's handled in the view
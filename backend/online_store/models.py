@@ -27,7 +27,9 @@ class OnlineProduct(models.Model):
             self.description = self.product.details or ''
             self.price = self.product.sell_price or 0
             self.category = self.product.category.name if self.product.category else 'General'
-            self.image_url = self.product.main_photo
+            # The storefront grid shows it at card size, not the phone original.
+            sizes = self.product.main_photo_sizes
+            self.image_url = sizes["card"] if sizes else None
         super().save(*args, **kwargs)
 
     def __str__(self):
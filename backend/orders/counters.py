@@ -0,0 +1,175 @@
+"""Running order totals per shop: lifetime and per day.
+
+/api/orders/stats/ summed total_amount and gross_profit over a shop's whole
+order history on every call, then counted and summed today's orders on top,
+and the customer statistics did the same over the completed orders. The
+work grew with every order the shop had ever taken.
+
+OrderCounter keeps those sums instead, one row per owner per day plus one
+lifetime row (day NULL). They are kept by the order write path itself:
+Order.save and the post_delete receiver in orders.signals pass the order as
+it was loaded and as it is now to `record()`, which applies the difference
+with an UPDATE ... SET orders = orders + 1 inside the same transaction, so
+the counters move exactly when the order does and concurrent tills do not
+overwrite each other. A save that changes none of the counted fields
+(a note, a payment) writes nothing.
+
+What bypasses Model.save (QuerySet.update, bulk_create) is not counted.
+`reconcile()` rebuilds a shop's rows from its orders:
+
+    python manage.py reconcile_order_counters
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+#: The Order columns the counters read.
+COUNTED_FIELDS = ("user_id", "created_at", "status", "total_amount", "gross_profit")
+
+ZERO = Decimal("0")
+
+Totals = namedtuple(
+    "Totals", "orders revenue profit completed_orders completed_revenue"
+)
+EMPTY = Totals(0, ZERO, ZERO, 0, ZERO)
+
+
+def contribution(order):
+    """What `order` adds to its owner's counters: ((user_id, day), Totals)."""
+    completed = order.status == "completed"
+    total = order.total_amount or ZERO
+    return (
+        (order.user_id, timezone.localdate(order.created_at)),
+        Totals(
+            1,
+            total,
+            order.gross_profit or ZERO,
+            int(completed),
+            total if completed else ZERO,
+        ),
+    )
+
+
+def touches(update_fields):
+    """Whether a save(update_fields=...) can move the counters."""
+    names = {name.removesuffix("_id") for name in COUNTED_FIELDS}
+    return bool(names & set(update_fields))
+
+
+def loaded(field_names, order):
+    """The contribution of an order just read, or None if a column was deferred."""
+    if not set(COUNTED_FIELDS) <= set(field_names):
+        return None
+    return contribution(order)
+
+
+def stored(order):
+    """The contribution of `order` as the database has it now, or None."""
+    from .models import Order
+
+    row = Order.objects.filter(pk=order.pk).only(*COUNTED_FIELDS).first()
+    return None if row is None else row._counted
+
+
+def record(before, after):
+    """Move the counters from `before` to `after` (contributions, or None)."""
+    deltas = {}
+    for sign, entry in ((-1, before), (1, after)):
+        if entry is None:
+            continue
+        key, totals = entry
+        current = deltas.get(key, EMPTY)
+        deltas[key] = Totals(*(a + sign * b for a, b in zip(current, totals)))
+
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    with transaction.atomic():
+        for (user_id, day), delta in deltas.items():
+            _add(user_id, None, delta)
+            _add(user_id, day, delta)
+
+
+def _add(user_id, day, delta):
+    from .models import OrderCounter
+
+    changes = {name: F(name) + value for name, value in delta._asdict().items()}
+    rows = OrderCounter.objects.filter(user_id=user_id, day=day)
+    if not rows.update(**changes):
+        # get_or_create, not create: another till may have made the row
+        # between the UPDATE and here.
+        OrderCounter.objects.get_or_create(user_id=user_id, day=day)
+        rows.update(**changes)
+
+
+def totals(user, *days):
+    """Lifetime Totals for `user`, followed by the Totals for each of `days`."""
+    from .models import OrderCounter
+
+    rows = {
+        row.day: _totals(row)
+        for row in OrderCounter.objects.filter(
+            Q(day__isnull=True) | Q(day__in=days), user=user
+        )
+    }
+    return [rows.get(day, EMPTY) for day in (None, *days)]
+
+
+def reconcile(user_id, check=False):
+    """Rebuild the owner's counters from their orders.
+
+    Returns how many of the owner's rows were wrong; with `check` they are
+    only counted, not fixed.
+    """
+    from .models import Order, OrderCounter
+
+    counter_rows = OrderCounter.objects.filter(user_id=user_id)
+    with transaction.atomic():
+        # Locked first, so an order saved meanwhile waits and then adds to
+        # the rebuilt rows, instead of being counted twice or not at all.
+        existing = {row.day: _totals(row) for row in counter_rows.select_for_update()}
+        rows = [
+            OrderCounter(user_id=user_id, **day)
+            for day in _per_day(Order.objects.filter(user_id=user_id))
+        ]
+        lifetime = OrderCounter(user_id=user_id, day=None)
+        for field in Totals._fields:
+            setattr(lifetime, field, sum((getattr(row, field) for row in rows), 0))
+        wanted = {row.day: _totals(row) for row in [lifetime, *rows]}
+        drifted = sum(
+            existing.get(day, EMPTY) != wanted.get(day, EMPTY)
+            for day in existing.keys() | wanted.keys()
+        )
+        if drifted and not check:
+            counter_rows.delete()
+            OrderCounter.objects.bulk_create([lifetime, *rows])
+    return drifted
+
+
+def _totals(row):
+    return Totals(*(getattr(row, field) for field in Totals._fields))
+
+
+def _per_day(orders):
+    completed = Q(status="completed")
+    days = (
+        orders.annotate(day=TruncDate("created_at"))
+        .values("day")
+        .annotate(
+            orders=Count("id"),
+            revenue=Sum("total_amount"),
+            profit=Sum("gross_profit"),
+            completed_orders=Count("id", filter=completed),
+            completed_revenue=Sum("total_amount", filter=completed),
+        )
+        .order_by("day")
+    )
+    for day in days:
+        yield {
+            name: (ZERO if value is None else value) for name, value in day.items()
+        }
@@ -0,0 +1,41 @@
+"""Recompute every shop's order counters from its orders.
+
+Order.save and the delete signal keep the counters current (see
+orders.counters), so this is a check, and a repair after orders were
+written with bulk_create, update() or raw SQL:
+
+    python manage.py reconcile_order_counters            # report and fix
+    python manage.py reconcile_order_counters --check    # report; exit 1 on drift
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.counters import reconcile
+from orders.models import Order, OrderCounter
+
+
+class Command(BaseCommand):
+    help = "Check (and fix) the per-shop order counters against the orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true", help="only report rows that differ"
+        )
+
+    def handle(self, *args, **options):
+        owners = set(Order.objects.values_list("user_id", flat=True).distinct().order_by())
+        owners |= set(OrderCounter.objects.values_list("user_id", flat=True).distinct().order_by())
+
+        drifted = 0
+        for user_id in sorted(owners):
+            count = reconcile(user_id, check=options["check"])
+            if count:
+                self.stdout.write(f"user {user_id:<10} {count:>6} row(s) differed")
+            drifted += count
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Order counters match the orders."))
+        elif options["check"]:
+            raise CommandError("Order counters differ from the orders.")
+        else:
+            self.stdout.write(self.style.SUCCESS("Order counters rebuilt from the orders."))
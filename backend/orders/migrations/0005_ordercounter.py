@@ -0,0 +1,75 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:26
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    """Count every shop's existing orders into the new rows.
+
+    Written out here rather than calling orders.counters, so that a later
+    change there does not change what this migration does.
+    """
+    Order = apps.get_model("orders", "Order")
+    OrderCounter = apps.get_model("orders", "OrderCounter")
+    completed = Q(status="completed")
+    fields = ("orders", "revenue", "profit", "completed_orders", "completed_revenue")
+
+    days = (
+        Order.objects.annotate(day=TruncDate("created_at"))
+        .values("user_id", "day")
+        .annotate(
+            orders=Count("id"),
+            revenue=Sum("total_amount"),
+            profit=Sum("gross_profit"),
+            completed_orders=Count("id", filter=completed),
+            completed_revenue=Sum("total_amount", filter=completed),
+        )
+        .order_by("user_id", "day")
+    )
+    rows, lifetimes = [], {}
+    for day in days:
+        values = {name: day[name] or 0 for name in fields}
+        rows.append(OrderCounter(user_id=day["user_id"], day=day["day"], **values))
+        lifetime = lifetimes.setdefault(
+            day["user_id"], OrderCounter(user_id=day["user_id"], day=None)
+        )
+        for name in fields:
+            setattr(lifetime, name, getattr(lifetime, name) + values[name])
+    OrderCounter.objects.bulk_create([*lifetimes.values(), *rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0004_order_client_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(blank=True, null=True)),
+                ('orders', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('completed_orders', models.IntegerField(default=0)),
+                ('completed_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ordercounter',
+            constraint=models.UniqueConstraint(fields=('user', 'day'), name='order_counter_unique_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='ordercounter',
+            constraint=models.UniqueConstraint(condition=models.Q(('day__isnull', True)), fields=('user',), name='order_counter_unique_lifetime'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
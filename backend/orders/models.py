@@ -3,9 +3,11 @@ from decimal import Decimal
 
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Sum
 
+from . import counters
+
 
 class Order(models.Model):
     """Main order model to track customer purchases"""
@@ -100,6 +102,10 @@ class Order(models.Model):
     gross_profit = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     net_profit = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    # Offline POS sync: the id the till gave the order before it reached us,
+    # so a batch re-sent after a dropped connection is not booked twice.
+    client_key = models.CharField(max_length=64, blank=True, null=True)
+
     # Metadata
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -112,6 +118,13 @@ class Order(models.Model):
             models.Index(fields=["user", "created_at"]),
             models.Index(fields=["order_number"]),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "client_key"],
+                condition=models.Q(client_key__isnull=False),
+                name="order_unique_client_key",
+            ),
+        ]
 
     def __str__(self):
         customer_name = self.customer_name or (
@@ -145,9 +158,21 @@ class Order(models.Model):
             total_sell=Sum(models.F("quantity") * models.F("unit_price")),
         )
 
-        self.subtotal = items_data["subtotal"] or Decimal("0")
-        self.total_buy_price = items_data["total_buy"] or Decimal("0")
-        self.total_sell_price = items_data["total_sell"] or Decimal("0")
+        self.apply_totals(
+            items_data["subtotal"] or Decimal("0"),
+            items_data["total_buy"] or Decimal("0"),
+            items_data["total_sell"] or Decimal("0"),
+        )
+
+    def apply_totals(self, subtotal, total_buy, total_sell):
+        """Fill in discount, VAT, total and profit from the item sums.
+
+        Split out of calculate_totals so orders.pipeline, which has the lines
+        in memory, can set the totals without reading them back.
+        """
+        self.subtotal = subtotal
+        self.total_buy_price = total_buy
+        self.total_sell_price = total_sell
 
         # Calculate discount and VAT
         if self.discount_type == "flat":
@@ -188,7 +213,31 @@ class Order(models.Model):
         elif self.pk:  # Only recalculate for existing orders by default
             self.calculate_totals()
 
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not counters.touches(update_fields):
+            super().save(*args, **kwargs)
+            return
+
+        before = getattr(self, "_counted", None)
+        if before is None and not self._state.adding:
+            before = counters.stored(self)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            after = counters.contribution(self)
+            counters.record(before, after)
+        self._counted = after
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        order = super().from_db(db, field_names, values)
+        # What this order already adds to orders.counters, so a save can
+        # move them by the difference.
+        order._counted = counters.loaded(field_names, order)
+        return order
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._counted = None
 
     def generate_order_number(self):
         """Generate a unique order number with proper race condition handling.
@@ -230,6 +279,39 @@ class Order(models.Model):
             return f"{prefix}{count:04d}"
 
 
+class OrderCounter(models.Model):
+    """A shop's running order totals for one day, or for all time (day NULL).
+
+    Kept in step with its orders by orders.counters; read by the order and
+    customer statistics instead of summing the orders.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="order_counters"
+    )
+    day = models.DateField(null=True, blank=True)
+    orders = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    profit = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    completed_orders = models.IntegerField(default=0)
+    completed_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "day"], name="order_counter_unique_day"
+            ),
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(day__isnull=True),
+                name="order_counter_unique_lifetime",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} — {self.day or 'lifetime'}"
+
+
 class OrderItem(models.Model):
     """Individual items in an order"""
 
@@ -0,0 +1,175 @@
+"""Writing a new order in a fixed number of queries, however long the invoice.
+
+The old create path walked the lines one at a time: lock the product, lock
+the variant, insert the item, save the new stock. That is four or five round
+trips per line, all of them taken while earlier rows are already locked, so a
+40-line wholesale invoice held its locks for 200-odd queries and every other
+till selling the same SKUs queued behind it.
+
+Here the work is split into what has to touch the database and what does not:
+
+  1. every product and variant on the invoice is read with one statement
+     per table, without locking them;
+  2. the lines and the totals are built in memory;
+  3. the order is inserted once with its totals already filled in, and its
+     lines go in with one INSERT;
+  4. stock is taken off by products.stock.take, one guarded UPDATE per
+     table that fails the whole invoice if any row is short, and the stock
+     movements and payments go in with one INSERT each.
+
+Rows are locked only in step 4, in id order just before the UPDATE, for
+the few statements left before the caller commits.
+
+Problems with the basket raise ValueError with the same messages the old
+loop used; the serializer turns them into a 400.
+"""
+
+from decimal import Decimal
+
+from products import stock
+from products.models import Product, ProductVariant
+
+from .models import Order, OrderItem, OrderPayment, OrderStockMovement
+
+
+def _pk(value):
+    return value.id if hasattr(value, "id") else value
+
+
+def load_rows(items_data):
+    """Every product and variant the lines name, keyed by id."""
+    product_ids = {_pk(item["product"]) for item in items_data}
+    variant_ids = {_pk(item["variant"]) for item in items_data if item.get("variant")}
+    products = Product.objects.in_bulk(product_ids)
+    variants = ProductVariant.objects.in_bulk(variant_ids) if variant_ids else {}
+    return products, variants
+
+
+def build_lines(items_data, products, variants):
+    """Unsaved OrderItems, each with the stock.StockLine it draws on.
+
+    Returns (item, stock_line) pairs; stock_line is None for products sold
+    without stock. A variant id that does not belong to the line's product
+    is dropped, as the old loop did.
+    """
+    lines = []
+    for data in items_data:
+        product_id = _pk(data["product"])
+        product = products.get(product_id)
+        if product is None:
+            raise ValueError(f"Product with id {product_id} not found")
+
+        variant = None
+        if data.get("variant"):
+            variant = variants.get(_pk(data["variant"]))
+            if variant is not None and variant.product_id != product.id:
+                variant = None
+        if variant is not None:
+            # str(variant) names its product; this one is already loaded.
+            variant.product = product
+
+        quantity = data["quantity"]
+        unit_price = data["unit_price"]
+        buy_price = data.get("buy_price")
+        if buy_price is None:
+            if variant and variant.buy_price:
+                buy_price = variant.buy_price
+            else:
+                buy_price = product.buy_price or 0
+
+        stock_line = None
+        if stock.tracks_stock(product, variant):
+            stock_line = stock.StockLine(product, variant, quantity)
+
+        item = OrderItem(
+            product=product,
+            variant=variant,
+            quantity=quantity,
+            unit_price=unit_price,
+            buy_price=buy_price,
+            total_price=quantity * unit_price,
+            product_name=product.name,
+            # bulk_create skips OrderItem.save, so store what it would.
+            variant_details=str(variant) if variant else None,
+        )
+        lines.append((item, stock_line))
+    return lines
+
+
+def stock_movements(order, lines, user, movement_type="sale"):
+    """OrderStockMovement rows for (item, stock_line) pairs that moved stock.
+
+    Quantities are positive for stock out and negative for stock put back,
+    as the model documents them.
+    """
+    return [
+        OrderStockMovement(
+            order=order,
+            order_item=item,
+            product=item.product,
+            variant=item.variant,
+            movement_type=movement_type,
+            quantity=stock_line.previous - stock_line.new,
+            previous_stock=stock_line.previous,
+            new_stock=stock_line.new,
+            user=user,
+        )
+        for item, stock_line in lines
+        if stock_line is not None
+    ]
+
+
+def restore_stock(order, items, user=None, movement_type=None):
+    """Put the stock of `items` back, for a cancelled order or a dropped line.
+
+    With `movement_type` the return is recorded as OrderStockMovement rows;
+    without it (the order or item is about to be deleted, and its movements
+    with it) only the stock moves.
+    """
+    lines = [
+        (item, stock.StockLine(item.product, item.variant, item.quantity))
+        for item in items
+        if stock.tracks_stock(item.product, item.variant)
+    ]
+    stock.give_back([stock_line for _, stock_line in lines])
+    if movement_type:
+        OrderStockMovement.objects.bulk_create(
+            stock_movements(order, lines, user, movement_type)
+        )
+
+
+def create_order(user, fields, items_data, payments_data=()):
+    """Create an order with its lines, stock movements and payments.
+
+    `fields` are the Order columns the caller has already resolved (customer,
+    employee, discount, VAT and so on). Must run inside transaction.atomic,
+    so that a basket stock.take refuses leaves no order behind.
+    """
+    products, variants = load_rows(items_data)
+    lines = build_lines(items_data, products, variants)
+
+    subtotal = sum((item.total_price for item, _ in lines), Decimal("0"))
+    total_buy = sum(
+        (item.quantity * Decimal(item.buy_price) for item, _ in lines), Decimal("0")
+    )
+
+    order = Order(user=user, **fields)
+    order.apply_totals(subtotal, total_buy, subtotal)
+    order.paid_amount = sum(
+        (Decimal(payment["amount"]) for payment in payments_data), Decimal("0")
+    )
+    order.save()
+
+    items = [item for item, _ in lines]
+    for item in items:
+        item.order = order
+    OrderItem.objects.bulk_create(items)
+
+    stock.take([stock_line for _, stock_line in lines if stock_line is not None])
+    OrderStockMovement.objects.bulk_create(stock_movements(order, lines, user))
+
+    if payments_data:
+        OrderPayment.objects.bulk_create(
+            [OrderPayment(order=order, user=user, **payment) for payment in payments_data]
+        )
+    return order
@@ -1,4 +1,5 @@
 from core.ownership import OwnedRelationsMixin
+from core.sparse import SparseFieldsMixin
 from rest_framework import serializers
 
 from .models import Order, OrderItem, OrderPayment
@@ -86,7 +87,19 @@ class OrderPaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at"]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+def _first_item(order):
+    """The order's first item, read from the prefetched items when there are.
+
+    items.first() always queries, prefetched or not, and the legacy fields
+    below asked for it five times per order.
+    """
+    items = list(order.items.all())
+    return min(items, key=lambda item: item.pk) if items else None
+
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """An order with its items and payments; takes ?fields= and ?omit=."""
+
     items = OrderItemSerializer(many=True, read_only=True)
     payments = OrderPaymentSerializer(many=True, read_only=True)
     
@@ -156,17 +169,17 @@ class OrderSerializer(serializers.ModelSerializer):
 
     def get_product(self, obj):
         """Get first item's product for backward compatibility"""
-        first_item = obj.items.first()
+        first_item = _first_item(obj)
         return first_item.product.id if first_item else None
 
     def get_product_name(self, obj):
         """Get first item's product name for backward compatibility"""
-        first_item = obj.items.first()
+        first_item = _first_item(obj)
         return first_item.product.name if first_item else None
 
     def get_variant(self, obj):
         """Get first item's variant for backward compatibility"""
-        first_item = obj.items.first()
+        first_item = _first_item(obj)
         if first_item and first_item.variant:
             return {
                 "id": first_item.variant.id,
@@ -182,12 +195,12 @@ class OrderSerializer(serializers.ModelSerializer):
 
     def get_unit_price(self, obj):
         """Get first item's unit price for backward compatibility"""
-        first_item = obj.items.first()
+        first_item = _first_item(obj)
         return first_item.unit_price if first_item else 0
 
     def get_buy_price(self, obj):
         """Get first item's buy price for backward compatibility"""
-        first_item = obj.items.first()
+        first_item = _first_item(obj)
         return first_item.buy_price if first_item else 0
     
     def get_employee(self, obj):
@@ -225,15 +238,13 @@ class OrderItemCreateSerializer(serializers.ModelSerializer):
         """Validate order item data"""
         from products.models import Product, ProductVariant
 
-        # Validate product exists
-        try:
-            product = Product.objects.get(
-                id=data["product"].id
-                if hasattr(data["product"], "id")
-                else data["product"]
-            )
-        except (Product.DoesNotExist, AttributeError):
-            raise serializers.ValidationError("Product not found")
+        # Validate product exists (the related field has usually resolved it)
+        product = data["product"]
+        if not isinstance(product, Product):
+            try:
+                product = Product.objects.get(id=product)
+            except (Product.DoesNotExist, ValueError, TypeError):
+                raise serializers.ValidationError("Product not found")
 
         # Check if product has variants and validate accordingly
         if product.has_variants:
@@ -321,15 +332,13 @@ class OrderItemNestedSerializer(serializers.ModelSerializer):
         """Validate order item data"""
         from products.models import Product, ProductVariant
 
-        # Validate product exists
-        try:
-            product = Product.objects.get(
-                id=data["product"].id
-                if hasattr(data["product"], "id")
-                else data["product"]
-            )
-        except (Product.DoesNotExist, AttributeError):
-            raise serializers.ValidationError("Product not found")
+        # Validate product exists (the related field has usually resolved it)
+        product = data["product"]
+        if not isinstance(product, Product):
+            try:
+                product = Product.objects.get(id=product)
+            except (Product.DoesNotExist, ValueError, TypeError):
+                raise serializers.ValidationError("Product not found")
 
         # Check if product has variants and validate accordingly
         if product.has_variants:
@@ -438,6 +447,8 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         from employees.models import Employee
         from products.models import Product, ProductVariant
 
+        from .pipeline import create_order
+
         items_data = validated_data.pop("items", [])
         payments_data = validated_data.pop("payments", [])
         employee_id = validated_data.pop("employee", None)
@@ -528,80 +539,13 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                 except Employee.DoesNotExist:
                     raise serializers.ValidationError({"employee": "Invalid employee selection."})
 
-            # Create order
-            order = Order.objects.create(user=request_user, **validated_data)
-
-            # Create order items — lock product/variant rows to prevent stock race conditions
-            for item_data in items_data:
-                try:
-                    product_id = (
-                        item_data["product"].id
-                        if hasattr(item_data["product"], "id")
-                        else item_data["product"]
-                    )
-                    product = Product.objects.select_for_update().get(id=product_id)
-
-                    variant = None
-                    if item_data.get("variant"):
-                        try:
-                            variant_id = (
-                                item_data["variant"].id
-                                if hasattr(item_data["variant"], "id")
-                                else item_data["variant"]
-                            )
-                            variant = product.variants.select_for_update().get(id=variant_id)
-                        except ProductVariant.DoesNotExist:
-                            pass
-
-                    if "buy_price" not in item_data or item_data["buy_price"] is None:
-                        if variant and variant.buy_price:
-                            item_data["buy_price"] = variant.buy_price
-                        else:
-                            item_data["buy_price"] = product.buy_price or 0
-
-                    OrderItem.objects.create(
-                        order=order,
-                        product=product,
-                        variant=variant,
-                        quantity=item_data["quantity"],
-                        unit_price=item_data["unit_price"],
-                        buy_price=item_data["buy_price"],
-                        total_price=item_data["quantity"] * item_data["unit_price"],
-                        product_name=product.name,
-                        variant_details=f"{variant.color} - {variant.size}"
-                        if variant
-                        else None,
-                    )
-
-                    # Update stock
-                    if variant:
-                        if variant.stock >= item_data["quantity"]:
-                            variant.stock -= item_data["quantity"]
-                            variant.save(update_fields=["stock"])
-                        else:
-                            raise serializers.ValidationError(
-                                f"Insufficient stock for {product.name} - {variant}"
-                            )
-                    else:
-                        if not getattr(product, "no_stock_required", False):
-                            if product.stock >= item_data["quantity"]:
-                                product.stock -= item_data["quantity"]
-                                product.save(update_fields=["stock"])
-                            else:
-                                raise serializers.ValidationError(
-                                    f"Insufficient stock for {product.name}"
-                                )
-
-                except Product.DoesNotExist:
-                    raise serializers.ValidationError(
-                        f"Product with id {product_id} not found"
-                    )
-
-            # Create payments
-            for payment_data in payments_data:
-                OrderPayment.objects.create(
-                    order=order, user=request_user, **payment_data
+            # Lock, check and write the whole basket in one pass
+            try:
+                order = create_order(
+                    request_user, validated_data, items_data, payments_data
                 )
+            except ValueError as exc:
+                raise serializers.ValidationError(str(exc))
 
             # Create due payment record if order has due amount
             if validated_data.get("due_amount", 0) > 0:
@@ -648,9 +592,6 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                         user=request_user,
                     )
 
-            # Calculate and update totals once after all items are created
-            order.calculate_totals()
-            order.save()
             order.refresh_from_db()
             return order
 
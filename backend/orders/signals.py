@@ -1,9 +1,28 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from . import counters
 from .models import Order
 from employees.models import Incentive
 
 
+@receiver(post_delete, sender=Order)
+def uncount_order(sender, instance, **kwargs):
+    """Take a deleted order back out of orders.counters.
+
+    Runs inside the delete's transaction, for a QuerySet.delete() as well as
+    order.delete(), since both send this signal per row.
+    """
+    origin = kwargs.get("origin")
+    if isinstance(origin, User) or getattr(origin, "model", None) is User:
+        # The whole shop is going, its counters with it.
+        return
+    before = getattr(instance, "_counted", None)
+    if before is None:
+        before = counters.contribution(instance)
+    counters.record(before, None)
+
+
 @receiver(post_save, sender=Order)
 def create_employee_incentive(sender, instance, created, **kwargs):
     """
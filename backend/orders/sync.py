@@ -0,0 +1,165 @@
+"""Batch upload and catalogue pull for tills that work offline.
+
+A counter on a shop's mobile connection used to post every sale as its own
+request: a TLS handshake, token lookup, throttle check and transaction per
+order, and when the line dropped halfway through a queue the till could not
+tell which sales had landed. At the evening rush that was most of the
+server's traffic.
+
+Here a till saves orders locally and sends them in one batch:
+
+    POST /api/orders/sync/
+    {"orders": [{"client_key": "till2-000184", "items": [...], ...}, ...]}
+
+Each entry is the same payload `POST /api/orders/` takes, plus a
+`client_key` the till generated when the sale was rung up. Orders are applied
+in the order sent, each in its own savepoint through the same serializer and
+order pipeline as a single create, so one bad basket does not throw away the
+rest of the batch. The response has one result per entry, with the
+order_number the server assigned.
+
+`client_key` is unique per shop. A batch re-sent after a timeout gets
+"duplicate" results pointing at the orders already booked, not a second
+copy of the stock movement.
+
+The pull side, `GET /api/orders/sync/?since=<token>`, returns the products
+whose name, price or stock changed since the token from the last pull,
+together with a new token. The till keeps a local copy of the catalogue
+instead of reloading it between sales. It is one unpaged answer, sized for a
+till; a client that also needs deletions or pages through a large catalogue
+uses products.changes.
+"""
+
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from products.changes import PRODUCT_FIELDS, VARIANT_FIELDS
+from products.models import Product, ProductVariant
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+from .models import Order
+from .serializers import OrderCreateSerializer
+
+# One batch is one transaction-heavy request; keep it bounded.
+MAX_BATCH = 50
+
+# A change committed while a pull is running can carry an updated_at just
+# before the new token. Going back a little each time means it is sent again
+# instead of missed; the till overwrites rows by id, so a repeat costs nothing.
+OVERLAP = timedelta(seconds=30)
+
+
+def _existing(user, keys):
+    return dict(
+        Order.objects.filter(user=user, client_key__in=keys).values_list(
+            "client_key", "order_number"
+        )
+    )
+
+
+def _result(key, outcome, order_number=None, errors=None):
+    result = {"client_key": key, "status": outcome, "order_number": order_number}
+    if errors is not None:
+        result["errors"] = errors
+    return result
+
+
+def push(request):
+    entries = request.data.get("orders")
+    if not isinstance(entries, list) or not entries:
+        return Response(
+            {"error": "orders is required and must be a non-empty list."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(entries) > MAX_BATCH:
+        return Response(
+            {"error": f"A sync batch can hold at most {MAX_BATCH} orders."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    keys = []
+    for entry in entries:
+        key = entry.get("client_key") if isinstance(entry, dict) else None
+        if not isinstance(key, str) or not key.strip() or len(key) > 64:
+            return Response(
+                {"error": "Every order needs a client_key of at most 64 characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        keys.append(key)
+
+    # The serializer books orders to request.user; look keys up under the same.
+    user = request.user
+    booked = _existing(user, keys)
+    results = []
+    for key, entry in zip(keys, entries):
+        if key in booked:
+            results.append(_result(key, "duplicate", booked[key]))
+            continue
+
+        payload = {k: v for k, v in entry.items() if k != "client_key"}
+        serializer = OrderCreateSerializer(data=payload, context={"request": request})
+        if not serializer.is_valid():
+            results.append(_result(key, "error", errors=serializer.errors))
+            continue
+        try:
+            with transaction.atomic():
+                order = serializer.save(client_key=key)
+        except IntegrityError:
+            # Another upload of this batch booked the key first.
+            booked.update(_existing(user, [key]))
+            if key not in booked:
+                raise
+            results.append(_result(key, "duplicate", booked[key]))
+            continue
+        except serializers.ValidationError as exc:
+            results.append(_result(key, "error", errors=exc.detail))
+            continue
+
+        booked[key] = order.order_number
+        results.append(_result(key, "created", order.order_number))
+
+    return Response({"results": results})
+
+
+def pull(request, owner):
+    since = None
+    token = request.query_params.get("since")
+    if token:
+        since = parse_datetime(token)
+        if since is None:
+            return Response(
+                {"error": "since must be a token returned by an earlier sync."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+    # Take the token before reading so nothing changed during the read is lost.
+    # UTC with a Z suffix: a "+00:00" offset would turn into a space in a query string.
+    next_token = (timezone.now() - OVERLAP).astimezone(dt_timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S.%fZ"
+    )
+
+    products = Product.objects.filter(user=owner)
+    if since is not None:
+        products = products.filter(
+            Q(updated_at__gte=since) | Q(variants__updated_at__gte=since)
+        ).distinct()
+    rows = list(products.values(*PRODUCT_FIELDS))
+
+    variants = {}
+    for variant in ProductVariant.objects.filter(
+        product_id__in=[row["id"] for row in rows]
+    ).values(*VARIANT_FIELDS):
+        variants.setdefault(variant.pop("product_id"), []).append(variant)
+    for row in rows:
+        row["variants"] = variants.get(row["id"], [])
+
+    return Response(
+        {"products": rows, "full": since is None, "sync_token": next_token}
+    )
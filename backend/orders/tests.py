@@ -1,3 +1,316 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from products.models import Product, ProductVariant
+
+from .models import Order, OrderCounter, OrderStockMovement
+
+
+class OrderCreateAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.plain = Product.objects.create(
+            name='Rice', buy_price=40, sell_price=50, stock=10, user=self.user
+        )
+        self.shirt = Product.objects.create(
+            name='Shirt', has_variants=True, buy_price=0, sell_price=0, user=self.user
+        )
+        self.variant = ProductVariant.objects.create(
+            product=self.shirt, color='Red', size='M', buy_price=300, sell_price=450, stock=3
+        )
+
+    def _post(self, items, **extra):
+        return self.client.post(
+            '/api/orders/', {'items': items, **extra}, format='json'
+        )
+
+    def test_create_takes_stock_and_sets_totals(self):
+        response = self._post(
+            [
+                {'product': self.plain.id, 'quantity': 4, 'unit_price': '50', 'buy_price': '40'},
+                {'product': self.shirt.id, 'variant': self.variant.id, 'quantity': 2,
+                 'unit_price': '450', 'buy_price': '300'},
+            ],
+            discount_type='flat',
+            discount_flat_amount='100',
+            payments=[{'method': 'cash', 'amount': '500'}],
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        order = Order.objects.get()
+        self.assertEqual(order.subtotal, Decimal('1100'))
+        self.assertEqual(order.total_amount, Decimal('1000'))
+        self.assertEqual(order.total_buy_price, Decimal('760'))
+        self.assertEqual(order.gross_profit, Decimal('240'))
+        self.assertEqual(order.paid_amount, Decimal('500'))
+        self.assertEqual(order.items.count(), 2)
+
+        self.plain.refresh_from_db()
+        self.variant.refresh_from_db()
+        self.assertEqual(self.plain.stock, 6)
+        self.assertEqual(self.variant.stock, 1)
+        self.assertEqual(
+            sorted(OrderStockMovement.objects.values_list('previous_stock', 'new_stock')),
+            [(3, 1), (10, 6)],
+        )
+
+    def test_variant_line_stores_the_full_variant_name(self):
+        self.variant.custom_variant = 'Slim'
+        self.variant.save()
+        response = self._post([
+            {'product': self.shirt.id, 'variant': self.variant.id, 'quantity': 1,
+             'unit_price': '450', 'buy_price': '300'},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        item = Order.objects.get().items.get()
+        self.assertEqual(item.variant_details, 'Shirt - Red - M (Slim)')
+
+    def test_no_stock_product_added_removed_and_cancelled_keeps_its_stock(self):
+        service = Product.objects.create(
+            name='Delivery', buy_price=0, sell_price=60, stock=5,
+            no_stock_required=True, user=self.user
+        )
+        self._post([{'product': self.plain.id, 'quantity': 1, 'unit_price': '50', 'buy_price': '40'}])
+        order = Order.objects.get()
+        line = {'product': service.id, 'variant': None, 'quantity': 2, 'unit_price': '60', 'buy_price': '0'}
+
+        response = self.client.post(f'/api/orders/{order.id}/items/', line, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        item = order.items.get(product=service)
+        response = self.client.delete(f'/api/orders/{order.id}/items/{item.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        service.refresh_from_db()
+        self.assertEqual(service.stock, 5)
+
+        self.client.post(f'/api/orders/{order.id}/items/', line, format='json')
+        response = self.client.post(f'/api/orders/{order.id}/cancel_order/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        service.refresh_from_db()
+        self.plain.refresh_from_db()
+        self.assertEqual(service.stock, 5)
+        self.assertEqual(self.plain.stock, 10)
+        self.assertFalse(OrderStockMovement.objects.filter(product=service).exists())
+
+    def test_insufficient_stock_writes_nothing(self):
+        response = self._post(
+            [
+                {'product': self.plain.id, 'quantity': 1, 'unit_price': '50', 'buy_price': '40'},
+                {'product': self.shirt.id, 'variant': self.variant.id, 'quantity': 5,
+                 'unit_price': '450', 'buy_price': '300'},
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+        self.plain.refresh_from_db()
+        self.assertEqual(self.plain.stock, 10)
+
+    def test_lines_on_one_sku_share_its_stock_and_cancel_gives_it_back(self):
+        line = {'product': self.plain.id, 'quantity': 6, 'unit_price': '50', 'buy_price': '40'}
+        response = self._post([line, line])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Insufficient stock for Rice', str(response.data))
+
+        line['quantity'] = 4
+        response = self._post([line, line])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get()
+        self.assertEqual(
+            sorted(order.stock_movements.values_list('previous_stock', 'new_stock')),
+            [(6, 2), (10, 6)],
+        )
+
+        more = self.client.post(
+            f'/api/orders/{order.id}/items/',
+            {'product': self.plain.id, 'variant': None, 'quantity': 3,
+             'unit_price': '50', 'buy_price': '40'},
+            format='json',
+        )
+        self.assertEqual(more.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(more.data['error'], 'Insufficient stock. Available: 2, Requested: 3')
+        self.assertEqual(order.items.count(), 2)
+
+        self.client.post(f'/api/orders/{order.id}/cancel_order/')
+        self.plain.refresh_from_db()
+        self.assertEqual(self.plain.stock, 10)
+        self.assertEqual(
+            sorted(order.stock_movements.filter(movement_type='cancel')
+                   .values_list('quantity', 'new_stock')),
+            [(-4, 6), (-4, 10)],
+        )
+
+    def test_idempotency_key_replays_without_booking_again(self):
+        payload = {'items': [{'product': self.plain.id, 'quantity': 1,
+                              'unit_price': '50', 'buy_price': '40'}]}
+        first = self.client.post('/api/orders/', payload, format='json',
+                                 HTTP_IDEMPOTENCY_KEY='press-1')
+        again = self.client.post('/api/orders/', payload, format='json',
+                                 HTTP_IDEMPOTENCY_KEY='press-1')
+        self.assertEqual(again.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+        self.assertEqual(again.data['order_number'], first.data['order_number'])
+        self.assertEqual(Order.objects.count(), 1)
+
+        payload['items'][0]['quantity'] = 2
+        other = self.client.post('/api/orders/', payload, format='json',
+                                 HTTP_IDEMPOTENCY_KEY='press-1')
+        self.assertEqual(other.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+
+class OrderSyncAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(
+            name='Rice', buy_price=40, sell_price=50, stock=10, user=self.user
+        )
+
+    def _order(self, key, quantity):
+        return {
+            'client_key': key,
+            'items': [{'product': self.product.id, 'quantity': quantity,
+                       'unit_price': '50', 'buy_price': '40'}],
+        }
+
+    def test_resent_batch_is_not_booked_twice(self):
+        batch = {'orders': [self._order('till-1', 2), self._order('till-2', 50)]}
+        response = self.client.post('/api/orders/sync/', batch, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, second = response.data['results']
+        self.assertEqual(first['status'], 'created')
+        self.assertEqual(second['status'], 'error')
+
+        response = self.client.post('/api/orders/sync/', batch, format='json')
+        again = response.data['results'][0]
+        self.assertEqual(again['status'], 'duplicate')
+        self.assertEqual(again['order_number'], first['order_number'])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 8)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_pull_returns_changes_since_token(self):
+        response = self.client.get('/api/orders/sync/')
+        self.assertTrue(response.data['full'])
+        self.assertEqual(len(response.data['products']), 1)
+
+        Product.objects.filter(pk=self.product.pk).update(updated_at='2000-01-01T00:00:00Z')
+        response = self.client.get(
+            '/api/orders/sync/', {'since': response.data['sync_token']}
+        )
+        self.assertEqual(response.data['products'], [])
+
+
+
+class OrderCursorPaginationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        # Two share a created_at, so the id has to break the tie.
+        self.orders = [Order.objects.create(user=self.user) for _ in range(5)]
+        Order.objects.filter(pk__in=[o.pk for o in self.orders[1:3]]).update(
+            created_at=self.orders[1].created_at
+        )
+
+    def test_cursor_walks_every_order_once_newest_first(self):
+        seen = []
+        response = self.client.get('/api/orders/', {'cursor': '', 'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [row['id'] for row in response.data['results']]
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+
+        expected = list(
+            Order.objects.filter(user=self.user)
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertIsNone(response.data['count'])
+
+    def test_tampered_cursor_is_404(self):
+        response = self.client.get('/api/orders/', {'cursor': 'WzFd:forged'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_without_cursor_pages_by_number(self):
+        response = self.client.get('/api/orders/', {'page_size': 2})
+        self.assertEqual(response.data['count'], 5)
+
+
+class OrderCounterTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(
+            name='Rice', buy_price=40, sell_price=50, stock=100, user=self.user
+        )
+
+    def _order(self, quantity):
+        response = self.client.post('/api/orders/', {'items': [
+            {'product': self.product.id, 'quantity': quantity,
+             'unit_price': '50', 'buy_price': '40'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Order.objects.get(pk=response.data['id'])
+
+    def _summed(self):
+        return Order.objects.filter(user=self.user).aggregate(
+            revenue=Sum('total_amount'), profit=Sum('gross_profit')
+        )
+
+    def test_counters_follow_saves_and_deletes(self):
+        first, second, third = self._order(1), self._order(2), self._order(3)
+        second.status = 'completed'
+        second.save()
+        third.delete()
+
+        response = self.client.get('/api/orders/stats/')
+        summed = self._summed()
+        self.assertEqual(response.data['totalOrders'], 2)
+        self.assertEqual(response.data['totalRevenue'], float(summed['revenue']))
+        self.assertEqual(response.data['totalProfit'], float(summed['profit']))
+        self.assertEqual(response.data['todaysOrders'], 2)
+
+        response = self.client.get('/api/customers/statistics/')
+        self.assertEqual(response.data['total_orders'], 2)
+        self.assertEqual(Decimal(response.data['total_revenue']), second.total_amount)
+
+        # A save that moves none of the counted fields leaves them alone.
+        order = Order.objects.get(pk=first.pk)
+        order.notes = 'Paid by bKash'
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        self.assertFalse([q for q in queries if 'ordercounter' in q['sql']])
+
+    def test_reconcile_repairs_what_bypassed_save(self):
+        self._order(2)
+        call_command('reconcile_order_counters', '--check', stdout=StringIO())
+
+        Order.objects.update(total_amount=Decimal('999'))
+        with self.assertRaises(CommandError):
+            call_command('reconcile_order_counters', '--check', stdout=StringIO())
+        call_command('reconcile_order_counters', stdout=StringIO())
+
+        lifetime = OrderCounter.objects.get(user=self.user, day=None)
+        self.assertEqual(lifetime.revenue, Decimal('999'))
+        response = self.client.get('/api/orders/stats/')
+        self.assertEqual(response.data['totalRevenue'], 999.0)
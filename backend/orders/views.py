@@ -1,5 +1,10 @@
+from core import sparse
+from core.idempotency import idempotent
+from core.pagination import KeysetPaginationMixin
 from core.scoping import HasPermission, owner_for
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
+from products import stock
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter, SearchFilter
@@ -7,7 +12,9 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Order
+from . import counters
+from .models import Order, OrderStockMovement
+from .pipeline import restore_stock, stock_movements
 from .serializers import (
     OrderCreateSerializer,
     OrderItemUpdateSerializer,
@@ -33,10 +40,29 @@ from django.db.models import (
 from django.db.models.functions import Coalesce, Cast
 
 
-class OrdersPagination(PageNumberPagination):
+_ITEMS = {"prefetch": ("items",)}
+
+#: What each OrderSerializer field needs; see core.sparse.
+LIST_PLAN = {
+    "items": {"prefetch": ("items__variant",)},
+    "payments": {"prefetch": ("payments",)},
+    "employee": {"select": ("employee",)},
+    # The legacy single-product fields read the first item.
+    "product": _ITEMS,
+    "product_name": {"prefetch": ("items__product",)},
+    "variant": {"prefetch": ("items__variant",)},
+    "quantity": _ITEMS,
+    "unit_price": _ITEMS,
+    "buy_price": _ITEMS,
+}
+
+
+class OrdersPagination(KeysetPaginationMixin, PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 2000
+    # For ?cursor= (core.pagination); the (user, created_at) index serves it.
+    cursor_keys = ("created_at", "id")
 
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -79,12 +105,16 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         from django.utils import timezone
 
-        queryset = (
-            Order.objects.filter(user=owner_for(self.request))
-            .select_related("customer")
-            .prefetch_related("items__product", "items__variant", "payments")
-            .order_by("-created_at")
+        queryset = Order.objects.filter(user=owner_for(self.request)).order_by(
+            "-created_at"
         )
+        if self.action == "list":
+            # Only what the requested fields read (?fields= / ?omit=).
+            queryset = sparse.shape(queryset, self.request, OrderSerializer, LIST_PLAN)
+        else:
+            queryset = queryset.select_related("customer").prefetch_related(
+                "items__product", "items__variant", "payments"
+            )
 
         # Handle date filtering
         date_filter = self.request.query_params.get("date_filter", None)
@@ -409,6 +439,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         # Fallback non-paginated
         return Response(list(computed))
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         Create a new order with items.
@@ -426,46 +457,34 @@ class OrderViewSet(viewsets.ModelViewSet):
         read_serializer = OrderSerializer(order, context={"request": request})
         return Response(read_serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["get", "post"], url_path="sync")
+    def sync(self, request):
+        """Batch order upload (POST) and catalogue delta (GET) for offline tills.
+
+        See orders.sync for the payloads.
+        """
+        from . import sync
+
+        if request.method == "POST":
+            return sync.push(request)
+        return sync.pull(request, owner_for(request))
+
     @action(detail=False, methods=["get"])
     def stats(self, request):
         """Get overall statistics for all user orders"""
-        from datetime import datetime, time
-
-        from django.db.models import Sum
         from django.utils import timezone
 
-        # Get all user orders
-        queryset = Order.objects.filter(user=owner_for(request))
-
-        # Basic stats
-        total_orders = queryset.count()
-
-        # Revenue and profit calculations
-        revenue_data = queryset.aggregate(
-            total_revenue=Sum("total_amount"), total_profit=Sum("gross_profit")
-        )
-
-        total_revenue = revenue_data["total_revenue"] or 0
-        total_profit = revenue_data["total_profit"] or 0
-
-        # Today's stats
-        today = timezone.now().date()
-        today_start = timezone.make_aware(datetime.combine(today, time.min))
-        today_end = timezone.make_aware(datetime.combine(today, time.max))
-
-        today_queryset = queryset.filter(created_at__range=[today_start, today_end])
-        todays_orders = today_queryset.count()
-
-        todays_data = today_queryset.aggregate(todays_revenue=Sum("total_amount"))
-        todays_revenue = todays_data["todays_revenue"] or 0
+        # One read of the running totals, however many orders the shop has;
+        # see orders.counters.
+        lifetime, today = counters.totals(owner_for(request), timezone.localdate())
 
         return Response(
             {
-                "totalOrders": total_orders,
-                "totalRevenue": float(total_revenue),
-                "totalProfit": float(total_profit),
-                "todaysOrders": todays_orders,
-                "todaysRevenue": float(todays_revenue),
+                "totalOrders": lifetime.orders,
+                "totalRevenue": float(lifetime.revenue),
+                "totalProfit": float(lifetime.profit),
+                "todaysOrders": today.orders,
+                "todaysRevenue": float(today.revenue),
             }
         )
 
@@ -513,17 +532,10 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Restore stock for all items
-        for item in order.items.all():
-            if item.variant:
-                item.variant.stock += item.quantity
-                item.variant.save()
-            else:
-                item.product.stock += item.quantity
-                item.product.save()
-
-        order.status = "cancelled"
-        order.save()
+        with transaction.atomic():
+            restore_stock(order, order.items.select_related("product", "variant"), request.user, "cancel")
+            order.status = "cancelled"
+            order.save()
 
         serializer = OrderSerializer(order, context={"request": request})
         return Response(serializer.data)
@@ -535,13 +547,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         # Only restore stock if the order was NOT already cancelled
         # (cancelled orders already had their stock restored by cancel_order)
         if order.status != "cancelled":
-            for item in order.items.all():
-                if item.variant:
-                    item.variant.stock += item.quantity
-                    item.variant.save(update_fields=["stock"])
-                else:
-                    item.product.stock += item.quantity
-                    item.product.save(update_fields=["stock"])
+            restore_stock(order, order.items.select_related("product", "variant"))
 
         # Delete the order
         return super().destroy(request, *args, **kwargs)
@@ -619,37 +625,31 @@ class OrderViewSet(viewsets.ModelViewSet):
             try:
                 from django.db import transaction as db_transaction
                 with db_transaction.atomic():
-                    product = Product.objects.select_for_update().get(id=product_id, user=owner_for(request))
-
-                    # Check stock
+                    product = Product.objects.get(id=product_id, user=owner_for(request))
+                    variant = None
                     if product.has_variants and variant_id:
-                        variant = product.variants.select_for_update().get(id=variant_id)
-                        if variant.stock < quantity:
-                            return Response(
-                                {
-                                    "error": f"Insufficient stock. Available: {variant.stock}, Requested: {quantity}"
-                                },
-                                status=status.HTTP_400_BAD_REQUEST,
-                            )
-                    else:
-                        if product.stock < quantity:
+                        variant = product.variants.get(id=variant_id)
+
+                    # Create the item, then take its stock with a guarded
+                    # UPDATE; a short row rolls the item back with it. A
+                    # product sold without stock takes none, as in
+                    # build_lines, and restore_stock gives none back.
+                    item = serializer.save()
+                    if stock.tracks_stock(product, variant):
+                        line = stock.StockLine(product, variant, quantity)
+                        try:
+                            stock.take([line])
+                        except stock.InsufficientStock:
+                            db_transaction.set_rollback(True)
                             return Response(
                                 {
-                                    "error": f"Insufficient stock. Available: {product.stock}, Requested: {quantity}"
+                                    "error": f"Insufficient stock. Available: {line.available}, Requested: {quantity}"
                                 },
                                 status=status.HTTP_400_BAD_REQUEST,
                             )
-
-                    # Create the item
-                    item = serializer.save()
-
-                    # Update stock
-                    if product.has_variants and variant_id:
-                        variant.stock -= quantity
-                        variant.save(update_fields=["stock"])
-                    else:
-                        product.stock -= quantity
-                        product.save(update_fields=["stock"])
+                        OrderStockMovement.objects.bulk_create(
+                            stock_movements(order, [(item, line)], request.user)
+                        )
 
                 # Return updated order with all items
                 order_serializer = OrderSerializer(order, context={"request": request})
@@ -684,12 +684,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             item = order.items.get(id=item_id)
 
             # Restore stock before deleting
-            if item.variant:
-                item.variant.stock += item.quantity
-                item.variant.save()
-            else:
-                item.product.stock += item.quantity
-                item.product.save()
+            restore_stock(order, [item])
 
             # Delete the item
             item.delete()
@@ -0,0 +1,218 @@
+"""Cost basis: what the stock on the shelf was bought for.
+
+A product's buy price is the weighted average of the unit costs of its
+costed stock-in movements (a positive quantity with a cost per unit). That
+is the rule deleting a movement has always recomputed, but it was computed
+by loading every such movement the product ever had and adding them up in
+Python, so a shop with years of restocks paid for all of them on each
+delete.
+
+Product and ProductVariant now carry the two sums the average is made of,
+`cost_quantity` and `cost_total`. Movements without a variant count towards
+the product, the rest towards their variant. The signals in
+products.signals move the sums with one UPDATE when a movement is
+inserted, edited or deleted, so reading the average is a division and
+keeping it is O(1) however long the history.
+
+    python manage.py rebuild_cost_basis
+
+recomputes the sums from the movements and reports (and, unless --check,
+repairs) any row that has drifted, for example after rows were loaded with
+bulk_create or raw SQL, which send no signals.
+
+Stock on hand can be valued three ways (`valuation`):
+
+  book     stock × buy price, the figure the statistics always showed and
+           still show by default
+  average  stock × the running average, or × buy price where there is no
+           costed history; one aggregate per table
+  fifo     sales are taken to use up the oldest purchases first, so the
+           units left are the newest ones: each holder's stock is priced
+           down its costed movements, newest first, and whatever they do
+           not cover is priced at the buy price
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import (
+    Case,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from .models import Product, ProductStockMovement, ProductVariant
+
+ZERO = Decimal("0")
+
+CENT = Decimal("0.01")
+
+METHODS = ("book", "average", "fifo")
+
+COSTED = Q(quantity__gt=0, cost_per_unit__gt=0)
+
+_LINE_COST = ExpressionWrapper(
+    F("quantity") * F("cost_per_unit"),
+    output_field=DecimalField(max_digits=16, decimal_places=2),
+)
+
+
+def contribution(movement):
+    """(quantity, cost) a movement adds to its holder's sums."""
+    if movement.quantity > 0 and movement.cost_per_unit and movement.cost_per_unit > 0:
+        return movement.quantity, movement.quantity * Decimal(movement.cost_per_unit)
+    return 0, ZERO
+
+
+def _holder_rows(product_id, variant_id):
+    if variant_id:
+        return ProductVariant.objects.filter(pk=variant_id)
+    return Product.objects.filter(pk=product_id)
+
+
+def shift(product_id, variant_id, quantity, cost):
+    """Move a holder's sums by (quantity, cost), either of which may be negative."""
+    if not quantity and not cost:
+        return
+    _holder_rows(product_id, variant_id).update(
+        cost_quantity=F("cost_quantity") + quantity,
+        cost_total=F("cost_total") + cost,
+    )
+
+
+def average(holder):
+    """The holder's running average unit cost, or None with no costed history."""
+    if not holder.cost_quantity:
+        return None
+    return (Decimal(holder.cost_total) / holder.cost_quantity).quantize(
+        CENT, rounding=ROUND_HALF_UP
+    )
+
+
+def history_totals():
+    """{(product_id, variant_id): (quantity, cost)} summed from the movements.
+
+    variant_id is None for the product's own rows.
+    """
+    rows = (
+        ProductStockMovement.objects.filter(COSTED)
+        .order_by()
+        .values("product_id", "variant_id")
+        .annotate(units=Sum("quantity"), cost=Sum(_LINE_COST))
+    )
+    return {
+        (row["product_id"], row["variant_id"]): (row["units"], row["cost"])
+        for row in rows
+    }
+
+
+def rebuild(check=False):
+    """Compare every holder's sums with its movement history; fix unless `check`.
+
+    Returns {model label: rows that differed}.
+    """
+    expected = history_totals()
+    drifted = {}
+    for model, fields, key in (
+        (Product, ("id",), lambda row: (row.pk, None)),
+        (ProductVariant, ("id", "product_id"), lambda row: (row.product_id, row.pk)),
+    ):
+        stale = []
+        rows = model.objects.only(*fields, "cost_quantity", "cost_total")
+        for row in rows.iterator(chunk_size=2000):
+            quantity, cost = expected.get(key(row), (0, ZERO))
+            if row.cost_quantity != quantity or row.cost_total != cost:
+                row.cost_quantity, row.cost_total = quantity, cost
+                stale.append(row)
+        if stale and not check:
+            model.objects.bulk_update(
+                stale, ["cost_quantity", "cost_total"], batch_size=1000
+            )
+        drifted[model._meta.label] = len(stale)
+    return drifted
+
+
+def _book_value():
+    return Coalesce(
+        Sum(
+            F("stock") * F("buy_price"),
+            output_field=DecimalField(max_digits=20, decimal_places=4),
+        ),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=20, decimal_places=4),
+    )
+
+
+def _average_value():
+    return Coalesce(
+        Sum(
+            Case(
+                When(
+                    cost_quantity__gt=0,
+                    then=F("stock") * F("cost_total") / F("cost_quantity"),
+                ),
+                default=F("stock") * F("buy_price"),
+                output_field=DecimalField(max_digits=20, decimal_places=4),
+            )
+        ),
+        Value(ZERO),
+        output_field=DecimalField(max_digits=20, decimal_places=4),
+    )
+
+
+def _fifo_value(products, variants):
+    """Price every holder's stock down its costed movements, newest first."""
+    left = {(p.id, None): (p.stock, p.buy_price) for p in products}
+    left.update({(v.product_id, v.id): (v.stock, v.buy_price) for v in variants})
+    unpriced = {key: stock for key, (stock, _price) in left.items() if stock > 0}
+
+    total = ZERO
+    movements = (
+        ProductStockMovement.objects.filter(COSTED, product_id__in={k[0] for k in unpriced})
+        .order_by("-created_at", "-id")
+        .values_list("product_id", "variant_id", "quantity", "cost_per_unit")
+    )
+    for product_id, variant_id, quantity, cost in movements.iterator(chunk_size=2000):
+        key = (product_id, variant_id)
+        stock = unpriced.get(key)
+        if not stock:
+            continue
+        used = min(stock, quantity)
+        total += used * cost
+        unpriced[key] = stock - used
+
+    for key, stock in unpriced.items():
+        total += stock * left[key][1]
+    return total
+
+
+def valuation(products, method="book"):
+    """What the stock on hand of `products` (a Product queryset) cost.
+
+    Products with variants are valued by their variants. `method` is one of
+    METHODS; anything else raises ValueError.
+    """
+    if method not in METHODS:
+        raise ValueError(method)
+    products = products.order_by().select_related(None).prefetch_related(None)
+    variants = ProductVariant.objects.filter(
+        product__in=products.filter(has_variants=True).values("id")
+    )
+    products = products.filter(has_variants=False)
+    if method == "fifo":
+        value = _fifo_value(
+            products.filter(stock__gt=0).only("id", "stock", "buy_price"),
+            variants.filter(stock__gt=0).only("id", "product_id", "stock", "buy_price"),
+        )
+    else:
+        sums = _book_value if method == "book" else _average_value
+        value = (
+            products.aggregate(value=sums())["value"]
+            + variants.aggregate(value=sums())["value"]
+        )
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
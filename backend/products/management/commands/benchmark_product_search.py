@@ -0,0 +1,106 @@
+"""Time products.search against a large synthetic catalogue.
+
+    python manage.py benchmark_product_search --products 50000
+
+Creates a throwaway shop with that many products inside a transaction,
+runs a mix of picker-style queries against it (exact codes, prefixes, words
+from the middle of a name, Bangla, a typo) and prints latency percentiles.
+Everything is rolled back at the end, so it is safe to run against a copy
+of production to see what the trigram index does there.
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from products.models import Product
+from products.search import search, search_text_for
+
+WORDS = [
+    "chal", "dal", "tel", "shirt", "panjabi", "saree", "bolt", "nut", "filter",
+    "brake", "chain", "tyre", "cable", "charger", "battery", "bulb", "pipe",
+    "চাল", "ডাল", "তেল", "শাড়ি", "পাঞ্জাবি", "ব্যাটারি", "চার্জার", "টায়ার",
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Benchmark product search on a synthetic catalogue (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=50000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        try:
+            with transaction.atomic():
+                owner = User.objects.create(username=f"search-bench-{rng.random()}")
+                names = self._seed(owner, options["products"], rng)
+                self._report(owner, names, options["queries"], rng)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, owner, count, rng):
+        started = time.perf_counter()
+        names = []
+        batch = []
+        for i in range(count):
+            name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+            product = Product(
+                name=name,
+                product_code=f"P{i:06d}",
+                location=f"Rack {rng.randint(1, 40)}",
+                user=owner,
+                stock=rng.randint(0, 500),
+            )
+            # bulk_create skips save(), which is what normally fills this.
+            product.search_text = search_text_for(product)
+            batch.append(product)
+            names.append(name)
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Product.objects.bulk_create(batch)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE products_product")
+        self.stdout.write(
+            f"Seeded {count} products in {time.perf_counter() - started:.1f}s "
+            f"({connection.vendor})"
+        )
+        return names
+
+    def _queries(self, names, count, rng):
+        kinds = [
+            lambda: f"P{rng.randrange(len(names)):06d}",  # exact code
+            lambda: rng.choice(names)[:3],  # first keystrokes
+            lambda: rng.choice(WORDS),  # a word anywhere
+            lambda: " ".join(rng.choice(names).split()[:2]),  # two words
+            lambda: rng.choice(WORDS)[:-1] + "x",  # a typo
+        ]
+        return [rng.choice(kinds)() for _ in range(count)]
+
+    def _report(self, owner, names, count, rng):
+        base = Product.objects.filter(user=owner, is_active=True)
+        timings = []
+        for query in self._queries(names, count, rng):
+            started = time.perf_counter()
+            list(search(base, query, owner=owner).values("id")[:20])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f"{count} queries: p50 {statistics.median(timings):.2f}ms, "
+            f"p95 {p95:.2f}ms, max {timings[-1]:.2f}ms"
+        )
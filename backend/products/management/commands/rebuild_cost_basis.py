@@ -0,0 +1,33 @@
+"""Recompute the running cost totals of products and variants.
+
+The movement signals keep cost_quantity and cost_total current (see
+products.costing), so this is a check, and a repair after movements were
+written with bulk_create, update() or raw SQL:
+
+    python manage.py rebuild_cost_basis            # report and fix
+    python manage.py rebuild_cost_basis --check    # report; exit 1 on drift
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.costing import rebuild
+
+
+class Command(BaseCommand):
+    help = "Check (and fix) product and variant cost totals against their movements."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true", help="only report rows that differ"
+        )
+
+    def handle(self, *args, **options):
+        drifted = rebuild(check=options["check"])
+        for label, count in drifted.items():
+            self.stdout.write(f"{label:<28} {count:>6} row(s) differed")
+        if not any(drifted.values()):
+            self.stdout.write(self.style.SUCCESS("Cost totals match the movement history."))
+        elif options["check"]:
+            raise CommandError("Cost totals differ from the movement history.")
+        else:
+            self.stdout.write(self.style.SUCCESS("Cost totals rebuilt from the movement history."))
@@ -0,0 +1,21 @@
+"""Recompute Product.search_text for every product.
+
+save() keeps the column current, so this is only needed after a change to
+products.search.normalize, or after rows were written with update() or
+bulk_create:
+
+    python manage.py rebuild_product_search
+"""
+
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+from products.search import refresh
+
+
+class Command(BaseCommand):
+    help = "Recompute the normalised search text of every product."
+
+    def handle(self, *args, **options):
+        changed = refresh(Product.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} product(s)."))
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:20
+
+import re
+import unicodedata
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# products.search as it stood when the column was added, copied so that a
+# later change there does not change what this migration does.
+_BANGLA_DIGITS = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+_ZERO_WIDTH = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+_SPACE = re.compile(r"\s+")
+
+
+def _normalize(text):
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFC", str(text))
+    text = text.replace("\u09a4\u09cd\u200c", "\u09ce")
+    text = _ZERO_WIDTH.sub("", text)
+    text = text.translate(_BANGLA_DIGITS)
+    return _SPACE.sub(" ", text.casefold()).strip()
+
+
+def _search_text(product):
+    parts = (product.name, product.product_code, product.location, product.details)
+    return " ".join(_normalize(part) for part in parts if part)
+
+
+def fill_search_text(apps, schema_editor):
+    """Backfill search_text for existing products, in batches."""
+    Product = apps.get_model("products", "Product")
+    batch = []
+    for product in Product.objects.only(
+        "id", "name", "product_code", "location", "details"
+    ).iterator(chunk_size=1000):
+        product.search_text = _search_text(product)
+        batch.append(product)
+        if len(batch) >= 1000:
+            Product.objects.bulk_update(batch, ["search_text"])
+            batch = []
+    if batch:
+        Product.objects.bulk_update(batch, ["search_text"])
+
+
+def create_trigram_index(apps, schema_editor):
+    # Raw SQL rather than a Meta index: GIN with gin_trgm_ops only exists on
+    # PostgreSQL, and the SQLite test database builds tables from the models.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS products_product_search_trgm "
+        "ON products_product USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS products_product_search_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_producttombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:58
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+
+def fill_cost_totals(apps, schema_editor):
+    """Sum each product's and variant's costed movements into the new columns.
+
+    Written out here rather than calling products.costing, so that a later
+    change there does not change what this migration does.
+    """
+    Product = apps.get_model("products", "Product")
+    ProductVariant = apps.get_model("products", "ProductVariant")
+    ProductStockMovement = apps.get_model("products", "ProductStockMovement")
+
+    rows = (
+        ProductStockMovement.objects.filter(quantity__gt=0, cost_per_unit__gt=0)
+        .order_by()
+        .values("product_id", "variant_id")
+        .annotate(
+            units=Sum("quantity"),
+            cost=Sum(
+                ExpressionWrapper(
+                    F("quantity") * F("cost_per_unit"),
+                    output_field=DecimalField(max_digits=16, decimal_places=2),
+                )
+            ),
+        )
+    )
+    totals = {
+        (row["product_id"], row["variant_id"]): (row["units"], row["cost"])
+        for row in rows
+    }
+
+    for model, fields, key in (
+        (Product, ("id",), lambda row: (row.pk, None)),
+        (ProductVariant, ("id", "product_id"), lambda row: (row.product_id, row.pk)),
+    ):
+        filled = []
+        for row in model.objects.only(*fields).iterator(chunk_size=2000):
+            quantity, cost = totals.get(key(row), (0, Decimal("0")))
+            if quantity:
+                row.cost_quantity, row.cost_total = quantity, cost
+                filled.append(row)
+        model.objects.bulk_update(filled, ["cost_quantity", "cost_total"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_search_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='cost_quantity',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='cost_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='cost_quantity',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='cost_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=16),
+        ),
+        migrations.RunPython(fill_cost_totals, migrations.RunPython.noop),
+    ]
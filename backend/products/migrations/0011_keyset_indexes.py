@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_cost_basis'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productstockmovement',
+            index=models.Index(fields=['user', 'created_at'], name='products_pr_user_id_132c07_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productphoto',
+            name='image_derived',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+    ]
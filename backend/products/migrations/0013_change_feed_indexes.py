@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_productphoto_image_derived'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='products_pr_user_id_847fcb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(fields=['updated_at', 'id'], name='products_pr_updated_36650f_idx'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from core.images import delete_derivatives, image_sizes
 from core.uploads import validate_image
 
 import os
@@ -8,6 +9,7 @@ from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models import Avg, Sum
+from django.utils.functional import cached_property
 from suppliers.models import Supplier
 
 
@@ -60,6 +62,11 @@ class Product(models.Model):
         max_digits=12, decimal_places=2, default=0, validators=[MinValueValidator(0)]
     )
     stock = models.PositiveIntegerField(default=0)
+    # Running totals of the costed stock-in movements; see products.costing.
+    cost_quantity = models.PositiveIntegerField(default=0, editable=False)
+    cost_total = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, editable=False
+    )
 
     # Meta fields
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="products")
@@ -67,17 +74,52 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Normalised name/code/location/details for products.search; kept by save().
+    search_text = models.TextField(blank=True, default="", editable=False)
+
     class Meta:
         ordering = ["-created_at"]
         unique_together = ["name", "user"]
+        # The catalogue change feed walks a shop's products by (updated_at, id).
+        indexes = [models.Index(fields=["user", "updated_at", "id"])]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        from .search import search_text_for
+
+        self.search_text = search_text_for(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "search_text" not in update_fields:
+            searched = {"name", "product_code", "location", "details"}
+            if searched.intersection(update_fields):
+                kwargs["update_fields"] = list(update_fields) + ["search_text"]
+        super().save(*args, **kwargs)
+
+    def _loaded_variants(self):
+        """The variants, if a prefetch already read them; else None."""
+        cache = getattr(self, "_prefetched_objects_cache", {})
+        return list(cache["variants"]) if "variants" in cache else None
+
+    def _variant_average(self, field):
+        variants = self._loaded_variants()
+        if variants is None:
+            return self.variants.aggregate(avg=Avg(field))["avg"] or 0
+        if not variants:
+            return 0
+        return sum(getattr(v, field) for v in variants) / len(variants)
+
     @property
     def total_stock(self):
         """Calculate total stock across all variants or return single stock"""
         if self.has_variants:
+            # `variants_stock` is annotated by the product list (see core.sparse).
+            if hasattr(self, "variants_stock"):
+                return self.variants_stock
+            variants = self._loaded_variants()
+            if variants is not None:
+                return sum(variant.stock for variant in variants)
             return self.variants.aggregate(total=Sum("stock"))["total"] or 0
         return self.stock
 
@@ -85,14 +127,14 @@ class Product(models.Model):
     def average_buy_price(self):
         """Calculate average buy price across variants or return single price"""
         if self.has_variants:
-            return self.variants.aggregate(avg=Avg("buy_price"))["avg"] or 0
+            return self._variant_average("buy_price")
         return self.buy_price
 
     @property
     def average_sell_price(self):
         """Calculate average sell price across variants or return single price"""
         if self.has_variants:
-            return self.variants.aggregate(avg=Avg("sell_price"))["avg"] or 0
+            return self._variant_average("sell_price")
         return self.sell_price
 
     @property
@@ -138,6 +180,8 @@ class Product(models.Model):
         """Calculate total sold quantity from sales"""
         from django.db.models import Sum
 
+        if hasattr(self, "units_sold"):
+            return self.units_sold
         total_sold = 0
         if self.has_variants:
             # Sum sales from all variants
@@ -158,12 +202,22 @@ class Product(models.Model):
         """Get number of variants for this product"""
         return self.variants.count() if self.has_variants else 0
 
+    @cached_property
+    def _main_photo(self):
+        return self.photos.first()
+
     @property
     def main_photo(self):
         """Get the first photo as main photo"""
-        photo = self.photos.first()
+        photo = self._main_photo
         return photo.image.url if photo else None
 
+    @property
+    def main_photo_sizes(self):
+        """URLs of the main photo's small copies; see core.images."""
+        photo = self._main_photo
+        return image_sizes(photo.image, photo.image_derived) if photo else None
+
     @property
     def vehicle_stock(self):
         """How many serial-tracked units of this model are still unsold.
@@ -171,15 +225,21 @@ class Product(models.Model):
         Vehicles carry their own per-unit rows (engine/chassis numbers), so for a
         vehicle model this — not `stock` — is the real shelf count.
         """
+        if hasattr(self, "vehicles_in_stock"):
+            return self.vehicles_in_stock
         return self.vehicles.filter(status="in_stock").count()
 
     @property
     def vehicle_sold(self):
+        if hasattr(self, "vehicles_sold"):
+            return self.vehicles_sold
         return self.vehicles.filter(status="sold").count()
 
     @property
     def is_vehicle(self):
         """True once any unit has been registered against this product."""
+        if hasattr(self, "has_vehicles"):
+            return self.has_vehicles
         return self.vehicles.exists()
 
 
@@ -214,6 +274,11 @@ class ProductVariant(models.Model):
         max_digits=12, decimal_places=2, validators=[MinValueValidator(0)]
     )
     stock = models.PositiveIntegerField(default=0)
+    # Running totals of the costed stock-in movements; see products.costing.
+    cost_quantity = models.PositiveIntegerField(default=0, editable=False)
+    cost_total = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, editable=False
+    )
 
     # Meta fields
     created_at = models.DateTimeField(auto_now_add=True)
@@ -222,6 +287,8 @@ class ProductVariant(models.Model):
     class Meta:
         ordering = ["color", "size"]
         unique_together = ["product", "color", "size", "custom_variant"]
+        # The catalogue change feed walks variants by (updated_at, id).
+        indexes = [models.Index(fields=["updated_at", "id"])]
 
     def __str__(self):
         variant_name = f"{self.color} - {self.size}"
@@ -256,6 +323,10 @@ class ProductPhoto(models.Model):
         Product, on_delete=models.CASCADE, related_name="photos"
     )
     image = models.ImageField(upload_to=product_photo_upload_path, validators=[validate_image])
+    # Which image the small copies were made from; see core.images.
+    image_derived = models.CharField(
+        max_length=100, blank=True, default="", editable=False
+    )
     alt_text = models.CharField(max_length=200, blank=True, null=True)
     order = models.PositiveIntegerField(default=0, help_text="Display order")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -269,6 +340,7 @@ class ProductPhoto(models.Model):
     def delete(self, *args, **kwargs):
         """Delete the file when the photo is deleted"""
         if self.image:
+            delete_derivatives(self.image.name)
             if os.path.isfile(self.image.path):
                 os.remove(self.image.path)
         super().delete(*args, **kwargs)
@@ -322,7 +394,38 @@ class ProductStockMovement(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # The movement history pages newest first (core.pagination).
+        indexes = [models.Index(fields=["user", "created_at"])]
 
     def __str__(self):
         variant_info = f" - {self.variant}" if self.variant else ""
         return f"{self.get_movement_type_display()} - {self.product.name}{variant_info} - {self.quantity}"
+
+
+class ProductTombstone(models.Model):
+    """A product or variant that was deleted, for the catalogue change feed.
+
+    A deleted row cannot show up in an `updated_at` query, so a till holding
+    a local copy of the catalogue would keep selling it forever. Written by
+    products.signals; read by products.changes.
+    """
+
+    KIND_CHOICES = [
+        ("product", "Product"),
+        ("variant", "Variant"),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="product_tombstones"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    product_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["deleted_at", "id"]
+        indexes = [models.Index(fields=["user", "deleted_at", "id"])]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id} deleted"
@@ -0,0 +1,144 @@
+"""Finding a product by what the person at the counter types.
+
+The invoice picker searched on every keystroke with a chain of `icontains`
+over name, code, details, location, and the category and supplier names
+through joins, then `distinct()`. A leading-wildcard LIKE cannot use a
+b-tree index, so each keystroke read the whole product table, and results
+came back in creation order, not by relevance.
+
+Now each product carries `search_text`: its name, code, location and
+details, normalised (below) and written on save. PostgreSQL indexes that
+column with a pg_trgm GIN index (migration 0009), which serves both the
+`LIKE '%term%'` match and the fuzzy match for typos. Category and supplier
+names are matched against their own small tables first, and the results
+become a plain `IN` on the product, so no join or distinct is needed.
+
+Results are ranked:
+
+  0. the code matches exactly (a barcode scan, a typed part number),
+  1. the name or code starts with the query,
+  2. every word of the query appears somewhere,
+  3. anything else that matched: a category or supplier name, or, on
+     PostgreSQL, a close spelling of the query (trigram word similarity),
+
+and within a rank, by similarity and then by name.
+
+Normalisation is what makes Bangla input match reliably. The same word
+reaches us typed on different keyboards and phones: decomposed or composed
+nukta letters (য়, ড়, ঢ়), ৎ typed as ত + hasant + ZWNJ, stray zero-width
+joiners, and Bangla digits in codes and sizes. Both the stored text and the
+query go through `normalize()`, so they meet in the same form.
+
+On SQLite (the test database) the same ranking runs on `LIKE` without the
+fuzzy rank.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+_BANGLA_DIGITS = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+_ZERO_WIDTH = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(text):
+    """Lower-case, NFC, Bangla digits as ASCII, zero-width characters gone."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFC", str(text))
+    # Khanda ta typed as ত + hasant + ZWNJ.
+    text = text.replace("\u09a4\u09cd\u200c", "\u09ce")
+    text = _ZERO_WIDTH.sub("", text)
+    text = text.translate(_BANGLA_DIGITS)
+    return _SPACE.sub(" ", text.casefold()).strip()
+
+
+def search_text_for(product):
+    """The value Product.save stores in `search_text`."""
+    parts = (product.name, product.product_code, product.location, product.details)
+    return " ".join(normalize(part) for part in parts if part)
+
+
+def _fuzzy_supported():
+    return connection.vendor == "postgresql"
+
+
+def search(queryset, query, owner=None):
+    """`queryset` narrowed to `query` and ordered best match first.
+
+    `owner` limits the category and supplier name match to that shop's
+    records; without it, those names are not searched.
+    """
+    from core.models import Category
+    from suppliers.models import Supplier
+
+    needle = normalize(query)
+    if not needle:
+        return queryset.none()
+    terms = needle.split(" ")
+
+    every_term = Q()
+    for term in terms:
+        every_term &= Q(search_text__contains=term)
+    matched = every_term
+
+    if owner is not None:
+        categories = Category.objects.filter(user=owner, name__icontains=query)
+        suppliers = Supplier.objects.filter(user=owner, name__icontains=query)
+        matched |= Q(category__in=categories.values("id"))
+        matched |= Q(supplier__in=suppliers.values("id"))
+
+    typed = query.strip()
+    ranks = [
+        When(product_code__iexact=typed, then=Value(0)),
+        When(
+            Q(name__istartswith=typed) | Q(product_code__istartswith=typed),
+            then=Value(1),
+        ),
+        When(every_term, then=Value(2)),
+    ]
+
+    if _fuzzy_supported():
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        matched |= Q(search_text__trigram_word_similar=needle)
+        queryset = queryset.annotate(
+            similarity=TrigramWordSimilarity(needle, "search_text")
+        )
+        ordering = ["search_rank", "-similarity", "name"]
+    else:
+        ordering = ["search_rank", "name"]
+
+    return (
+        queryset.filter(matched)
+        .annotate(
+            search_rank=Case(*ranks, default=Value(3), output_field=IntegerField())
+        )
+        .order_by(*ordering)
+    )
+
+
+def refresh(queryset, batch_size=1000):
+    """Recompute `search_text` for existing rows; returns how many changed."""
+    from .models import Product
+
+    changed = []
+    count = 0
+    for product in queryset.only(
+        "id", "name", "product_code", "location", "details", "search_text"
+    ).iterator(chunk_size=batch_size):
+        value = search_text_for(product)
+        if value != product.search_text:
+            product.search_text = value
+            changed.append(product)
+        if len(changed) >= batch_size:
+            Product.objects.bulk_update(changed, ["search_text"])
+            count += len(changed)
+            changed = []
+    if changed:
+        Product.objects.bulk_update(changed, ["search_text"])
+        count += len(changed)
+    return count
@@ -1,4 +1,6 @@
+from core.images import image_sizes
 from core.ownership import OwnedRelationsMixin
+from core.sparse import SparseFieldsMixin
 from rest_framework import serializers
 
 from .models import Product, ProductPhoto, ProductStockMovement, ProductVariant
@@ -7,11 +9,16 @@ from .models import Product, ProductPhoto, ProductStockMovement, ProductVariant
 class ProductPhotoSerializer(serializers.ModelSerializer):
     """Serializer for product photos"""
 
+    sizes = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductPhoto
-        fields = ["id", "image", "alt_text", "order", "created_at"]
+        fields = ["id", "image", "sizes", "alt_text", "order", "created_at"]
         read_only_fields = ["id", "created_at"]
 
+    def get_sizes(self, obj):
+        return image_sizes(obj.image, obj.image_derived, self.context.get("request"))
+
 
 class ProductVariantSerializer(serializers.ModelSerializer):
     """Serializer for product variants"""
@@ -52,8 +59,8 @@ class ProductVariantSerializer(serializers.ModelSerializer):
         return data
 
 
-class ProductListSerializer(serializers.ModelSerializer):
-    """Simplified serializer for product listing"""
+class ProductListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Simplified serializer for product listing; takes ?fields= and ?omit=."""
 
     category_name = serializers.CharField(source="category.name", read_only=True)
     supplier_name = serializers.CharField(source="supplier.name", read_only=True)
@@ -68,6 +75,7 @@ class ProductListSerializer(serializers.ModelSerializer):
     profit_margin = serializers.ReadOnlyField()
     variant_count = serializers.ReadOnlyField()
     main_photo = serializers.ReadOnlyField()
+    main_photo_sizes = serializers.ReadOnlyField()
     # Serial-tracked units (bikes/CNGs/cars) counted per unit, not in bulk.
     vehicle_stock = serializers.ReadOnlyField()
     vehicle_sold = serializers.ReadOnlyField()
@@ -98,6 +106,7 @@ class ProductListSerializer(serializers.ModelSerializer):
             "profit_margin",
             "variant_count",
             "main_photo",
+            "main_photo_sizes",
             "vehicle_stock",
             "vehicle_sold",
             "is_vehicle",
@@ -127,6 +136,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     profit_margin = serializers.ReadOnlyField()
     variant_count = serializers.ReadOnlyField()
     main_photo = serializers.ReadOnlyField()
+    main_photo_sizes = serializers.ReadOnlyField()
 
     class Meta:
         model = Product
@@ -156,6 +166,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             "profit_margin",
             "variant_count",
             "main_photo",
+            "main_photo_sizes",
             "vehicle_stock",
             "vehicle_sold",
             "is_vehicle",
@@ -0,0 +1,93 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.images import derive
+
+from . import costing
+from .models import (
+    Product,
+    ProductPhoto,
+    ProductStockMovement,
+    ProductTombstone,
+    ProductVariant,
+)
+
+
+def _account_deleted(kwargs):
+    # When the whole account goes, its products go with it and nobody is
+    # left to sync; a tombstone would also point at the user being deleted.
+    # The origin is the User for user.delete(), a User queryset for
+    # User.objects.filter(...).delete(), as in orders.signals.
+    origin = kwargs.get("origin")
+    return isinstance(origin, User) or getattr(origin, "model", None) is User
+
+
+@receiver(post_delete, sender=Product)
+def record_product_deletion(sender, instance, **kwargs):
+    if _account_deleted(kwargs):
+        return
+    ProductTombstone.objects.create(
+        user_id=instance.user_id,
+        kind="product",
+        object_id=instance.pk,
+        product_id=instance.pk,
+    )
+
+
+@receiver(post_delete, sender=ProductVariant)
+def record_variant_deletion(sender, instance, **kwargs):
+    if _account_deleted(kwargs):
+        return
+    # Runs before the parent row goes when a whole product is deleted, so
+    # the owner can still be read from it.
+    user_id = (
+        Product.objects.filter(pk=instance.product_id)
+        .values_list("user_id", flat=True)
+        .first()
+    )
+    if user_id is None:
+        return
+    ProductTombstone.objects.create(
+        user_id=user_id,
+        kind="variant",
+        object_id=instance.pk,
+        product_id=instance.product_id,
+    )
+
+
+@receiver(post_save, sender=ProductPhoto)
+def make_photo_derivatives(sender, instance, created, **kwargs):
+    if created and instance.image:
+        derive(instance, "image")
+
+
+@receiver(pre_save, sender=ProductStockMovement)
+def remember_movement_cost(sender, instance, **kwargs):
+    # An edit moves the sums by the difference, so keep what the row added
+    # before it changed.
+    instance._costed_before = None
+    if instance.pk:
+        before = sender.objects.filter(pk=instance.pk).first()
+        if before is not None:
+            instance._costed_before = (before.product_id, before.variant_id) + (
+                costing.contribution(before)
+            )
+
+
+@receiver(post_save, sender=ProductStockMovement)
+def add_movement_cost(sender, instance, **kwargs):
+    before = getattr(instance, "_costed_before", None)
+    if before is not None:
+        product_id, variant_id, quantity, cost = before
+        costing.shift(product_id, variant_id, -quantity, -cost)
+    costing.shift(instance.product_id, instance.variant_id, *costing.contribution(instance))
+
+
+@receiver(post_delete, sender=ProductStockMovement)
+def remove_movement_cost(sender, instance, **kwargs):
+    # Nothing to keep when the product, variant or account goes with it.
+    if isinstance(kwargs.get("origin"), (User, Product, ProductVariant)):
+        return
+    quantity, cost = costing.contribution(instance)
+    costing.shift(instance.product_id, instance.variant_id, -quantity, -cost)
@@ -0,0 +1,195 @@
+"""Moving stock with guarded UPDATEs, for every path that sells or restocks.
+
+Each place that sold used to move stock its own way. The dashboard invoice
+locked the rows with SELECT ... FOR UPDATE before it had built anything,
+adding an item to an open order locked and saved, the public API wrote
+`stock = <what it read a moment ago> - quantity` with no lock at all (two
+storefront visitors could both buy the last unit), and a manual adjustment
+saved the whole product from a stale read.
+
+Here the database does the check and the subtraction in one statement:
+
+    UPDATE ... SET stock = stock - <q for this row>
+     WHERE id IN (...) AND stock >= <q for this row>
+
+one statement per table for a whole order, with the quantities of lines
+naming the same SKU added together. If fewer rows were updated than named,
+some line cannot be filled: the statements are rolled back to a savepoint
+and the rows are read again to say which lines were short, raising
+InsufficientStock. Otherwise the rows are read back once, which gives every
+line its previous and new stock for the movement rows.
+
+Just before each UPDATE the rows are locked with SELECT ... FOR UPDATE in
+id order. The UPDATE would lock them anyway, but in whatever order the
+database walks them, so two invoices naming the same SKUs could each hold
+one and wait for the other. Nothing is locked while the invoice is being
+built, and the locks last only until the caller commits, so a till building
+a long invoice does not hold up every other till selling the same SKUs.
+Callers run this last before their movement INSERTs and commit, inside
+transaction.atomic.
+"""
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest, Now
+
+from .models import Product, ProductVariant
+
+
+class StockLine:
+    """A quantity drawn from (or put back to) a product or one of its variants.
+
+    `previous` and `new` are filled in by take() and give_back(), and
+    `available` by a failed take().
+    """
+
+    def __init__(self, product, variant=None, quantity=0):
+        self.product = product
+        self.variant = variant
+        self.quantity = quantity
+        self.previous = None
+        self.new = None
+        self.available = None
+
+    @property
+    def holder(self):
+        return self.variant if self.variant is not None else self.product
+
+    def __str__(self):
+        if self.variant is not None:
+            # str(variant) reads product.name; hand it the row we already hold.
+            self.variant.product = self.product
+            return f"{self.product.name} - {self.variant}"
+        return self.product.name
+
+
+def tracks_stock(product, variant=None):
+    """Whether selling this takes stock: a variant always, a product unless
+    it is sold without stock."""
+    return variant is not None or not getattr(product, "no_stock_required", False)
+
+
+class InsufficientStock(ValueError):
+    """take() could not fill `lines`; each carries `available`."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        super().__init__(f"Insufficient stock for {lines[0]}")
+
+
+class _Short(Exception):
+    pass
+
+
+def _per_row(quantities):
+    return Case(
+        *[When(pk=pk, then=Value(quantity)) for pk, quantity in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _by_model(lines, model):
+    quantities = {}
+    for line in lines:
+        if isinstance(line.holder, model):
+            pk = line.holder.pk
+            quantities[pk] = quantities.get(pk, 0) + line.quantity
+    return quantities
+
+
+def _lock(model, quantities):
+    """Lock the rows in id order, so concurrent callers queue, not deadlock."""
+    list(
+        model.objects.filter(pk__in=quantities)
+        .order_by("pk")
+        .select_for_update()
+        .values_list("pk", flat=True)
+    )
+
+
+def _read_back(lines, model, quantities, sign):
+    """Fill previous/new from the rows as they are after the UPDATE.
+
+    Lines on the same row are given consecutive balances in line order, as
+    if they had been applied one after another.
+    """
+    after = dict(model.objects.filter(pk__in=quantities).values_list("pk", "stock"))
+    running = {pk: after[pk] - sign * quantities[pk] for pk in quantities}
+    for line in lines:
+        if isinstance(line.holder, model):
+            pk = line.holder.pk
+            line.previous = running[pk]
+            line.new = running[pk] = line.previous + sign * line.quantity
+            line.holder.stock = after[pk]
+
+
+def take(lines):
+    """Take every line's quantity off stock, all or nothing.
+
+    Raises InsufficientStock, with nothing changed, if any row has less than
+    its lines ask for.
+    """
+    short = None
+    try:
+        with transaction.atomic():
+            for model in (Product, ProductVariant):
+                quantities = _by_model(lines, model)
+                if not quantities:
+                    continue
+                _lock(model, quantities)
+                amount = _per_row(quantities)
+                updated = model.objects.filter(pk__in=quantities, stock__gte=amount).update(
+                    stock=F("stock") - amount,
+                    # update() skips auto_now; the POS catalogue delta reads this.
+                    updated_at=Now(),
+                )
+                if updated != len(quantities):
+                    short = (model, quantities)
+                    raise _Short
+                _read_back(lines, model, quantities, -1)
+    except _Short:
+        model, quantities = short
+        stock = dict(model.objects.filter(pk__in=quantities).values_list("pk", "stock"))
+        failed = []
+        for line in lines:
+            if isinstance(line.holder, model):
+                line.available = stock.get(line.holder.pk, 0)
+                if line.available < quantities[line.holder.pk]:
+                    failed.append(line)
+        raise InsufficientStock(failed or [line for line in lines if line.available is not None])
+
+
+def give_back(lines):
+    """Put the lines' quantities back on stock (a cancelled or trimmed sale)."""
+    for model in (Product, ProductVariant):
+        quantities = _by_model(lines, model)
+        if not quantities:
+            continue
+        _lock(model, quantities)
+        model.objects.filter(pk__in=quantities).update(
+            stock=F("stock") + _per_row(quantities), updated_at=Now()
+        )
+        _read_back(lines, model, quantities, 1)
+
+
+def adjust(holder, delta):
+    """Move a product's or variant's stock by `delta`, stopping at zero.
+
+    Returns (previous, new). An increase, or a decrease the row can cover,
+    is one UPDATE. Only a decrease past zero, which lands on zero as
+    adjustments always have, needs the row locked to know what it stood at.
+    Run inside transaction.atomic.
+    """
+    rows = type(holder).objects.filter(pk=holder.pk)
+    if delta >= 0:
+        rows.update(stock=F("stock") + delta, updated_at=Now())
+    elif not rows.filter(stock__gte=-delta).update(
+        stock=F("stock") + delta, updated_at=Now()
+    ):
+        previous = rows.select_for_update().values_list("stock", flat=True).get()
+        rows.update(stock=Greatest(F("stock") + delta, Value(0)), updated_at=Now())
+        holder.stock = 0
+        return previous, 0
+    holder.stock = rows.values_list("stock", flat=True).get()
+    return holder.stock - delta, holder.stock
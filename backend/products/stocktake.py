@@ -0,0 +1,205 @@
+"""Stocktake: a whole shelf count applied in one request.
+
+A physical count used to be entered through adjust_stock, one product or
+variant per request, each with its own transaction, save() and movement
+INSERT; counting a 5,000-SKU shop was an afternoon of clicks. Here the
+count arrives as one list (JSON, or a sheet with the columns below), and
+
+  1. the rows it names are read, and locked, with one query per table;
+  2. each count is compared with the stock on record;
+  3. the rows that differ are written with one bulk_update per table and
+     one "adjustment" movement each, all in one bulk_create.
+
+A count is the new stock, not a change to it, so lines naming the same
+SKU (counted on two shelves) are added together first. The rows stay
+locked from step 1 to the commit so a sale in between cannot be lost
+under the counted figure. With `apply=False` nothing is written and the
+same variance report comes back, for a preview before the owner confirms.
+
+Sheet columns: product_id or product_code, variant_id (for products with
+variants) and counted.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Product, ProductStockMovement, ProductVariant
+
+REASON = "Stocktake"
+
+MAX_LINES = 20000
+
+
+def _whole(value, label):
+    try:
+        number = Decimal(str(value).strip())
+    except Exception:
+        raise ValueError(f"{label}: counted must be a whole number")
+    if number != number.to_integral_value() or number < 0:
+        raise ValueError(f"{label}: counted must be a whole number, 0 or more")
+    return int(number)
+
+
+def _id(value):
+    value = str(value if value is not None else "").strip()
+    if value.endswith(".0"):
+        # Spreadsheets hand ids back as floats.
+        value = value[:-2]
+    return int(value) if value.isdigit() else None
+
+
+def parse_counts(rows, first_row=1):
+    """[(label, product_id, product_code, variant_id, counted)] from raw rows.
+
+    `rows` are dicts, from JSON or from a sheet; `first_row` numbers them in
+    error messages (2 for a sheet under its header).
+    """
+    if len(rows) > MAX_LINES:
+        raise ValueError(f"A stocktake can hold at most {MAX_LINES} lines")
+    counts = []
+    for number, row in enumerate(rows, start=first_row):
+        label = f"Row {number}"
+        if not isinstance(row, dict):
+            raise ValueError(f"{label}: each line must be an object")
+        row = {str(key).lower().strip().lstrip("\ufeff"): value for key, value in row.items()}
+        product_id = _id(row.get("product_id", row.get("product")))
+        code = str(row.get("product_code") or "").strip() or None
+        variant_id = _id(row.get("variant_id", row.get("variant")))
+        if product_id is None and code is None and variant_id is None:
+            raise ValueError(f"{label}: product_id, product_code or variant_id is required")
+        if row.get("counted") in (None, ""):
+            raise ValueError(f"{label}: counted is required")
+        counts.append((label, product_id, code, variant_id, _whole(row["counted"], label)))
+    return counts
+
+
+def _resolve(user, counts, lock):
+    """Map every line to the row it counts; {holder key: [holder, counted]}."""
+    products = Product.objects.filter(user=user)
+    variants = ProductVariant.objects.filter(product__user=user).select_related("product")
+    if lock:
+        products = products.select_for_update()
+        variants = variants.select_for_update(of=("self",))
+
+    product_ids = {c[1] for c in counts if c[1] is not None and c[3] is None}
+    codes = {c[2] for c in counts if c[2] is not None and c[3] is None}
+    variant_ids = {c[3] for c in counts if c[3] is not None}
+
+    by_id, by_code = {}, {}
+    if product_ids or codes:
+        for product in products.filter(
+            Q(id__in=product_ids) | Q(product_code__in=codes)
+        ).order_by("id"):
+            by_id[product.id] = product
+            if product.product_code:
+                by_code[product.product_code] = product
+    found_variants = (
+        {v.id: v for v in variants.filter(id__in=variant_ids).order_by("id")}
+        if variant_ids
+        else {}
+    )
+
+    held = {}
+    for label, product_id, code, variant_id, counted in counts:
+        if variant_id is not None:
+            holder = found_variants.get(variant_id)
+            if holder is None or (product_id is not None and holder.product_id != product_id):
+                raise ValueError(f"{label}: variant {variant_id} was not found")
+        else:
+            holder = by_id.get(product_id) if product_id is not None else by_code.get(code)
+            if holder is None:
+                raise ValueError(f"{label}: product {product_id or code} was not found")
+            if holder.has_variants:
+                raise ValueError(f"{label}: {holder.name} has variants; count each variant")
+            if holder.no_stock_required:
+                raise ValueError(f"{label}: {holder.name} does not keep stock")
+        key = (type(holder), holder.pk)
+        if key in held:
+            held[key][1] += counted
+        else:
+            held[key] = [holder, counted]
+    return held
+
+
+def _report_line(holder, counted):
+    variance = counted - holder.stock
+    if isinstance(holder, ProductVariant):
+        product, variant = holder.product, holder
+    else:
+        product, variant = holder, None
+    return {
+        "product_id": product.id,
+        "variant_id": variant.id if variant else None,
+        "name": str(variant) if variant else product.name,
+        "previous_stock": holder.stock,
+        "counted": counted,
+        "variance": variance,
+        "variance_value": float(variance * holder.buy_price),
+    }
+
+
+def run(user, counts, apply=True, notes=""):
+    """Compare `counts` (from parse_counts) with stock; write them if `apply`.
+
+    Returns the variance report: lines that differ from the record, and a
+    summary of the whole count. Raises ValueError, before anything is
+    written, for a line that names nothing this shop owns.
+    """
+    with transaction.atomic():
+        held = _resolve(user, counts, lock=apply)
+        lines = [_report_line(holder, counted) for holder, counted in held.values()]
+        changed = [
+            (holder, line)
+            for (holder, _counted), line in zip(held.values(), lines)
+            if line["variance"]
+        ]
+        if apply and changed:
+            _write(changed, user, notes)
+
+    differing = [line for _holder, line in changed]
+    differing.sort(key=lambda line: abs(line["variance_value"]), reverse=True)
+    return {
+        "applied": apply,
+        "summary": {
+            "lines": len(lines),
+            "changed": len(differing),
+            "units_over": sum(l["variance"] for l in differing if l["variance"] > 0),
+            "units_short": -sum(l["variance"] for l in differing if l["variance"] < 0),
+            "variance_value": round(sum(l["variance_value"] for l in differing), 2),
+        },
+        "lines": differing,
+    }
+
+
+def _write(changed, user, notes):
+    now = timezone.now()
+    movements = []
+    touched = {Product: [], ProductVariant: []}
+    for holder, line in changed:
+        product = holder.product if isinstance(holder, ProductVariant) else holder
+        movements.append(
+            ProductStockMovement(
+                product=product,
+                variant=holder if isinstance(holder, ProductVariant) else None,
+                user=user,
+                movement_type="adjustment",
+                quantity=line["variance"],
+                previous_stock=line["previous_stock"],
+                new_stock=line["counted"],
+                reason=REASON,
+                notes=notes,
+            )
+        )
+        holder.stock = line["counted"]
+        # bulk_update skips auto_now; the POS catalogue delta reads this.
+        holder.updated_at = now
+        touched[type(holder)].append(holder)
+    for model, rows in touched.items():
+        if rows:
+            model.objects.bulk_update(rows, ["stock", "updated_at"], batch_size=1000)
+    # Uncosted adjustments leave the cost totals (products.costing) as they
+    # are, so skipping the movement signals here loses nothing.
+    ProductStockMovement.objects.bulk_create(movements, batch_size=1000)
@@ -0,0 +1,331 @@
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.images import derivative_name
+
+from .models import Product, ProductPhoto, ProductStockMovement, ProductTombstone, ProductVariant
+from .search import normalize
+
+
+class ProductChangesAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.rice = Product.objects.create(name='Rice', sell_price=50, stock=10, user=self.user)
+        self.shirt = Product.objects.create(name='Shirt', has_variants=True, user=self.user)
+        ProductVariant.objects.create(
+            product=self.shirt, color='Red', size='M', buy_price=300, sell_price=450, stock=3
+        )
+
+    def _settle(self):
+        past = timezone.now() - timedelta(minutes=1)
+        Product.objects.update(updated_at=past)
+        ProductVariant.objects.update(updated_at=past)
+        ProductTombstone.objects.update(deleted_at=past)
+
+    def test_pages_then_reports_only_what_changed(self):
+        self._settle()
+        response = self.client.get('/api/products/changes/', {'limit': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['has_more'])
+        seen = [row['id'] for row in response.data['products']]
+
+        response = self.client.get(
+            '/api/products/changes/', {'limit': 1, 'since': response.data['next']}
+        )
+        seen += [row['id'] for row in response.data['products']]
+        self.assertEqual(sorted(seen), sorted([self.rice.id, self.shirt.id]))
+        token = response.data['next']
+
+        response = self.client.get('/api/products/changes/', {'since': token})
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual(response.data['products'], [])
+
+        self.shirt.delete()
+        self._settle()
+        response = self.client.get('/api/products/changes/', {'since': token})
+        kinds = sorted(row['kind'] for row in response.data['deleted'])
+        self.assertEqual(kinds, ['product', 'variant'])
+
+    def test_bad_token_is_rejected(self):
+        response = self.client.get('/api/products/changes/', {'since': 'nonsense'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleting_the_account_leaves_no_tombstones(self):
+        other = User.objects.create_user(username='other', password='testpass123')
+        Product.objects.create(name='Tea', user=other)
+        User.objects.filter(pk__in=[self.user.pk, other.pk]).delete()
+        self.assertFalse(ProductTombstone.objects.exists())
+
+
+class ProductSearchAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_normalize_folds_bangla_input(self):
+        self.assertEqual(normalize('শাড়ি ১২'), normalize('শা\u09a1\u09bcি 12'))
+        self.assertEqual(normalize('উত্\u200cসব'), normalize('উৎসব'))
+        self.assertEqual(normalize(' Brake\u200d  PAD '), 'brake pad')
+
+    def test_exact_code_then_prefix_then_contains(self):
+        Product.objects.create(name='Front brake pad', product_code='BP-2', user=self.user)
+        Product.objects.create(name='Brake cable', product_code='BC-1', user=self.user)
+        Product.objects.create(name='Disc', product_code='BRAKE', user=self.user)
+
+        response = self.client.get('/api/products/fast-search/', {'q': 'brake'})
+        names = [row['name'] for row in response.data['results']]
+        self.assertEqual(names, ['Disc', 'Brake cable', 'Front brake pad'])
+
+
+class ProductPhotoDerivativeTest(APITestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Helmet', sell_price=900, user=self.user)
+
+    def _phone_photo(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 1500), 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_makes_small_copies_without_exif(self):
+        response = self.client.post(
+            f'/api/products/{self.product.id}/add_photos/',
+            {'photos': [self._phone_photo()]},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        photo = self.product.photos.get()
+        storage = photo.image.storage
+        thumb_name = derivative_name(photo.image.name, 'thumb')
+        sizes = self.product.main_photo_sizes
+        self.assertEqual(sizes['original'], photo.image.url)
+        self.assertEqual(sizes['thumb'], storage.url(thumb_name))
+        thumb = Image.open(storage.path(thumb_name))
+        self.assertEqual(max(thumb.size), 160)
+        self.assertNotIn(0x010F, thumb.getexif())
+
+        photo.delete()
+        self.assertFalse(storage.exists(thumb_name))
+
+    def test_backfill_makes_copies_the_list_then_shows(self):
+        photo = ProductPhoto.objects.create(product=self.product, image=self._phone_photo())
+        ProductPhoto.objects.filter(pk=photo.pk).update(image_derived='')
+        thumb_name = derivative_name(photo.image.name, 'thumb')
+        photo.image.storage.delete(thumb_name)
+
+        # Without the copies the list serves the original and reads no files.
+        with mock.patch('django.core.files.storage.FileSystemStorage.exists') as exists:
+            sizes = Product.objects.get(pk=self.product.pk).main_photo_sizes
+        exists.assert_not_called()
+        self.assertEqual(sizes['thumb'], photo.image.url)
+
+        call_command(
+            'backfill_image_derivatives', '--model', 'products.ProductPhoto', stdout=io.StringIO()
+        )
+        sizes = Product.objects.get(pk=self.product.pk).main_photo_sizes
+        self.assertEqual(sizes['thumb'], photo.image.storage.url(thumb_name))
+        self.assertTrue(photo.image.storage.exists(thumb_name))
+
+
+class CostBasisTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.product = Product.objects.create(name='Oil', sell_price=30, user=self.user)
+
+    def _restock(self, quantity, cost, average):
+        return self.client.post(
+            f'/api/products/{self.product.id}/adjust_stock/',
+            {'quantity': quantity, 'buy_price': cost, 'update_average_price': True,
+             'new_average_buy_price': average},
+            format='json',
+        )
+
+    def test_totals_follow_movements_and_value_stock_every_way(self):
+        self._restock(4, 10, '10')
+        self._restock(6, 20, '16')
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.cost_quantity, self.product.cost_total), (10, Decimal('160')))
+        self.assertEqual(self.product.buy_price, Decimal('16'))
+
+        # Sold down to 3 and restocked dearer: the posted on-hand average
+        # is stored, not the all-time average of the restocks (19).
+        self.client.post(f'/api/products/{self.product.id}/adjust_stock/', {'quantity': -7}, format='json')
+        self._restock(5, 25, '21.63')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.buy_price, Decimal('21.63'))
+        self.client.post(f'/api/products/{self.product.id}/adjust_stock/', {'quantity': -5}, format='json')
+
+        values = {
+            method: self.client.get(
+                '/api/products/statistics/', {'valuation': method}
+            ).data['total_inventory_value']
+            for method in ('book', 'average', 'fifo')
+        }
+        self.assertEqual(
+            values,
+            {'book': Decimal('64.89'), 'average': Decimal('57.00'), 'fifo': Decimal('75.00')},
+        )
+        default = self.client.get('/api/products/statistics/').data
+        self.assertEqual(default['total_inventory_value'], Decimal('64.89'))
+        bad = self.client.get('/api/products/statistics/', {'valuation': 'lifo'})
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for cost in (25, 20):
+            dearer = self.product.stock_movements.get(cost_per_unit=cost)
+            response = self.client.delete(f'/api/stock-movements/{dearer.id}/')
+        self.assertEqual(response.data['new_buy_price'], 10.0)
+
+        Product.objects.filter(pk=self.product.pk).update(cost_quantity=99)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_cost_basis', '--check', stdout=io.StringIO())
+        call_command('rebuild_cost_basis', stdout=io.StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.cost_quantity, self.product.cost_total), (4, Decimal('40')))
+
+
+class StocktakeTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.products = [
+            Product.objects.create(
+                name=f'Item {index}', product_code=f'C{index}', buy_price=10,
+                sell_price=15, stock=5, user=self.user
+            )
+            for index in range(30)
+        ]
+        shirt = Product.objects.create(name='Shirt', has_variants=True, user=self.user)
+        self.variant = ProductVariant.objects.create(
+            product=shirt, color='Red', size='M', buy_price=100, sell_price=150, stock=4
+        )
+
+    def test_count_is_previewed_then_applied_in_a_few_queries(self):
+        counts = [{'product_id': p.id, 'counted': 5} for p in self.products]
+        counts[0]['counted'] = 2
+        counts.append({'product_id': self.products[1].id, 'counted': 3})
+        counts.append({'variant_id': self.variant.id, 'counted': 6})
+
+        preview = self.client.post(
+            '/api/products/stocktake/', {'counts': counts, 'preview': True}, format='json'
+        )
+        self.assertEqual(preview.status_code, status.HTTP_200_OK)
+        self.assertFalse(preview.data['applied'])
+        self.assertEqual(
+            preview.data['summary'],
+            {'lines': 31, 'changed': 3, 'units_over': 5, 'units_short': 3,
+             'variance_value': 200.0},
+        )
+        self.assertEqual(preview.data['lines'][0]['name'], 'Shirt - Red - M')
+        self.assertFalse(ProductStockMovement.objects.exists())
+
+        with self.assertNumQueries(7):
+            applied = self.client.post('/api/products/stocktake/', {'counts': counts}, format='json')
+        self.assertTrue(applied.data['applied'])
+        self.products[1].refresh_from_db()
+        self.variant.refresh_from_db()
+        self.assertEqual((self.products[1].stock, self.variant.stock), (8, 6))
+        self.assertEqual(
+            sorted(ProductStockMovement.objects.values_list('quantity', 'new_stock')),
+            [(-3, 2), (2, 6), (3, 8)],
+        )
+
+        sheet = SimpleUploadedFile(
+            'count.csv', '﻿Product_Code,counted\nC2,0\n'.encode('utf-8'),
+            content_type='text/csv'
+        )
+        response = self.client.post('/api/products/stocktake/', {'file': sheet}, format='multipart')
+        self.assertEqual(response.data['summary']['units_short'], 5)
+
+        missing = self.client.post(
+            '/api/products/stocktake/', {'counts': [{'product_id': 999999, 'counted': 1}]},
+            format='json'
+        )
+        self.assertEqual(missing.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(missing.data['error'], 'Row 1: product 999999 was not found')
+
+
+class SparseFieldsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        Product.objects.create(
+            name='Rice', buy_price=50, sell_price=60, stock=8, user=self.user
+        )
+        shirt = Product.objects.create(name='Shirt', has_variants=True, user=self.user)
+        for size, stock in (('M', 3), ('L', 4)):
+            ProductVariant.objects.create(
+                product=shirt, color='Red', size=size,
+                buy_price=100, sell_price=150, stock=stock
+            )
+
+    def test_picker_reads_only_what_it_asks_for(self):
+        # The staff check, the count and the page; nothing per row.
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                '/api/products/', {'fields': 'id,name,sell_price,total_stock'}
+            )
+        self.assertEqual(response.status_code, 200)
+        rows = {row['name']: row for row in response.data['results']}
+        self.assertEqual(set(rows['Shirt']), {'id', 'name', 'sell_price', 'total_stock'})
+        self.assertEqual(rows['Shirt']['total_stock'], 7)
+        self.assertEqual(rows['Rice']['total_stock'], 8)
+
+        full = self.client.get('/api/products/')
+        omitted = self.client.get('/api/products/', {'omit': 'sold,main_photo_sizes'})
+        self.assertEqual(
+            [dict(row, sold=None, main_photo_sizes=None) for row in full.data['results']],
+            [dict(row, sold=None, main_photo_sizes=None) for row in omitted.data['results']],
+        )
+        self.assertNotIn('sold', omitted.data['results'][0])
+
+        bad = self.client.get('/api/products/', {'fields': 'id,nmae'})
+        self.assertEqual(bad.status_code, 400)
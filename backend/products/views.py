@@ -6,7 +6,7 @@ import json
 import openpyxl
 import xlrd
 from django.db import transaction
-from django.db.models import Count, Max, Q, Sum
+from django.db.models import Case, Count, Exists, Max, OuterRef, Sum, When
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
@@ -14,7 +14,13 @@ from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from core import sparse
+from orders.models import OrderItem
+from vehicles.models import Vehicle
+
+from . import costing, stock, stocktake
 from .models import Product, ProductPhoto, ProductStockMovement, ProductVariant
+from .search import search as search_products
 from .serializers import (
     ProductCreateSerializer,
     ProductDetailSerializer,
@@ -26,6 +32,65 @@ from .serializers import (
 )
 
 
+_VARIANTS = {"prefetch": ("variants",)}
+
+_VEHICLES = Vehicle.objects.filter(product=OuterRef("pk"))
+
+_VARIANTS_STOCK = {
+    "annotate": {
+        "variants_stock": sparse.per_row(
+            ProductVariant.objects.filter(product=OuterRef("pk")), Sum("stock")
+        )
+    }
+}
+
+#: What each ProductListSerializer field needs; see core.sparse.
+LIST_PLAN = {
+    "category_name": {"select": ("category",)},
+    "supplier_name": {"select": ("supplier",)},
+    "total_stock": _VARIANTS_STOCK,
+    "total_quantity": _VARIANTS_STOCK,
+    "average_buy_price": _VARIANTS,
+    "average_sell_price": _VARIANTS,
+    "total_buy_price": _VARIANTS,
+    "total_sell_price": _VARIANTS,
+    "total_profit": _VARIANTS,
+    "profit_margin": _VARIANTS,
+    "variant_count": _VARIANTS,
+    "sold": {
+        "annotate": {
+            "units_sold": Case(
+                When(
+                    has_variants=True,
+                    then=sparse.per_row(
+                        OrderItem.objects.filter(variant__product=OuterRef("pk")),
+                        Sum("quantity"),
+                    ),
+                ),
+                default=sparse.per_row(
+                    OrderItem.objects.filter(product=OuterRef("pk")), Sum("quantity")
+                ),
+            )
+        }
+    },
+    "main_photo": {"prefetch": ("photos",)},
+    "main_photo_sizes": {"prefetch": ("photos",)},
+    "vehicle_stock": {
+        "annotate": {
+            "vehicles_in_stock": sparse.per_row(
+                _VEHICLES.filter(status="in_stock"), Count("pk")
+            )
+        }
+    },
+    "vehicle_sold": {
+        "annotate": {
+            "vehicles_sold": sparse.per_row(_VEHICLES.filter(status="sold"), Count("pk"))
+        }
+    },
+    "is_vehicle": {"annotate": {"has_vehicles": Exists(_VEHICLES)}},
+}
+
+
 class ProductViewSet(viewsets.ModelViewSet):
     """ViewSet for managing products"""
     # Staff logins are held to these; owners are unrestricted.
@@ -59,10 +124,12 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Return products for the authenticated user"""
-        return (
-            Product.objects.filter(user=owner_for(self.request))
-            .select_related("category", "supplier")
-            .prefetch_related("variants", "photos")
+        products = Product.objects.filter(user=owner_for(self.request))
+        if self.action == "list":
+            # Only what the requested fields read (?fields= / ?omit=).
+            return sparse.shape(products, self.request, ProductListSerializer, LIST_PLAN)
+        return products.select_related("category", "supplier").prefetch_related(
+            "variants", "photos"
         )
 
     def get_serializer_class(self):
@@ -304,10 +371,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                         {"error": "Variant not found"}, status=status.HTTP_404_NOT_FOUND
                     )
 
-                previous_stock = variant.stock
-                new_stock = max(0, previous_stock + quantity)
-                variant.stock = new_stock
-                variant.save()
+                previous_stock, new_stock = stock.adjust(variant, quantity)
 
                 # Record stock movement
                 movement_data = {
@@ -338,15 +402,15 @@ class ProductViewSet(viewsets.ModelViewSet):
                     }
                 )
             else:
-                previous_stock = product.stock
-                new_stock = max(0, previous_stock + quantity)
-                product.stock = new_stock
-                
-                # Update average buy price if requested and provided
+                previous_stock, new_stock = stock.adjust(product, quantity)
+
+                # Update average buy price if requested and provided. The
+                # client posts the average of the stock on hand, which the
+                # running totals (products.costing) cannot know: they never
+                # see sales.
                 if update_average_price and new_average_buy_price is not None:
                     product.buy_price = new_average_buy_price
-                
-                product.save()
+                    product.save(update_fields=["buy_price", "updated_at"])
 
                 # Record stock movement
                 movement_data = {
@@ -452,6 +516,35 @@ class ProductViewSet(viewsets.ModelViewSet):
                 "Unsupported file format. Please use CSV, XLSX, or XLS files."
             )
 
+    @action(detail=False, methods=["post"])
+    def stocktake(self, request):
+        """Apply a physical count of many products and variants at once.
+
+        Takes `counts` (a list of {product_id | product_code, variant_id,
+        counted}) or a `file` sheet with those columns. With `preview` set,
+        only the variance report comes back. See products.stocktake.
+        """
+        preview = str(request.data.get("preview", "")).lower() in ("1", "true", "yes")
+        try:
+            if "file" in request.FILES:
+                counts = stocktake.parse_counts(
+                    self._extract_data_from_file(request.FILES["file"]), first_row=2
+                )
+            else:
+                rows = request.data.get("counts")
+                if not isinstance(rows, list) or not rows:
+                    raise ValueError("counts must be a non-empty list")
+                counts = stocktake.parse_counts(rows)
+            report = stocktake.run(
+                owner_for(request),
+                counts,
+                apply=not preview,
+                notes=request.data.get("notes", ""),
+            )
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
     @action(detail=False, methods=["post"])
     def upload_csv(self, request):
         """Upload products from CSV, XLSX, or XLS file"""
@@ -832,14 +925,16 @@ class ProductViewSet(viewsets.ModelViewSet):
         products_with_variants = queryset.filter(has_variants=True).count()
         total_stock = sum(product.total_stock for product in queryset)
 
-        # Calculate total inventory value
-        total_value = 0
-        for product in queryset:
-            if product.has_variants:
-                for variant in product.variants.all():
-                    total_value += variant.stock * variant.buy_price
-            else:
-                total_value += product.stock * product.buy_price
+        # Calculate total inventory value: stock x buy price by default, or
+        # ?valuation=average|fifo from the cost history (products.costing)
+        method = request.query_params.get("valuation", "book")
+        try:
+            total_value = costing.valuation(queryset, method)
+        except ValueError:
+            return Response(
+                {"error": "এই মূল্যায়ন পদ্ধতি নেই।"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         # Low stock products (less than 10 items)
         low_stock_products = []
@@ -871,6 +966,7 @@ class ProductViewSet(viewsets.ModelViewSet):
                 "products_with_variants": products_with_variants,
                 "total_stock": total_stock,
                 "total_inventory_value": total_value,
+                "valuation": method,
                 "low_stock_count": len(low_stock_products),
                 "low_stock_products": low_stock_products[:10],  # Limit to first 10
             }
@@ -917,16 +1013,12 @@ class ProductViewSet(viewsets.ModelViewSet):
         if not query or len(query) < 2:
             return Response({"results": [], "total": 0})
 
-        queryset = self.get_queryset()
-
-        # Search in multiple fields
-        search_results = queryset.filter(
-            Q(name__icontains=query)
-            | Q(details__icontains=query)
-            | Q(location__icontains=query)
-            | Q(category__name__icontains=query)
-            | Q(supplier__name__icontains=query)
-        ).distinct()
+        owner = owner_for(request)
+        search_results = search_products(
+            Product.objects.filter(user=owner).select_related("category"),
+            query,
+            owner=owner,
+        )
 
         # Format results for frontend
         results = []
@@ -954,6 +1046,25 @@ class ProductViewSet(viewsets.ModelViewSet):
             {"results": results, "total": search_results.count(), "query": query}
         )
 
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        """Catalogue rows changed or deleted since `since`; see products.changes."""
+        from .changes import DEFAULT_LIMIT, MAX_LIMIT, changes_for
+
+        try:
+            limit = int(request.query_params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        try:
+            payload = changes_for(
+                owner_for(request), request.query_params.get("since"), limit
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(payload)
+
     @action(detail=False, methods=["get"], url_path="fast-search")
     def fast_search(self, request):
         """Fast lightweight search for product selection in orders/invoices.
@@ -964,16 +1075,14 @@ class ProductViewSet(viewsets.ModelViewSet):
         if not query or len(query) < 1:
             return Response({"results": [], "count": 0})
 
-        queryset = (
-            Product.objects.filter(user=owner_for(request), is_active=True)
-            .filter(
-                Q(name__icontains=query)
-                | Q(product_code__icontains=query)
-                | Q(category__name__icontains=query)
-            )
+        owner = owner_for(request)
+        queryset = search_products(
+            Product.objects.filter(user=owner, is_active=True)
             .select_related("category")
-            .prefetch_related("variants")[:limit]
-        )
+            .prefetch_related("variants"),
+            query,
+            owner=owner,
+        )[:limit]
 
         serializer = ProductSearchSerializer(queryset, many=True)
         return Response({"results": serializer.data, "count": len(serializer.data)})
@@ -997,6 +1106,7 @@ class ProductStockMovementViewSet(viewsets.ModelViewSet):
     filterset_fields = ["product", "variant", "movement_type"]
     ordering_fields = ["created_at"]
     ordering = ["-created_at"]
+    cursor_keys = ("created_at", "id")
 
     def get_queryset(self):
         """Return stock movements for the authenticated user"""
@@ -1022,60 +1132,23 @@ class ProductStockMovementViewSet(viewsets.ModelViewSet):
         self.perform_destroy(movement)
         
         # Reverse the stock change
-        if variant:
-            # For variant stock
-            if movement_type in ['in', 'adjustment'] and movement_quantity > 0:
-                # Was stock addition, so subtract it back
-                variant.stock = max(0, variant.stock - movement_quantity)
-            elif movement_type in ['out', 'sale'] and movement_quantity < 0:
-                # Was stock reduction, so add it back
-                variant.stock += abs(movement_quantity)
-            variant.save()
-        else:
-            # For main product stock
-            if movement_type in ['in', 'adjustment'] and movement_quantity > 0:
-                # Was stock addition, so subtract it back
-                product.stock = max(0, product.stock - movement_quantity)
-            elif movement_type in ['out', 'sale'] and movement_quantity < 0:
-                # Was stock reduction, so add it back
-                product.stock += abs(movement_quantity)
-        
-        # Recalculate the weighted average buy price from remaining movements
-        # Get all remaining stock movements for this product that added stock and had cost
-        remaining_movements = ProductStockMovement.objects.filter(
-            product=product,
-            quantity__gt=0,  # Only stock additions
-            cost_per_unit__isnull=False,
-            cost_per_unit__gt=0
-        ).order_by('created_at')
-        
-        if remaining_movements.exists():
-            # Calculate weighted average from remaining movements
-            total_cost = 0
-            total_quantity = 0
-            
-            for mov in remaining_movements:
-                cost = float(mov.cost_per_unit)
-                qty = mov.quantity
-                total_cost += cost * qty
-                total_quantity += qty
-            
-            if total_quantity > 0:
-                new_avg_price = total_cost / total_quantity
-                product.buy_price = round(new_avg_price, 2)
-            else:
-                # If no valid movements remain, keep current price
-                pass
-        else:
-            # If no remaining cost movements, you might want to:
-            # Option 1: Keep current price (safer)
-            # Option 2: Reset to 0 (commented below)
-            # product.buy_price = 0
-            pass
-        
-        product.save()
-        
+        holder = variant or product
+        if movement_type in ['in', 'adjustment'] and movement_quantity > 0:
+            # Was stock addition, so subtract it back
+            holder.stock = max(0, holder.stock - movement_quantity)
+        elif movement_type in ['out', 'sale'] and movement_quantity < 0:
+            # Was stock reduction, so add it back
+            holder.stock += abs(movement_quantity)
+
+        # The movement's cost has already left the running totals (see
+        # products.costing); with none left, keep the current price.
+        holder.refresh_from_db(fields=["cost_quantity", "cost_total"])
+        new_price = costing.average(holder)
+        if new_price is not None:
+            holder.buy_price = new_price
+        holder.save(update_fields=["stock", "buy_price", "updated_at"])
+
         return Response({
             'message': 'Stock movement deleted successfully',
-            'new_buy_price': float(product.buy_price) if product.buy_price else 0
+            'new_buy_price': float(holder.buy_price) if holder.buy_price else 0
         }, status=status.HTTP_200_OK)
@@ -5,15 +5,18 @@ it no way to sell: the developer had to fall back on the session-authenticated
 dashboard API, which a storefront cannot use. This closes that loop — a website
 can read products with the key and post an order back with the same key.
 
-Stock is decremented inside the same transaction as the order, so two visitors
-buying the last unit cannot both succeed.
+Stock is taken with products.stock.take inside the same transaction as the
+order, so two visitors buying the last unit cannot both succeed.
 """
 
 from decimal import Decimal, InvalidOperation
 
+from core.idempotency import idempotent
 from customers.models import Customer
 from django.db import transaction
-from orders.models import Order, OrderItem
+from orders.models import Order, OrderItem, OrderStockMovement
+from orders.pipeline import stock_movements
+from products import stock
 from products.models import Product, ProductVariant
 from rest_framework import permissions, status
 from rest_framework.response import Response
@@ -40,6 +43,7 @@ class PublicOrderCreateView(RateLimitMixin, APIView):
     authentication_classes = [PublicAPIKeyAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         user = request.user
         items_data = request.data.get("items") or []
@@ -110,13 +114,6 @@ class PublicOrderCreateView(RateLimitMixin, APIView):
             unit_price = variant.sell_price if variant else product.sell_price
             buy_price = variant.buy_price if variant else product.buy_price
 
-            if not product.no_stock_required:
-                available = variant.stock if variant else product.stock
-                if available < quantity:
-                    raise ValueError(
-                        f"Only {available} left of {product.name}."
-                    )
-
             line_total = unit_price * quantity
             subtotal += line_total
             buy_total += buy_price * quantity
@@ -168,8 +165,11 @@ class PublicOrderCreateView(RateLimitMixin, APIView):
             notes=(payload.get("notes") or "").strip() or None,
         )
 
+        items = []
         for product, variant, quantity, unit_price, buy_price, line_total in lines:
-            OrderItem.objects.create(
+            if variant is not None:
+                variant.product = product
+            item = OrderItem(
                 order=order,
                 product=product,
                 variant=variant,
@@ -178,17 +178,22 @@ class PublicOrderCreateView(RateLimitMixin, APIView):
                 buy_price=buy_price,
                 total_price=line_total,
                 product_name=product.name,
+                variant_details=str(variant) if variant else None,
             )
-            if product.no_stock_required:
-                continue
-            if variant:
-                ProductVariant.objects.filter(pk=variant.pk).update(
-                    stock=variant.stock - quantity
-                )
-            else:
-                Product.objects.filter(pk=product.pk).update(
-                    stock=product.stock - quantity
-                )
+            # Products sold without stock stay out of it even when a variant
+            # is named, as they always have here.
+            stock_line = None
+            if not product.no_stock_required:
+                stock_line = stock.StockLine(product, variant, quantity)
+            items.append((item, stock_line))
+        OrderItem.objects.bulk_create([item for item, _ in items])
+
+        try:
+            stock.take([line for _, line in items if line is not None])
+        except stock.InsufficientStock as exc:
+            short = exc.lines[0]
+            raise ValueError(f"Only {short.available} left of {short.product.name}.")
+        OrderStockMovement.objects.bulk_create(stock_movements(order, items, user))
 
         return order
 
@@ -1,3 +1,4 @@
+from core.images import image_sizes
 from products.models import Product, ProductPhoto, ProductVariant
 from rest_framework import serializers
 
@@ -7,9 +8,14 @@ from .models import APIKeyUsageLog, PublicAPIKey
 class PublicProductPhotoSerializer(serializers.ModelSerializer):
     """Serializer for product photos in public API"""
 
+    sizes = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductPhoto
-        fields = ["id", "image", "alt_text", "order"]
+        fields = ["id", "image", "sizes", "alt_text", "order"]
+
+    def get_sizes(self, obj):
+        return image_sizes(obj.image, obj.image_derived, self.context.get("request"))
 
 
 class PublicProductVariantSerializer(serializers.ModelSerializer):
@@ -38,6 +44,7 @@ class PublicProductSerializer(serializers.ModelSerializer):
     photos = PublicProductPhotoSerializer(many=True, read_only=True)
     variants = PublicProductVariantSerializer(many=True, read_only=True)
     main_photo = serializers.SerializerMethodField()
+    main_photo_sizes = serializers.ReadOnlyField()
     profit_margin = serializers.SerializerMethodField()
     total_stock = serializers.SerializerMethodField()
 
@@ -58,6 +65,7 @@ class PublicProductSerializer(serializers.ModelSerializer):
             "profit_margin",
             "total_stock",
             "main_photo",
+            "main_photo_sizes",
             "photos",
             "variants",
             "is_active",
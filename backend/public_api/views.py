@@ -260,6 +260,8 @@ class APIUsageLogListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsShopOwner]
 
     serializer_class = APIKeyUsageLogSerializer
+    # The log only grows; ?cursor= pages it on the (api_key, timestamp) index.
+    cursor_keys = ("timestamp", "id")
 
     def get_queryset(self):
         try:
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscription', '0005_paymenttransaction'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['user', 'created_at'], name='subscriptio_user_id_1e9818_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smssenthistory',
+            index=models.Index(fields=['user', 'sent_at'], name='subscriptio_user_id_d03ce1_idx'),
+        ),
+    ]
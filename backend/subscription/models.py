@@ -51,6 +51,9 @@ class SMSSentHistory(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
     sms_count = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "sent_at"])]
+
     def __str__(self):
         return f"{self.user} to {self.recipient} at {self.sent_at} ({self.status})"
 
@@ -79,6 +82,7 @@ class PaymentTransaction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "created_at"])]
 
     def __str__(self):
         return f"{self.user} - {self.payment_type} - {self.sp_order_id}"
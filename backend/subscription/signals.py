@@ -1,8 +1,8 @@
 # subscription/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserSubscription, SubscriptionPlan
+from .models import SubscriptionPlan, UserSMSCredit, UserSubscription
 
 @receiver(post_save, sender=User)
 def create_user_subscription(sender, instance, created, **kwargs):
@@ -21,3 +21,24 @@ def create_user_subscription(sender, instance, created, **kwargs):
             pass
         except Exception:
             pass
+
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+@receiver(post_save, sender=UserSMSCredit)
+@receiver(post_delete, sender=UserSMSCredit)
+def forget_bootstrap_billing(sender, instance, **kwargs):
+    """The login payload carries the plan and the SMS balance; retire it."""
+    from core.bootstrap import forget
+
+    forget(instance.user_id)
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+def forget_bootstrap_plan(sender, instance, **kwargs):
+    from core.bootstrap import forget
+
+    for user_id in UserSubscription.objects.filter(plan=instance).values_list(
+        "user_id", flat=True
+    ):
+        forget(user_id)
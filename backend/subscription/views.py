@@ -1,3 +1,4 @@
+from core.pagination import KeysetPaginationMixin, StandardPagination
 from core.scoping import owner_for, owner_only
 # subscription/views.py
 from rest_framework import generics, permissions, status
@@ -62,11 +63,17 @@ class UserSMSCreditView(generics.RetrieveAPIView):
 class SMSSentHistoryListView(generics.ListAPIView):
     serializer_class = SMSSentHistorySerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_keys = ("sent_at", "id")
     
     def get_queryset(self):
         return SMSSentHistory.objects.filter(user=owner_for(self.request)).order_by('-sent_at')
     
     def list(self, request, *args, **kwargs):
+        if 'cursor' in request.query_params:
+            # Keyset pages (core.pagination) instead of page/total_pages.
+            self.pagination_class = StandardPagination
+            return super().list(request, *args, **kwargs)
+
         # Get page number from query params, default to 1
         page = int(request.GET.get('page', 1))
         page_size = 10  # 10 results per page
@@ -96,10 +103,11 @@ class SMSSentHistoryListView(generics.ListAPIView):
         })
 
 
-class PaymentTransactionPagination(PageNumberPagination):
+class PaymentTransactionPagination(KeysetPaginationMixin, PageNumberPagination):
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 200
+    cursor_keys = ("created_at", "id")
 
 
 class PaymentTransactionHistoryView(generics.ListAPIView):
@@ -1,4 +1,4 @@
-from core.uploads import validate_document
+from core.uploads import FileMetadata, validate_document
 
 from django.db import models
 from django.contrib.auth.models import User
@@ -57,7 +57,9 @@ class Supplier(models.Model):
         return (self.total_amount or 0) - (self.total_paid or 0)
 
 
-class Purchase(models.Model):
+class Purchase(FileMetadata):
+    metadata_source = 'proof_document'
+
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('completed', 'Completed'),
@@ -83,7 +85,9 @@ class Purchase(models.Model):
         return f"Purchase from {self.supplier.name} - {self.date} - ${self.amount}"
 
 
-class Payment(models.Model):
+class Payment(FileMetadata):
+    metadata_source = 'proof_document'
+
     METHOD_CHOICES = [
         ('cash', 'Cash'),
         ('card', 'Card'),
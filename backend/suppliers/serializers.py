@@ -1,3 +1,4 @@
+from core.protected_media import ProtectedFilesMixin, protected_url
 from rest_framework import serializers
 from .models import Supplier, Purchase, Payment
 
@@ -40,7 +41,9 @@ class SupplierCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class PurchaseSerializer(serializers.ModelSerializer):
+class PurchaseSerializer(ProtectedFilesMixin, serializers.ModelSerializer):
+    protected_files = ('proof_document',)
+
     supplier = serializers.SerializerMethodField()
     proof_url = serializers.SerializerMethodField()
 
@@ -63,7 +66,7 @@ class PurchaseSerializer(serializers.ModelSerializer):
         if obj.proof_document:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.proof_document.url)
+                return protected_url(obj.proof_document, request)
         return None
 
     def create(self, validated_data):
@@ -73,7 +76,9 @@ class PurchaseSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class PurchaseCreateSerializer(serializers.ModelSerializer):
+class PurchaseCreateSerializer(ProtectedFilesMixin, serializers.ModelSerializer):
+    protected_files = ('proof_document',)
+
     class Meta:
         model = Purchase
         fields = ['supplier', 'date', 'amount', 'status', 'products', 'notes', 'proof_document']
@@ -85,7 +90,9 @@ class PurchaseCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class PurchaseUpdateSerializer(serializers.ModelSerializer):
+class PurchaseUpdateSerializer(ProtectedFilesMixin, serializers.ModelSerializer):
+    protected_files = ('proof_document',)
+
     class Meta:
         model = Purchase
         fields = ['date', 'amount', 'status', 'products', 'notes', 'proof_document']
@@ -106,7 +113,9 @@ class PurchaseUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(ProtectedFilesMixin, serializers.ModelSerializer):
+    protected_files = ('proof_document',)
+
     supplier = serializers.SerializerMethodField()
     proof_url = serializers.SerializerMethodField()
 
@@ -129,7 +138,7 @@ class PaymentSerializer(serializers.ModelSerializer):
         if obj.proof_document:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.proof_document.url)
+                return protected_url(obj.proof_document, request)
         return None
 
     def create(self, validated_data):
@@ -139,7 +148,9 @@ class PaymentSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class PaymentCreateSerializer(serializers.ModelSerializer):
+class PaymentCreateSerializer(ProtectedFilesMixin, serializers.ModelSerializer):
+    protected_files = ('proof_document',)
+
     class Meta:
         model = Payment
         fields = ['supplier', 'date', 'amount', 'method', 'status', 'reference', 'notes', 'proof_document']
@@ -151,7 +162,9 @@ class PaymentCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class PaymentUpdateSerializer(serializers.ModelSerializer):
+class PaymentUpdateSerializer(ProtectedFilesMixin, serializers.ModelSerializer):
+    protected_files = ('proof_document',)
+
     class Meta:
         model = Payment
         fields = ['date', 'amount', 'method', 'status', 'reference', 'notes', 'proof_document']
@@ -1,8 +1,13 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date
+
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Supplier
+from .models import Purchase, Supplier
 
 
 class SupplierModelTest(TestCase):
@@ -59,3 +64,49 @@ class SupplierAPITest(APITestCase):
         response = self.client.get('/api/suppliers/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
+
+
+class ProofDocumentMetadataTest(APITestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        supplier = Supplier.objects.create(name='Test Supplier', user=self.user)
+        self.purchases = [
+            Purchase.objects.create(
+                supplier=supplier, user=self.user, date=date(2024, 1, 1),
+                amount=100, products='Rice',
+            )
+            for _ in range(2)
+        ]
+
+    def _attach(self, purchase):
+        upload = SimpleUploadedFile('bill.pdf', b'%PDF-1.4 same bill', content_type='application/pdf')
+        response = self.client.post(
+            f'/api/purchases/{purchase.id}/proof/', {'proof_document': upload}, format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        purchase.refresh_from_db()
+        return purchase
+
+    def test_records_metadata_and_stores_identical_files_once(self):
+        first = self._attach(self.purchases[0])
+        second = self._attach(self.purchases[1])
+
+        self.assertEqual(first.file_size, 18)
+        self.assertEqual(first.file_mime, 'application/pdf')
+        self.assertEqual(len(first.file_sha256), 64)
+        self.assertEqual(second.proof_document.name, first.proof_document.name)
+
+        response = self.client.delete(f'/api/purchases/{first.id}/proof/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(second.proof_document.storage.exists(second.proof_document.name))
@@ -1,5 +1,6 @@
+from core.protected_media import serve_file
 from core.scoping import HasPermission, owner_for
-from core.uploads import document_error
+from core.uploads import document_error, release_file
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -13,24 +14,32 @@ from .serializers import (
 
 
 class ProofDocumentMixin:
-    """Attach or remove the paper behind a row — an invoice, a money receipt.
+    """Fetch, attach or remove the paper behind a row — an invoice, a money receipt.
 
     The upload is validated explicitly rather than relying on the model field's
     validators: those only run on `full_clean()`, and assigning a file then
     calling `save()` skips them, which would let any extension through.
     """
 
-    @action(detail=True, methods=["post", "delete"], url_path="proof")
+    @action(detail=True, methods=["get", "post", "delete"], url_path="proof")
     def proof(self, request, pk=None):
         record = self.get_object()
 
+        if request.method == "GET":
+            if not record.proof_document:
+                return Response(
+                    {"error": "এই এন্ট্রিতে কোনো কাগজ নেই।"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            return serve_file(request, record.proof_document.name)
+
         if request.method == "DELETE":
             if not record.proof_document:
                 return Response(
                     {"error": "এই এন্ট্রিতে কোনো কাগজ নেই।"},
                     status=status.HTTP_404_NOT_FOUND,
                 )
-            record.proof_document.delete(save=False)
+            release_file(record)
             record.proof_document = None
             record.save(update_fields=["proof_document", "updated_at"])
             return Response(self.get_serializer(record).data)
@@ -48,7 +57,7 @@ class ProofDocumentMixin:
         # Replacing rather than stacking: one row, one paper. The old file is
         # removed so the media directory does not fill with orphans.
         if record.proof_document:
-            record.proof_document.delete(save=False)
+            release_file(record)
         record.proof_document = upload
         record.save(update_fields=["proof_document", "updated_at"])
         return Response(self.get_serializer(record).data)
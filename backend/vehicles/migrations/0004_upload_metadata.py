@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0003_alter_vehicledocument_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicledocument',
+            name='file_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicledocument',
+            name='file_mime',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='vehicledocument',
+            name='file_sha256',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='vehicledocument',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicledocument',
+            name='file_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
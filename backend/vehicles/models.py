@@ -10,7 +10,7 @@ creates a regular Order, so vehicle sales show up in the normal sales list and
 reuse OrderPayment for the payment history.
 """
 
-from core.uploads import validate_document
+from core.uploads import FileMetadata, validate_document
 
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
@@ -192,13 +192,15 @@ class Vehicle(models.Model):
         return self.order.remaining_balance
 
 
-class VehicleDocument(models.Model):
+class VehicleDocument(FileMetadata):
     """A scan/photo of a paper belonging to one vehicle.
 
     `received_date` is the date the shop actually took delivery of that paper —
     which is the thing a buyer asks about, not the upload timestamp.
     """
 
+    metadata_owner = "vehicle__user"
+
     DOC_TYPES = [
         ("papers_receipt", "Papers Receipt"),
         ("registration", "Registration"),
@@ -1,11 +1,14 @@
 from rest_framework import serializers
 
+from core.protected_media import ProtectedFilesMixin, protected_url
 from products.models import Product
 
 from .models import Vehicle, VehicleDocument
 
 
-class VehicleDocumentSerializer(serializers.ModelSerializer):
+class VehicleDocumentSerializer(ProtectedFilesMixin, serializers.ModelSerializer):
+    protected_files = ("file",)
+
     doc_type_display = serializers.CharField(source="get_doc_type_display", read_only=True)
     file_url = serializers.SerializerMethodField()
     file_name = serializers.SerializerMethodField()
@@ -21,6 +24,8 @@ class VehicleDocumentSerializer(serializers.ModelSerializer):
             "file",
             "file_url",
             "file_name",
+            "file_size",
+            "file_mime",
             "received_date",
             "notes",
             "created_at",
@@ -30,9 +35,7 @@ class VehicleDocumentSerializer(serializers.ModelSerializer):
     def get_file_url(self, obj):
         if not obj.file:
             return None
-        request = self.context.get("request")
-        url = obj.file.url
-        return request.build_absolute_uri(url) if request else url
+        return protected_url(obj.file, self.context.get("request"))
 
     def get_file_name(self, obj):
         return obj.file.name.rsplit("/", 1)[-1] if obj.file else None
@@ -1,4 +1,5 @@
 from core.scoping import HasPermission, owner_for
+from core.uploads import release_file
 from django.db import transaction
 from django.db.models import Count, Q, Sum
 from django.utils import timezone
@@ -242,8 +243,8 @@ class VehicleViewSet(viewsets.ModelViewSet):
             return Response(
                 {"error": "ডকুমেন্ট পাওয়া যায়নি।"}, status=status.HTTP_404_NOT_FOUND
             )
-        document.file.delete(save=False)
         document.delete()
+        release_file(document)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=["get"], url_path=r"by-customer/(?P<customer_id>\d+)")